@@ -1,46 +1,2310 @@
+import argparse
+import bisect
+import contextvars
+import hashlib
+import heapq
+import fcntl
+import gzip
+import itertools
 import json
+import logging
+import math
+import mmap
+import os
+import queue
+import re
+import shlex
+import signal
+import sqlite3
+import struct
 import subprocess
-from flask import Flask, render_template, request, jsonify
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+from functools import cmp_to_key
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from urllib.parse import quote
+from uuid import uuid4
+from flask import Flask, Response, g, has_request_context, render_template, request, jsonify, stream_with_context, url_for
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import escape
+from werkzeug.local import LocalProxy
+from werkzeug.serving import make_server
+
+try:
+    import brotli
+except ImportError:  # optional: responses fall back to gzip without it
+    brotli = None
 
 app = Flask(__name__, template_folder='templates', static_folder='static')
 
 # Disable debug mode in production to avoid Werkzeug error pages
 app.config['DEBUG'] = False
 
-def run_task_command(args, timeout=30):
-    """Run a TaskWarrior command via subprocess with timeout"""
+# Report cache settings (seconds / number of cached reports)
+app.config['REPORT_CACHE_TTL'] = float(os.environ.get('ONETASK_REPORT_CACHE_TTL', '30'))
+app.config['REPORT_CACHE_SIZE'] = int(os.environ.get('ONETASK_REPORT_CACHE_SIZE', '32'))
+
+# Read backend: 'cli' runs `task ... export`, 'direct' reads the data files read-only
+app.config['TASK_READ_BACKEND'] = os.environ.get('ONETASK_READ_BACKEND', 'cli')
+
+# Report evaluation: 'cli' runs `task export <report>`, 'local' compiles the report's
+# filter and sort and runs them against one cached export of the open tasks
+app.config['REPORT_EVALUATOR'] = os.environ.get('ONETASK_REPORT_EVALUATOR', 'cli')
+
+# TaskWarrior execution: parallel read commands, queue wait and adaptive timeout bounds (seconds)
+app.config['TASK_READ_CONCURRENCY'] = int(os.environ.get('ONETASK_TASK_READ_CONCURRENCY', '4'))
+app.config['TASK_QUEUE_TIMEOUT'] = float(os.environ.get('ONETASK_TASK_QUEUE_TIMEOUT', '30'))
+app.config['TASK_TIMEOUT_MIN'] = float(os.environ.get('ONETASK_TASK_TIMEOUT_MIN', '5'))
+app.config['TASK_TIMEOUT_MAX'] = float(os.environ.get('ONETASK_TASK_TIMEOUT_MAX', '30'))
+# Parallel write commands; each TaskWarrior database still gets one writer at a time
+app.config['TASK_WRITE_CONCURRENCY'] = int(os.environ.get('ONETASK_TASK_WRITE_CONCURRENCY', '1'))
+
+# Multi-tenant mode: each request names its tenant in TENANT_HEADER (set by an authenticating
+# proxy) and runs against that tenant's TASKRC/TASKDATA, from the TENANTS JSON file or from
+# <TENANT_ROOT>/<name>/{taskrc,data}. Per-tenant command slots, commands allowed to wait for
+# them, and how many tenants keep their caches in memory
+app.config['TENANTS'] = os.environ.get('ONETASK_TENANTS', '')
+app.config['TENANT_ROOT'] = os.environ.get('ONETASK_TENANT_ROOT', '')
+app.config['TENANT_HEADER'] = os.environ.get('ONETASK_TENANT_HEADER', 'X-OneTask-Tenant')
+app.config['TENANT_READ_CONCURRENCY'] = int(os.environ.get('ONETASK_TENANT_READ_CONCURRENCY', '2'))
+app.config['TENANT_MAX_WAITING'] = int(os.environ.get('ONETASK_TENANT_MAX_WAITING', '16'))
+app.config['TENANT_CACHE_LIMIT'] = int(os.environ.get('ONETASK_TENANT_CACHE_LIMIT', '256'))
+
+# Largest number of operations accepted by /tasks/batch
+app.config['BATCH_MAX_OPERATIONS'] = int(os.environ.get('ONETASK_BATCH_MAX_OPERATIONS', '500'))
+
+# Write-behind mode: acknowledge mutations at once and apply them from a journal in the background
+app.config['WRITE_BEHIND'] = os.environ.get('ONETASK_WRITE_BEHIND', '0') == '1'
+app.config['WRITE_BEHIND_JOURNAL'] = os.environ.get('ONETASK_WRITE_BEHIND_JOURNAL',
+                                                    os.path.join(app.instance_path, 'mutations.journal'))
+app.config['WRITE_BEHIND_DELAY'] = float(os.environ.get('ONETASK_WRITE_BEHIND_DELAY', '2'))
+
+# Live updates: how often /events re-checks a report, keepalive interval and connection lifetime (seconds)
+app.config['EVENTS_POLL_INTERVAL'] = float(os.environ.get('ONETASK_EVENTS_POLL_INTERVAL', '5'))
+app.config['EVENTS_HEARTBEAT'] = float(os.environ.get('ONETASK_EVENTS_HEARTBEAT', '15'))
+app.config['EVENTS_MAX_DURATION'] = float(os.environ.get('ONETASK_EVENTS_MAX_DURATION', '300'))
+
+# Report API page sizes
+app.config['REPORT_PAGE_SIZE'] = int(os.environ.get('ONETASK_REPORT_PAGE_SIZE', '100'))
+app.config['REPORT_PAGE_MAX'] = int(os.environ.get('ONETASK_REPORT_PAGE_MAX', '1000'))
+
+# Dashboard: reports shown without ?reports=, most reports per request, tasks listed
+# per panel, and seconds between page reloads (0 disables)
+app.config['DASHBOARD_REPORTS'] = os.environ.get('ONETASK_DASHBOARD_REPORTS', 'next')
+app.config['DASHBOARD_MAX_REPORTS'] = int(os.environ.get('ONETASK_DASHBOARD_MAX_REPORTS', '8'))
+app.config['DASHBOARD_TASKS'] = int(os.environ.get('ONETASK_DASHBOARD_TASKS', '10'))
+app.config['DASHBOARD_REFRESH'] = int(os.environ.get('ONETASK_DASHBOARD_REFRESH', '60'))
+
+# Reports kept warm in the background: "name[:interval[:max_stale]]" entries, comma separated (seconds)
+app.config['PREFETCH_REPORTS'] = os.environ.get('ONETASK_PREFETCH_REPORTS', '')
+app.config['PREFETCH_INTERVAL'] = float(os.environ.get('ONETASK_PREFETCH_INTERVAL', '60'))
+
+# Last good report exports kept on disk (empty path disables) and how long a page
+# waits for a live export before serving the saved copy (seconds)
+app.config['SNAPSHOT_PATH'] = os.environ.get('ONETASK_SNAPSHOT_PATH',
+                                             os.path.join(app.instance_path, 'snapshots.sqlite3'))
+app.config['SNAPSHOT_WAIT'] = float(os.environ.get('ONETASK_SNAPSHOT_WAIT', '1'))
+
+# Response compression (brotli when installed, else gzip) for bodies of at least this many bytes
+# (0 disables), and the memory given to rendered and compressed bodies that can be reused (MB)
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('ONETASK_COMPRESS_MIN_SIZE', '1024'))
+app.config['RESPONSE_CACHE_MB'] = float(os.environ.get('ONETASK_RESPONSE_CACHE_MB', '32'))
+
+# Production server (python app.py --serve): bind address and worker processes. Workers
+# share a cache generation counter in this file so a mutation in one invalidates all of them
+app.config['HOST'] = os.environ.get('ONETASK_HOST', '127.0.0.1')
+app.config['PORT'] = int(os.environ.get('ONETASK_PORT', '5000'))
+app.config['WORKERS'] = int(os.environ.get('ONETASK_WORKERS', '1'))
+app.config['SHARED_GENERATION_PATH'] = os.environ.get('ONETASK_SHARED_GENERATION_PATH',
+                                                      os.path.join(app.instance_path, 'cache-generation'))
+# Seconds a stopping server lets in-flight requests finish before cutting them off
+app.config['SHUTDOWN_GRACE'] = float(os.environ.get('ONETASK_SHUTDOWN_GRACE', '10'))
+
+# Log level for the 'onetask' logger (DEBUG, INFO, WARNING, ERROR)
+app.config['LOG_LEVEL'] = os.environ.get('ONETASK_LOG_LEVEL', 'WARNING').upper()
+
+logger = logging.getLogger('onetask')
+logger.setLevel(app.config['LOG_LEVEL'])
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
+
+# Histogram buckets: seconds for latencies, bytes for payload sizes
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def format_metric_labels(names, values):
+    """Render Prometheus label pairs, e.g. {route="/",status="200"}"""
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+class Histogram:
+    """Prometheus histogram with one series per combination of label values"""
+    
+    def __init__(self, name, help_text, labelnames, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+    
+    def render(self):
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labelvalues, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = '+Inf' if bound == math.inf else repr(float(bound))
+                labels = format_metric_labels(self.labelnames + ('le',), labelvalues + (le,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_metric_labels(self.labelnames, labelvalues)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+class Counter:
+    """Prometheus counter with one series per combination of label values"""
+    
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0) + amount
+    
+    def render(self):
+        with self._lock:
+            snapshot = sorted(self._series.items())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labelvalues, value in snapshot:
+            lines.append(f'{self.name}{format_metric_labels(self.labelnames, labelvalues)} {value}')
+        return lines
+
+TASK_COMMAND_SECONDS = Histogram('onetask_task_command_duration_seconds',
+                                 'Wall time of task subprocesses by subcommand and exit status',
+                                 ('subcommand', 'exit_status'), LATENCY_BUCKETS)
+TASK_OUTPUT_BYTES = Histogram('onetask_task_command_output_bytes',
+                              'Size of task stdout by subcommand', ('subcommand',), SIZE_BUCKETS)
+JSON_PARSE_SECONDS = Histogram('onetask_json_parse_duration_seconds',
+                               'Time spent parsing task export JSON by caller', ('source',), LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram('onetask_http_request_duration_seconds',
+                            'Request handling time by route, method and status',
+                            ('route', 'method', 'status'), LATENCY_BUCKETS)
+RESPONSE_BYTES = Histogram('onetask_http_response_bytes',
+                           'Size of non-streamed response bodies by route', ('route',), SIZE_BUCKETS)
+PREFETCH_REFRESHES = Counter('onetask_prefetch_refreshes_total',
+                             'Background report refreshes by report and result', ('report', 'result'))
+SINGLE_FLIGHT_SHARED = Counter('onetask_single_flight_shared_total',
+                               'Calls that joined an identical in-flight command or export instead of forking',
+                               ('layer',))
+METRICS = (SINGLE_FLIGHT_SHARED, TASK_COMMAND_SECONDS, TASK_OUTPUT_BYTES, JSON_PARSE_SECONDS, REQUEST_SECONDS, RESPONSE_BYTES,
+           PREFETCH_REFRESHES)
+
+def parse_task_json(text, source):
+    """json.loads for task output, timed into the JSON parse histogram"""
+    start = time.perf_counter()
     try:
-        result = subprocess.run(
-            ['task'] + args,
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
-        return result
-    except subprocess.TimeoutExpired:
-        raise TimeoutError(f"TaskWarrior command timed out after {timeout} seconds")
+        return json.loads(text) if text.strip() else []
+    finally:
+        JSON_PARSE_SECONDS.observe(time.perf_counter() - start, source)
+
+# Files TaskWarrior writes to when data changes (TaskWarrior 3 and legacy 2.x layouts)
+TASK_DATA_FILES = ('taskchampion.sqlite3', 'taskchampion.sqlite3-wal',
+                   'pending.data', 'completed.data', 'undo.data')
+
+def get_taskdata_dir():
+    """Locate the TaskWarrior data directory (TASKDATA, .taskrc data.location, or ~/.task)"""
+    environ = current_tenant().environ
+    if environ.get('TASKDATA'):
+        return os.path.expanduser(environ['TASKDATA'])
+    
+    taskrc = os.path.expanduser(environ.get('TASKRC', '~/.taskrc'))
+    try:
+        with open(taskrc) as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('data.location'):
+                    _, _, value = line.partition('=')
+                    return os.path.expanduser(value.strip())
+    except OSError:
+        pass
+    
+    return os.path.expanduser('~/.task')
+
+def get_taskdata_signature():
+    """Return a cheap fingerprint of the data directory that changes on any edit"""
+    data_dir = get_taskdata_dir()
+    signature = []
+    for name in ('',) + TASK_DATA_FILES:
+        try:
+            st = os.stat(os.path.join(data_dir, name))
+            signature.append((name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+    return tuple(signature)
+
+class SharedGeneration:
+    """A counter in a small memory-mapped file that every worker process can read and bump
+    
+    Workers inherit the file from the parent across fork(), so bumps take a
+    POSIX record lock (lockf), which is held per process, rather than
+    flock, which forked processes would share through the one open file.
+    Record locks do not exclude threads of the same process; _lock does.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < 8:
+            os.ftruncate(self._fd, 8)
+        self._map = mmap.mmap(self._fd, 8)
+    
+    def value(self):
+        return struct.unpack_from('<Q', self._map)[0]
+    
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+    
+    def bump(self):
+        """Increment under a file lock (other processes bump too) and return the new value"""
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 8)
+            try:
+                value = self.value() + 1
+                struct.pack_into('<Q', self._map, 0, value)
+                return value
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 8)
+
+class ReportCache:
+    """LRU cache of parsed report exports with a TTL and data directory change detection
+    
+    In multi-worker mode a SharedGeneration is attached: a mutation in any
+    worker bumps it, and each worker drops its entries when it sees the change.
+    """
+    
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = 0
+        self.shared = None
+        self._shared_seen = 0
+        self._ttls = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def attach_shared(self, shared):
+        with self._lock:
+            self.shared = shared
+            self._shared_seen = shared.value()
+    
+    def _sync_shared(self):
+        """Drop everything if another worker recorded a mutation; call with the lock held"""
+        if self.shared is not None:
+            value = self.shared.value()
+            if value != self._shared_seen:
+                self._shared_seen = value
+                self._entries.clear()
+                self.generation += 1
+                self.invalidations += 1
+    
+    def set_ttl(self, key, ttl):
+        """Let one key be served for longer (or shorter) than the default TTL; None restores it"""
+        with self._lock:
+            if ttl is None:
+                self._ttls.pop(key, None)
+            else:
+                self._ttls[key] = ttl
+    
+    def get(self, key):
+        """Return cached tasks for key, or None if missing, expired or outdated"""
+        signature = get_taskdata_signature()
+        with self._lock:
+            self._sync_shared()
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, stored_signature, tasks = entry
+                if time.monotonic() - stored_at < self._ttls.get(key, self.ttl) and stored_signature == signature:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return tasks
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key, tasks, generation, signature):
+        """Store tasks fetched while the cache was at the given generation; False if dropped"""
+        with self._lock:
+            self._sync_shared()
+            # Drop results that raced with a mutation; they may predate it
+            if generation != self.generation:
+                return False
+            self._entries[key] = (time.monotonic(), signature, tasks)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+    
+    def invalidate(self):
+        """Drop every cached report after TaskWarrior data changed"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+            if self.shared is not None:
+                self._shared_seen = self.shared.bump()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'shared_generation': self._shared_seen if self.shared is not None else None,
+            }
+
+# Caches of task data belong to the tenant being served (see Tenant)
+report_cache = LocalProxy(lambda: current_tenant().report_cache)
+
+class SnapshotStore:
+    """Last good export of each report, kept in a SQLite file across restarts
+    
+    Rows hold the raw export JSON (zlib-compressed) and the data directory
+    signature it was taken at. A background thread does the writes, so an
+    export never waits on the disk; a row is read when its report is first
+    looked up, and kept in memory until forget() drops its scope. With
+    shared=True (several worker processes) each lookup also picks up newer
+    rows written by the other workers.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.shared = False
+        self.saves = 0
+        self.served_stale = 0
+        self._latest = {}
+        self._pending = {}
+        self._thread = None
+        self._cond = threading.Condition()
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        # WAL lets worker processes read while another one writes
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS snapshots '
+                     '(report TEXT PRIMARY KEY, signature TEXT, saved_at REAL, data BLOB)')
+        return conn
+    
+    def _read_newer(self, report, saved_after):
+        """The report's row if another process saved it after saved_after, else None"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            conn = self._connect()
+            try:
+                return conn.execute('SELECT signature, saved_at, data FROM snapshots WHERE report = ? AND saved_at > ?',
+                                    (report, saved_after)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning('Could not read snapshot report=%s from %s: %s', report, self.path, e)
+            return None
+    
+    def get(self, report):
+        """Return (tasks, signature, saved_at) for the report's last good export, or None"""
+        with self._cond:
+            latest = self._latest.get(report)
+        if latest is not None and not self.shared:
+            return latest
+        row = self._read_newer(report, latest[2] if latest is not None else 0)
+        if row is None:
+            return latest
+        signature, saved_at, data = row
+        try:
+            tasks = json.loads(zlib.decompress(data))
+        except (zlib.error, ValueError) as e:
+            logger.warning('Discarding unreadable snapshot report=%s: %s', report, e)
+            return None
+        snapshot = (tasks, signature, saved_at)
+        with self._cond:
+            current = self._latest.get(report)
+            if current is None or current[2] < saved_at:
+                self._latest[report] = current = snapshot
+            return current
+    
+    def save(self, report, text, tasks, signature):
+        """Remember a fresh export and queue it for writing"""
+        saved_at = time.time()
+        signature = json.dumps(signature)
+        with self._cond:
+            self._latest[report] = (tasks, signature, saved_at)
+            self._pending[report] = (text, signature, saved_at)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='snapshot-writer', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                pending, self._pending = self._pending, {}
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.executemany(
+                            'INSERT OR REPLACE INTO snapshots (report, signature, saved_at, data) VALUES (?, ?, ?, ?)',
+                            [(report, signature, saved_at, zlib.compress(text.encode(), 1))
+                             for report, (text, signature, saved_at) in pending.items()])
+                finally:
+                    conn.close()
+                self.saves += len(pending)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning('Could not write snapshots to %s: %s', self.path, e)
+    
+    def forget(self, scope):
+        """Drop the in-memory copies of one snapshot_scope()'s reports; their rows stay on disk"""
+        with self._cond:
+            for report in [report for report in self._latest if report.startswith(scope + '/')]:
+                del self._latest[report]
+    
+    def stats(self):
+        with self._cond:
+            return {
+                'path': self.path,
+                'reports': sorted(self._latest),
+                'saves': self.saves,
+                'pending_writes': len(self._pending),
+                'served_stale': self.served_stale,
+            }
+
+snapshot_store = SnapshotStore(app.config['SNAPSHOT_PATH']) if app.config['SNAPSHOT_PATH'] else None
+
+# Statuses counted as open work in tag totals and search
+OPEN_STATUSES = ('pending', 'waiting')
+
+SEARCH_TOKEN_RE = re.compile(r'\w+')
+
+def tokenize_search_text(text):
+    """Lowercased word tokens of a description, annotation or query"""
+    return SEARCH_TOKEN_RE.findall(text.lower()) if text else []
+
+class SearchIndex:
+    """Inverted index from word tokens in descriptions and annotations to UUIDs
+    
+    Tokens are also kept in a sorted list so a query word can match every
+    token it prefixes (type-ahead) with a bisect instead of a scan. Tokens
+    added and dropped are applied to that list in one go before it is next
+    read, so loading a full export costs one sort, not an insort per token.
+    """
+    
+    def __init__(self):
+        self._postings = {}
+        self._tokens = []
+        self._new_tokens = []
+        self._dropped_tokens = set()
+        self._task_tokens = {}
+    
+    def clear(self):
+        self._postings.clear()
+        self._tokens.clear()
+        self._new_tokens.clear()
+        self._dropped_tokens.clear()
+        self._task_tokens.clear()
+    
+    def _settle(self):
+        """Bring the sorted token list up to date with the postings"""
+        if self._dropped_tokens:
+            self._tokens = [token for token in self._tokens if token in self._postings]
+            self._new_tokens = [token for token in self._new_tokens if token in self._postings]
+            self._dropped_tokens.clear()
+        if self._new_tokens:
+            # Timsort merges the sorted list with the sorted batch of new tokens in linear time
+            self._new_tokens.sort()
+            self._tokens.extend(self._new_tokens)
+            self._tokens.sort()
+            self._new_tokens.clear()
+    
+    def add(self, task):
+        uuid = task['uuid']
+        words = tokenize_search_text(task.get('description', ''))
+        for annotation in task.get('annotations') or []:
+            words.extend(tokenize_search_text(annotation.get('description', '')))
+        tokens = set(words)
+        self._task_tokens[uuid] = tokens
+        for token in tokens:
+            uuids = self._postings.get(token)
+            if uuids is None:
+                uuids = self._postings[token] = set()
+                if token in self._dropped_tokens:
+                    # Still in the sorted list, which has not been settled since it was dropped
+                    self._dropped_tokens.discard(token)
+                else:
+                    self._new_tokens.append(token)
+            uuids.add(uuid)
+    
+    def remove(self, uuid):
+        for token in self._task_tokens.pop(uuid, ()):
+            uuids = self._postings[token]
+            uuids.discard(uuid)
+            if not uuids:
+                del self._postings[token]
+                self._dropped_tokens.add(token)
+    
+    def _matching(self, word):
+        """UUIDs of tasks with a token equal to or starting with word"""
+        self._settle()
+        start = bisect.bisect_left(self._tokens, word)
+        end = bisect.bisect_left(self._tokens, word + '\uffff', start)
+        if end - start == 1:
+            return self._postings[self._tokens[start]]
+        return set().union(*(self._postings[token] for token in self._tokens[start:end]))
+    
+    def query(self, words):
+        """UUIDs of tasks matching every query word as a token prefix"""
+        matches = None
+        # Distinct words, longest first: longer prefixes usually match fewer tasks
+        for word in sorted(set(words), key=len, reverse=True):
+            uuids = self._matching(word)
+            matches = set(uuids) if matches is None else matches & uuids
+            if not matches:
+                return set()
+        return matches or set()
+    
+    def __len__(self):
+        return len(self._postings)
+
+class TaskStore:
+    """UUID-indexed copy of every task seen in an export
+    
+    Filled from each report/task export and refreshed for the tasks a
+    mutation touched, so per-task reads need no subprocess. When the data
+    directory changes for any other reason (an edit from the terminal) the
+    whole index is dropped, because any entry could be out of date. That
+    includes edits made just before a mutation: a refresh only adopts the
+    new data signature if the index was current when the writes began.
+    
+    Tags (tag -> UUIDs, plus open-task count and estimate per tag) and
+    description/annotation words (SearchIndex) are indexed alongside and
+    kept current as entries change. Tag and search queries are only
+    answered once a full export has been loaded, since a partial store
+    cannot say which tasks are missing.
+    """
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.full_loads = 0
+        self._tasks = {}
+        self._tags = {}
+        self._tag_totals = {}
+        self._search = SearchIndex()
+        self._complete = False
+        self._signature = None
+        self._write_base = None
+        self._lock = threading.Lock()
+    
+    def _check_signature(self, signature):
+        if signature != self._signature:
+            self._clear()
+            self._signature = signature
+    
+    def _clear(self):
+        self._tasks.clear()
+        self._tags.clear()
+        self._tag_totals.clear()
+        self._search.clear()
+        self._complete = False
+    
+    def _put(self, task):
+        uuid = task['uuid']
+        self._remove(uuid)
+        self._tasks[uuid] = task
+        self._search.add(task)
+        is_open = task.get('status') in OPEN_STATUSES
+        seconds = convert_taskwarrior_estimate_to_seconds(task.get('estimate', '')) if is_open else 0
+        for tag in set(task.get('tags') or []):
+            self._tags.setdefault(tag, set()).add(uuid)
+            totals = self._tag_totals.setdefault(tag, [0, 0])
+            if is_open:
+                totals[0] += 1
+                totals[1] += seconds
+    
+    def _remove(self, uuid):
+        task = self._tasks.pop(uuid, None)
+        if task is None:
+            return
+        self._search.remove(uuid)
+        is_open = task.get('status') in OPEN_STATUSES
+        seconds = convert_taskwarrior_estimate_to_seconds(task.get('estimate', '')) if is_open else 0
+        for tag in set(task.get('tags') or []):
+            uuids = self._tags.get(tag)
+            if uuids is None:
+                continue
+            uuids.discard(uuid)
+            if not uuids:
+                del self._tags[tag]
+                del self._tag_totals[tag]
+            elif is_open:
+                self._tag_totals[tag][0] -= 1
+                self._tag_totals[tag][1] -= seconds
+    
+    def add_export(self, tasks, signature):
+        """Index tasks from an export taken when the data directory had this signature"""
+        with self._lock:
+            self._check_signature(signature)
+            for task in tasks:
+                if task.get('uuid'):
+                    self._put(task)
+    
+    def load_all(self, tasks, signature):
+        """Replace the index with a full export so tag queries can be answered"""
+        with self._lock:
+            self._signature = None
+            self._check_signature(signature)
+            for task in tasks:
+                if task.get('uuid'):
+                    self._put(task)
+            self._complete = True
+            self.full_loads += 1
+    
+    def begin_write(self, signature):
+        """Note the data signature before a write command, for the refresh that follows it"""
+        with self._lock:
+            if self._write_base is None:
+                self._write_base = signature
+    
+    def abort_write(self):
+        """Forget the write base after a write that failed or timed out
+        
+        No refresh follows a failed write, so a base left behind would vouch
+        for edits made outside OneTask before the next one. Without it the
+        next refresh only trusts the index if it is still current.
+        """
+        with self._lock:
+            self._write_base = None
+    
+    def _drop_if_stale(self, signature):
+        # Data that changed outside OneTask before our writes makes every entry suspect
+        base, self._write_base = self._write_base, None
+        if base != self._signature:
+            self._clear()
+            self._signature = signature
+    
+    def apply_refresh(self, task_ids, tasks, signature):
+        """Replace entries for tasks we just changed and accept the resulting data signature"""
+        with self._lock:
+            self._drop_if_stale(signature)
+            for task_id in task_ids:
+                self._remove(str(task_id))
+            for task in tasks:
+                if task.get('uuid'):
+                    self._put(task)
+            # A working set ID that no longer resolves leaves its old entry behind
+            if any(not any(task.get('uuid', '').startswith(str(task_id)) or str(task.get('id')) == str(task_id)
+                           for task in tasks)
+                   for task_id in task_ids):
+                self._complete = False
+            self._signature = signature
+    
+    def discard(self, task_ids):
+        with self._lock:
+            self._drop_if_stale(None)
+            for task_id in task_ids:
+                self._remove(str(task_id))
+            self._complete = False
+    
+    def get(self, task_id):
+        """Return the task for a UUID (or 8+ character prefix), or None if not indexed"""
+        task_id = str(task_id).lower()
+        signature = get_taskdata_signature()
+        with self._lock:
+            self._check_signature(signature)
+            task = self._tasks.get(task_id)
+            # Working set IDs shift as tasks complete, so only UUIDs are served from the index
+            if task is None and len(task_id) >= 8 and not task_id.isdigit():
+                task = next((t for uuid, t in self._tasks.items() if uuid.startswith(task_id)), None)
+            if task is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return task
+    
+    def is_complete(self):
+        signature = get_taskdata_signature()
+        with self._lock:
+            self._check_signature(signature)
+            return self._complete
+    
+    def tagged(self, tags, match_all=True):
+        """Return tasks carrying all (or any) of the tags, or None until a full export is loaded"""
+        signature = get_taskdata_signature()
+        with self._lock:
+            self._check_signature(signature)
+            if not self._complete:
+                return None
+            sets = sorted((self._tags.get(tag, set()) for tag in tags), key=len)
+            if not sets:
+                return []
+            if match_all:
+                uuids = sets[0].intersection(*sets[1:])
+            else:
+                uuids = set().union(*sets)
+            return [self._tasks[uuid] for uuid in uuids]
+    
+    def search(self, words):
+        """Return tasks matching every word as a prefix, or None until a full export is loaded"""
+        signature = get_taskdata_signature()
+        with self._lock:
+            self._check_signature(signature)
+            if not self._complete:
+                return None
+            return [self._tasks[uuid] for uuid in self._search.query(words)]
+    
+    def tag_totals(self):
+        """Return {tag: (total, open count, open estimate seconds)}, or None until a full export is loaded"""
+        signature = get_taskdata_signature()
+        with self._lock:
+            self._check_signature(signature)
+            if not self._complete:
+                return None
+            return {tag: (len(self._tags[tag]), totals[0], totals[1])
+                    for tag, totals in self._tag_totals.items()}
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._tasks),
+                'tags': len(self._tags),
+                'search_tokens': len(self._search),
+                'complete': self._complete,
+                'full_loads': self.full_loads,
+            }
+
+task_store = LocalProxy(lambda: current_tenant().task_store)
+
+def refresh_task_store(task_ids):
+    """Re-export the tasks a mutation touched so per-task reads stay subprocess-free"""
+    task_ids = [str(task_id) for task_id in task_ids if task_id]
+    if not task_ids:
+        return
+    try:
+        signature = get_taskdata_signature()
+        tasks = export_tasks_by_ids(task_ids)
+        task_store.apply_refresh(task_ids, tasks, signature)
     except Exception as e:
-        raise Exception(f"TaskWarrior command failed: {str(e)}")
+        logger.warning('Could not refresh task store task_ids=%s: %s', task_ids, e)
+        task_store.discard(task_ids)
 
-def get_tasks_from_report(report_name='next'):
-    """Get tasks from specified TaskWarrior report"""
+# Wakes /events listeners as soon as a mutation lands
+task_data_changed = threading.Condition()
+
+def invalidate_task_caches(task_ids=None):
+    """Called after any successful mutation so readers see the new data"""
+    report_cache.invalidate()
+    with task_data_changed:
+        task_data_changed.notify_all()
+    if task_ids:
+        refresh_task_store(task_ids)
+    report_prefetcher.request_refresh()
+
+# TaskWarrior commands that only read data; everything else is queued as a write
+READ_SUBCOMMANDS = {'export', 'completed', 'count', 'show', '_show', '_get', '_unique',
+                    'info', 'stats', 'summary', 'list', 'next', 'version', '_version'}
+WRITE_SUBCOMMANDS = {'add', 'annotate', 'append', 'denotate', 'delete', 'done', 'duplicate',
+                     'import', 'log', 'modify', 'prepend', 'purge', 'start', 'stop', 'undo',
+                     'synchronize'}
+
+def get_task_subcommand(args):
+    """Return the TaskWarrior subcommand in args (filters may come first)"""
+    for arg in args:
+        if arg in READ_SUBCOMMANDS or arg in WRITE_SUBCOMMANDS:
+            return arg
+    # Bare filters run the default report
+    return 'next'
+
+# ID filters on a command line: working set IDs, ranges and lists (1-3,7), or UUIDs and their prefixes
+COMMAND_ID_RE = re.compile(r'^(\d+(-\d+)?)(,\d+(-\d+)?)*$|^[0-9a-f]{8}(-[0-9a-f]{4}){0,3}(-[0-9a-f]{12})?$', re.IGNORECASE)
+
+def command_shape(args):
+    """Key for a command's latency history: the subcommand plus the kind of filter it runs
+    
+    Commands on one task (ID or UUID filters) share "export[task]"; other
+    filters are keyed by attribute names and report words with their values
+    dropped ("export[end.after,status]", "export[next]"), so a slow full
+    export never inherits the timeout of quick single-task lookups.
+    """
+    subcommand = get_task_subcommand(args)
+    if subcommand in WRITE_SUBCOMMANDS and subcommand in args:
+        # Modifications come after a write subcommand; only what precedes it filters
+        args = args[:args.index(subcommand)]
+    words = [arg for arg in args if arg != subcommand and not arg.startswith('rc.')]
+    if any(COMMAND_ID_RE.match(word) for word in words):
+        return f'{subcommand}[task]'
+    parts = sorted({word.partition(':')[0] if ':' in word else '+tag' if word[:1] in '+-' else word
+                    for word in words})
+    return f"{subcommand}[{','.join(parts)}]" if parts else subcommand
+
+class AdaptiveTimeouts:
+    """Per-command-shape timeouts derived from observed latency (smoothed mean + 4 deviations)"""
+    
+    def __init__(self, minimum, maximum):
+        self.minimum = minimum
+        self.maximum = maximum
+        self._samples = {}
+        self._lock = threading.Lock()
+    
+    def timeout_for(self, shape):
+        with self._lock:
+            sample = self._samples.get(shape)
+        if sample is None:
+            return self.maximum
+        mean, deviation = sample
+        return min(self.maximum, max(self.minimum, mean + 4 * deviation))
+    
+    def observe(self, shape, seconds):
+        with self._lock:
+            sample = self._samples.get(shape)
+            if sample is None:
+                self._samples[shape] = (seconds, seconds / 2)
+            else:
+                mean, deviation = sample
+                deviation = 0.75 * deviation + 0.25 * abs(mean - seconds)
+                mean = 0.875 * mean + 0.125 * seconds
+                self._samples[shape] = (mean, deviation)
+    
+    def observe_timeout(self, shape, timeout):
+        # Back off like a retransmission timer so a slow TaskWarrior is given more time next round
+        self.observe(shape, min(self.maximum, timeout * 2))
+    
+    def stats(self):
+        with self._lock:
+            return {name: {'mean': round(mean, 4), 'deviation': round(deviation, 4)}
+                    for name, (mean, deviation) in self._samples.items()}
+
+def iter_json_array(read_chunk):
+    """Yield the objects of a JSON array (or a bare sequence of objects) as chunks arrive
+    
+    read_chunk() returns the next piece of text, or '' at end of input. Only
+    the unparsed tail of the output is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,[':
+            pos += 1
+        if pos < len(buffer):
+            if buffer[pos] == ']':
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+                yield item
+                continue
+            except json.JSONDecodeError:
+                # Most likely an object cut off at the end of the chunk
+                if eof:
+                    raise
+        elif eof:
+            return
+        chunk = read_chunk()
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+# Marks the end of a streamed export
+_STREAM_END = object()
+
+def kill_process_group(proc):
+    """Kill a TaskWarrior process and any children it spawned (hooks, editors)"""
     try:
-        # Use TaskWarrior's export with report parameter - preserves filtering and ordering
-        result = run_task_command(['export', report_name])
+        if hasattr(os, 'killpg'):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+class TaskCommandExecutor:
+    """Runs `task` on bounded worker pools: parallel reads, one write at a time per database
+    
+    Every command first takes one of its tenant's slots (Tenant.acquire), so a
+    tenant with a burst of slow commands can only occupy part of the shared
+    pools, and runs with that tenant's TASKRC/TASKDATA.
+    """
+    
+    def __init__(self, read_concurrency, write_concurrency, queue_timeout, timeouts):
+        self.queue_timeout = queue_timeout
+        self.timeouts = timeouts
+        self._pools = {
+            'read': ThreadPoolExecutor(max_workers=read_concurrency, thread_name_prefix='task-read'),
+            # TaskWarrior locks its data files for writes, so more than one writer per
+            # database would only queue in `task`; Tenant slots keep that to one
+            'write': ThreadPoolExecutor(max_workers=write_concurrency, thread_name_prefix='task-write'),
+        }
+        self._queued = {'read': 0, 'write': 0}
+        self._running = {'read': 0, 'write': 0}
+        self._lock = threading.Lock()
+    
+    def submit(self, args, timeout=None, input=None):
+        """Queue a command and return a Future for its CompletedProcess"""
+        subcommand = get_task_subcommand(args)
+        shape = command_shape(args)
+        lane = 'read' if subcommand in READ_SUBCOMMANDS else 'write'
+        if timeout is None:
+            timeout = self.timeouts.timeout_for(shape)
+        tenant = current_tenant()
+        tenant.acquire(lane, self.queue_timeout)
+        with self._lock:
+            self._queued[lane] += 1
+        try:
+            future = self._pools[lane].submit(self._execute, lane, subcommand, shape, list(args), timeout, input, tenant.env)
+        except BaseException:
+            with self._lock:
+                self._queued[lane] -= 1
+            tenant.release(lane)
+            raise
+        future.add_done_callback(lambda _: tenant.release(lane))
+        return future
+    
+    def run(self, args, timeout=None, input=None):
+        """Run a command and wait for it, raising TimeoutError if it is queued or runs too long"""
+        if timeout is None:
+            timeout = self.timeouts.timeout_for(command_shape(args))
+        future = self.submit(args, timeout, input)
+        try:
+            # The worker enforces the run timeout itself; the extra second covers reaping
+            return future.result(timeout=self.queue_timeout + timeout + 1)
+        except FutureTimeoutError:
+            if future.done():
+                # The command itself timed out and its process group was killed
+                raise
+            if future.cancel():
+                with self._lock:
+                    self._queued[self._lane_of(args)] -= 1
+            raise TimeoutError(f"TaskWarrior command waited more than {self.queue_timeout:g} seconds for a free worker")
+    
+    def _lane_of(self, args):
+        return 'read' if get_task_subcommand(args) in READ_SUBCOMMANDS else 'write'
+    
+    def _execute(self, lane, subcommand, shape, args, timeout, input, env):
+        with self._lock:
+            self._queued[lane] -= 1
+            self._running[lane] += 1
+        start = time.monotonic()
+        exit_status = 'error'
+        try:
+            proc = subprocess.Popen(
+                ['task'] + args,
+                stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=env,
+                # Own process group so a timeout can take down hooks and other children too
+                start_new_session=True
+            )
+            try:
+                stdout, stderr = proc.communicate(input=input, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                kill_process_group(proc)
+                proc.communicate()
+                exit_status = 'timeout'
+                self.timeouts.observe_timeout(shape, timeout)
+                raise TimeoutError(f"TaskWarrior command timed out after {timeout:g} seconds")
+            exit_status = str(proc.returncode)
+            self.timeouts.observe(shape, time.monotonic() - start)
+            TASK_OUTPUT_BYTES.observe(len(stdout), subcommand)
+            logger.debug('task command args=%s exit_status=%s stdout_bytes=%d', args, exit_status, len(stdout))
+            return subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+        finally:
+            TASK_COMMAND_SECONDS.observe(time.monotonic() - start, subcommand, exit_status)
+            with self._lock:
+                self._running[lane] -= 1
+    
+    def stream(self, args, idle_timeout=None):
+        """Yield export items as `task` writes them, holding one read worker meanwhile
         
+        Items pass through a small bounded queue, so a slow consumer slows
+        the subprocess instead of growing memory. Closing the generator early
+        (or the consumer stalling for idle_timeout) kills the process group.
+        """
+        if idle_timeout is None:
+            idle_timeout = self.timeouts.maximum
+        tenant = current_tenant()
+        items = queue.Queue(maxsize=256)
+        stop = threading.Event()
+        
+        def offer(item):
+            waited = 0.0
+            while not stop.is_set():
+                try:
+                    items.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    waited += 0.5
+                    if waited >= idle_timeout:
+                        return False
+            return False
+        
+        def produce():
+            with self._lock:
+                self._queued['read'] -= 1
+                self._running['read'] += 1
+            proc = None
+            start = time.monotonic()
+            try:
+                with tempfile.TemporaryFile(mode='w+') as stderr:
+                    proc = subprocess.Popen(['task'] + list(args), stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.PIPE, stderr=stderr, text=True,
+                                            env=tenant.env, start_new_session=True)
+                    for item in iter_json_array(lambda: proc.stdout.read(65536)):
+                        if not offer(item):
+                            return
+                    proc.wait(timeout=idle_timeout)
+                    if proc.returncode != 0:
+                        stderr.seek(0)
+                        raise Exception(f"TaskWarrior {' '.join(args)} failed: {stderr.read().strip()}")
+            finally:
+                exit_status = 'error'
+                if proc is not None and proc.poll() is None:
+                    kill_process_group(proc)
+                    proc.wait()
+                    exit_status = 'killed'
+                elif proc is not None:
+                    exit_status = str(proc.returncode)
+                TASK_COMMAND_SECONDS.observe(time.monotonic() - start, get_task_subcommand(args), exit_status)
+                with self._lock:
+                    self._running['read'] -= 1
+                offer(_STREAM_END)
+        
+        tenant.acquire('read', self.queue_timeout)
+        with self._lock:
+            self._queued['read'] += 1
+        future = self._pools['read'].submit(produce)
+        future.add_done_callback(lambda _: tenant.release('read'))
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=self.queue_timeout + idle_timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"TaskWarrior export produced no output for {idle_timeout:g} seconds")
+                if item is _STREAM_END:
+                    break
+                yield item
+            # Surface errors raised by the producer
+            future.result()
+        finally:
+            stop.set()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': dict(self._queued),
+                'running': dict(self._running),
+                'timeouts': {name: round(self.timeouts.timeout_for(name), 3)
+                             for name in self.timeouts.stats()},
+                'latency': self.timeouts.stats(),
+            }
+
+task_executor = TaskCommandExecutor(
+    app.config['TASK_READ_CONCURRENCY'],
+    app.config['TASK_WRITE_CONCURRENCY'],
+    app.config['TASK_QUEUE_TIMEOUT'],
+    AdaptiveTimeouts(app.config['TASK_TIMEOUT_MIN'], app.config['TASK_TIMEOUT_MAX'])
+)
+
+class SingleFlight:
+    """Runs one call per key at a time; callers arriving meanwhile wait and share its outcome"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.leaders = 0
+        self.shared = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, fn):
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        if not leader:
+            SINGLE_FLIGHT_SHARED.inc(self.name)
+            # The leader's own queue and command timeouts bound this wait
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._flights[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._flights[key]
+        future.set_result(result)
+        return result
+    
+    def stats(self):
+        with self._lock:
+            return {'leaders': self.leaders, 'shared': self.shared, 'in_flight': len(self._flights)}
+
+# Identical reads in flight at once share one `task` process (commands) or one export and parse (exports)
+command_flights = SingleFlight('command')
+export_flights = SingleFlight('export')
+
+def task_environment_key():
+    """The settings that decide which TaskWarrior data a command sees"""
+    environ = current_tenant().environ
+    return (environ.get('TASKRC'), environ.get('TASKDATA'))
+
+def run_task_command(args, timeout=None, input=None):
+    """Run a TaskWarrior command on the executor; timeout defaults to the adaptive value
+    
+    Read commands identical to one already running (same args and
+    TASKRC/TASKDATA, no mutation since it started) wait for that run
+    instead of starting another process.
+    """
+    try:
+        if input is None and get_task_subcommand(args) in READ_SUBCOMMANDS:
+            key = (tuple(args), timeout, task_environment_key(), report_cache.generation)
+            return command_flights.do(key, lambda: task_executor.run(args, timeout, input))
+        task_store.begin_write(get_taskdata_signature())
+        try:
+            result = task_executor.run(args, timeout, input)
+        except BaseException:
+            task_store.abort_write()
+            raise
         if result.returncode != 0:
-            raise Exception(f"TaskWarrior export {report_name} failed: {result.stderr}")
+            task_store.abort_write()
+        return result
+    except TimeoutError:
+        raise
+    except Exception as e:
+        raise Exception(f"TaskWarrior command failed: {str(e)}")
+
+def get_cached_export(cache_key, args, refresh=False, snapshot=False):
+    """Run a `task ... export` command, reusing the cached parse while data is unchanged
+    
+    refresh=True always runs the export and replaces the cached copy;
+    snapshot=True also saves it to the snapshot store. Concurrent misses
+    for the same export share one run and one parse.
+    """
+    if not refresh:
+        cached = report_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    # Capture cache state before exporting so a concurrent mutation wins
+    generation = report_cache.generation
+    
+    def export():
+        signature = get_taskdata_signature()
+        result = run_task_command(args)
         
-        if not result.stdout.strip():
-            return []
+        if result.returncode != 0:
+            raise Exception(f"TaskWarrior {' '.join(args)} failed: {result.stderr}")
         
-        return json.loads(result.stdout)
+        tasks = parse_task_json(result.stdout, 'report')
+        if report_cache.set(cache_key, tasks, generation, signature):
+            task_store.add_export(tasks, signature)
+            if snapshot and snapshot_store is not None:
+                snapshot_store.save(snapshot_key(cache_key), result.stdout, tasks, signature)
+        return tasks
+    
+    return export_flights.do((cache_key, tuple(args), task_environment_key(), generation), export)
+
+def export_report(report_name, refresh=False):
+    """Export a report through the cache, saving each fresh result as its snapshot
+    
+    With REPORT_EVALUATOR=local the report runs in-process when its
+    filter and sort can be compiled, and through `task export` otherwise.
+    """
+    if app.config['REPORT_EVALUATOR'] == 'local':
+        try:
+            return evaluate_report(report_name, refresh)
+        except UnsupportedReport:
+            pass
+    # Use TaskWarrior's export with report parameter - preserves filtering and ordering
+    return get_cached_export(report_name, ['export', report_name], refresh, snapshot=True)
+
+# Runs report exports that a page stopped waiting for, so they still land in the cache
+revalidate_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='revalidate')
+
+def snapshot_scope():
+    """Names the TaskWarrior data and config being served, for snapshot keys
+    
+    One snapshot file is shared by every tenant, and by any run against a
+    different data directory (tests, benchmarks), so a report's snapshot is
+    only ever served back for the data it was exported from.
+    """
+    environ = current_tenant().environ
+    location = f"{os.path.abspath(get_taskdata_dir())}\0{environ.get('TASKRC', '')}"
+    return hashlib.sha1(location.encode()).hexdigest()[:16]
+
+def snapshot_key(report):
+    return f'{snapshot_scope()}/{report}'
+
+def get_report_tasks(report_name):
+    """Return (tasks, stale_since) for a report
+    
+    stale_since is None for live data. When the report is not cached but
+    has a snapshot, the snapshot is served as live if the data directory
+    is unchanged since it was taken. Otherwise a live export gets
+    SNAPSHOT_WAIT seconds; if it is slower or fails, the snapshot is
+    served with its save time while the export carries on in the background.
+    """
+    cached = report_cache.get(report_name)
+    if cached is not None:
+        return cached, None
+    
+    snapshot = snapshot_store.get(snapshot_key(report_name)) if snapshot_store is not None else None
+    if snapshot is None:
+        return export_report(report_name), None
+    
+    tasks, signature, saved_at = snapshot
+    current = get_taskdata_signature()
+    if signature == json.dumps(current):
+        report_cache.set(report_name, tasks, report_cache.generation, current)
+        return tasks, None
+    
+    tenant = current_tenant()
+    future = tenant.revalidating.get(report_name)
+    if future is None or future.done():
+        future = tenant.revalidating[report_name] = revalidate_pool.submit(tenant.run, export_report, report_name)
+    try:
+        return future.result(timeout=app.config['SNAPSHOT_WAIT']), None
+    except Exception as e:
+        # Covers both the wait running out and the export failing
+        logger.warning('Serving snapshot of report=%s saved_at=%s: %s',
+                       report_name, saved_at, str(e) or 'export still running')
+        snapshot_store.served_stale += 1
+        return tasks, saved_at
+
+def get_tasks_from_report(report_name='next'):
+    """Get tasks from specified TaskWarrior report"""
+    try:
+        return get_report_tasks(report_name)[0]
     except json.JSONDecodeError as e:
         raise Exception(f"Failed to parse TaskWarrior JSON: {str(e)}")
     except Exception as e:
-        print(f"Error getting tasks from {report_name}: {e}")
+        logger.error('Error getting tasks report=%s: %s', report_name, e)
         return []
 
+class DirectReadError(Exception):
+    """Raised when TaskWarrior's data files cannot be read directly"""
+
+# Attributes stored as epoch seconds that `task export` renders as ISO basic dates
+TASK_DATE_ATTRIBUTES = ('entry', 'modified', 'due', 'wait', 'scheduled', 'until', 'start', 'end')
+
+LEGACY_ATTRIBUTE_RE = re.compile(r'([^\s:\[\]]+):"((?:[^"\\]|\\.)*)"')
+
+def format_taskwarrior_date(value):
+    """Convert an epoch timestamp string to TaskWarrior's export date format"""
+    try:
+        return time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(int(value)))
+    except (TypeError, ValueError):
+        return value
+
+class TaskDataReader:
+    """Read-only access to TaskWarrior storage that returns `task export` style dicts
+    
+    Supports the TaskWarrior 3 TaskChampion SQLite database and the legacy
+    pending.data/completed.data files. Writes always go through the CLI.
+    """
+    
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir
+    
+    def _dir(self):
+        return self.data_dir or get_taskdata_dir()
+    
+    def _sqlite_path(self):
+        return os.path.join(self._dir(), 'taskchampion.sqlite3')
+    
+    def _connect(self):
+        path = self._sqlite_path()
+        try:
+            return sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+        except sqlite3.Error as e:
+            raise DirectReadError(f"Cannot open {path}: {str(e)}")
+    
+    def uses_sqlite(self):
+        return os.path.exists(self._sqlite_path())
+    
+    def get_tasks(self, include_completed=False):
+        """Return tasks in export format; pending and waiting only unless include_completed"""
+        if self.uses_sqlite():
+            tasks = self._sqlite_tasks()
+        else:
+            tasks = self._legacy_tasks(include_completed)
+        if not include_completed:
+            tasks = [task for task in tasks if task.get('status') in ('pending', 'waiting')]
+        return tasks
+    
+    def get_task(self, task_id):
+        """Return one task by working set ID, UUID or UUID prefix, or None"""
+        task_id = str(task_id)
+        if not task_id:
+            return None
+        if self.uses_sqlite():
+            return self._sqlite_task(task_id)
+        
+        for task in self._legacy_tasks(include_completed=True):
+            if task_id.isdigit():
+                if str(task.get('id')) == task_id:
+                    return task
+            elif task.get('uuid', '').startswith(task_id):
+                return task
+        return None
+    
+    def _sqlite_tasks(self):
+        conn = self._connect()
+        try:
+            ids = {uuid: task_number for task_number, uuid in conn.execute('SELECT id, uuid FROM working_set')}
+            return [self._from_taskchampion(uuid, data, ids.get(uuid, 0))
+                    for uuid, data in conn.execute('SELECT uuid, data FROM tasks')]
+        except sqlite3.Error as e:
+            raise DirectReadError(f"Failed to read TaskChampion database: {str(e)}")
+        finally:
+            conn.close()
+    
+    def _sqlite_task(self, task_id):
+        conn = self._connect()
+        try:
+            if task_id.isdigit():
+                row = conn.execute('SELECT uuid FROM working_set WHERE id = ?', (int(task_id),)).fetchone()
+                if not row:
+                    return None
+                task_id = row[0]
+            # Escape LIKE wildcards so "_" or "%" in the prefix only match themselves
+            prefix = task_id.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            row = conn.execute(
+                "SELECT uuid, data FROM tasks WHERE uuid = ? OR uuid LIKE ? || '%' ESCAPE '\\' LIMIT 1",
+                (task_id, prefix)
+            ).fetchone()
+            if not row:
+                return None
+            number = conn.execute('SELECT id FROM working_set WHERE uuid = ?', (row[0],)).fetchone()
+            return self._from_taskchampion(row[0], row[1], number[0] if number else 0)
+        except sqlite3.Error as e:
+            raise DirectReadError(f"Failed to read TaskChampion database: {str(e)}")
+        finally:
+            conn.close()
+    
+    def _from_taskchampion(self, uuid, data, task_number):
+        """Convert a TaskChampion key/value map into a `task export` dict"""
+        properties = json.loads(data)
+        task = {'id': task_number, 'uuid': uuid}
+        tags, annotations, depends = [], [], []
+        
+        for key, value in properties.items():
+            if key.startswith('tag_'):
+                tags.append(key[4:])
+            elif key.startswith('annotation_'):
+                annotations.append({'entry': format_taskwarrior_date(key[11:]), 'description': value})
+            elif key.startswith('dep_'):
+                depends.append(key[4:])
+            elif key in TASK_DATE_ATTRIBUTES:
+                task[key] = format_taskwarrior_date(value)
+            else:
+                task[key] = value
+        
+        if tags:
+            task['tags'] = sorted(tags)
+        if annotations:
+            task['annotations'] = sorted(annotations, key=lambda a: a['entry'])
+        if depends:
+            task['depends'] = depends
+        return task
+    
+    def _legacy_tasks(self, include_completed):
+        files = ['pending.data'] + (['completed.data'] if include_completed else [])
+        tasks = []
+        for name in files:
+            path = os.path.join(self._dir(), name)
+            if not os.path.exists(path):
+                if name == 'pending.data':
+                    raise DirectReadError(f"No TaskWarrior data found in {self._dir()}")
+                continue
+            try:
+                with open(path, encoding='utf-8') as f:
+                    for line_number, line in enumerate(f, start=1):
+                        task = self._from_legacy_line(line)
+                        if task is None:
+                            continue
+                        # Pending tasks are numbered by their line in pending.data
+                        task['id'] = line_number if name == 'pending.data' and task.get('status') in ('pending', 'waiting') else 0
+                        tasks.append(task)
+            except OSError as e:
+                raise DirectReadError(f"Failed to read {path}: {str(e)}")
+        return tasks
+    
+    def _from_legacy_line(self, line):
+        """Parse one `[key:"value" ...]` line from the 2.x file format"""
+        line = line.strip()
+        if not line.startswith('['):
+            return None
+        
+        task, annotations = {}, []
+        for key, raw in LEGACY_ATTRIBUTE_RE.findall(line):
+            value = self._decode_legacy_value(raw)
+            if key.startswith('annotation_'):
+                annotations.append({'entry': format_taskwarrior_date(key[11:]), 'description': value})
+            elif key == 'tags':
+                task['tags'] = [tag for tag in value.split(',') if tag]
+            elif key == 'depends':
+                task['depends'] = json.loads(value) if value.startswith('[') else [d for d in value.split(',') if d]
+            elif key in TASK_DATE_ATTRIBUTES:
+                task[key] = format_taskwarrior_date(value)
+            else:
+                task[key] = value
+        
+        if annotations:
+            task['annotations'] = sorted(annotations, key=lambda a: a['entry'])
+        return task
+    
+    def _decode_legacy_value(self, raw):
+        value = raw.replace('&open;', '[').replace('&close;', ']').replace('&dquot;', '"')
+        try:
+            return json.loads(f'"{value}"')
+        except json.JSONDecodeError:
+            return value
+
+direct_reader = TaskDataReader()
+
+def export_single_task(task_id):
+    """Return the exported task for an ID or UUID, or None if TaskWarrior has no such task"""
+    task = task_store.get(task_id)
+    if task is not None:
+        return task
+    
+    signature = get_taskdata_signature()
+    
+    if app.config['TASK_READ_BACKEND'] == 'direct':
+        try:
+            task = direct_reader.get_task(task_id)
+            if task is not None:
+                task_store.add_export([task], signature)
+            return task
+        except DirectReadError as e:
+            logger.warning('Direct read failed, falling back to CLI: %s', e)
+    
+    result = run_task_command([str(task_id), 'export'])
+    
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    
+    task_data = parse_task_json(result.stdout, 'task')
+    if not task_data:
+        return None
+    
+    task_store.add_export(task_data, signature)
+    return task_data[0]
+
+def load_all_tasks():
+    """Load every task into the task store so tag queries are answered from its index"""
+    # Serialized per tenant so a burst of tag queries after an external edit reloads once
+    with current_tenant().full_export_lock:
+        if task_store.is_complete():
+            return
+        signature = get_taskdata_signature()
+        
+        if app.config['TASK_READ_BACKEND'] == 'direct':
+            try:
+                task_store.load_all(direct_reader.get_tasks(include_completed=True), signature)
+                return
+            except DirectReadError as e:
+                logger.warning('Direct read failed, falling back to CLI: %s', e)
+        
+        result = run_task_command(['export'])
+        if result.returncode != 0:
+            raise Exception(f"TaskWarrior export failed: {result.stderr}")
+        task_store.load_all(parse_task_json(result.stdout, 'all'), signature)
+
+def index_result_order(task):
+    """Open tasks first in working set order, then the rest oldest first"""
+    return (task.get('id', 0) == 0, task.get('id', 0), task.get('entry', ''))
+
+def get_tagged_tasks(tags, match_all=True):
+    """Tasks carrying all (or any) of the tags, loading the full index first if needed"""
+    tasks = task_store.tagged(tags, match_all)
+    if tasks is None:
+        load_all_tasks()
+        tasks = task_store.tagged(tags, match_all)
+    if tasks is None:
+        raise Exception("Task data changed while loading the tag index")
+    return sorted(tasks, key=index_result_order)
+
+def search_tasks(words):
+    """Tasks whose description or annotations match every word, loading the full index first if needed"""
+    tasks = task_store.search(words)
+    if tasks is None:
+        load_all_tasks()
+        tasks = task_store.search(words)
+    if tasks is None:
+        raise Exception("Task data changed while loading the search index")
+    return tasks
+
+# Local report evaluation: report.<name>.filter/.sort from `task _show`,
+# compiled once and run against one cached export of the open tasks
+
+class UnsupportedReport(Exception):
+    """A report uses filter or sort syntax the local evaluator does not implement"""
+
+# Default urgency settings (TaskWarrior 2.6/3.x); urgency.* values from `task _show` override them
+URGENCY_DEFAULTS = {
+    'urgency.user.tag.next.coefficient': 15.0,
+    'urgency.due.coefficient': 12.0,
+    'urgency.blocking.coefficient': 8.0,
+    'urgency.uda.priority.H.coefficient': 6.0,
+    'urgency.uda.priority.M.coefficient': 3.9,
+    'urgency.uda.priority.L.coefficient': 1.8,
+    'urgency.scheduled.coefficient': 5.0,
+    'urgency.active.coefficient': 4.0,
+    'urgency.age.coefficient': 2.0,
+    'urgency.annotations.coefficient': 1.0,
+    'urgency.tags.coefficient': 1.0,
+    'urgency.project.coefficient': 1.0,
+    'urgency.waiting.coefficient': -3.0,
+    'urgency.blocked.coefficient': -5.0,
+    'urgency.age.max': 365.0,
+}
+
+# Tasks whose status can never be pending or waiting are left out of the evaluator's export
+OPEN_EXPORT_KEY = '__open__'
+OPEN_EXPORT_ARGS = ['-COMPLETED', '-DELETED', 'export']
+
+# A report is only evaluated locally if one of these is ANDed into its filter,
+# so the open-task export is guaranteed to hold every task it can match
+OPEN_ONLY_TERMS = {'status:pending', 'status:waiting', '+PENDING', '+WAITING', '+READY', '+OVERDUE'}
+
+FILTER_ATTRIBUTES = dict({'description': 'string', 'project': 'string', 'status': 'string',
+                          'priority': 'string', 'uuid': 'string', 'recur': 'string', 'parent': 'string',
+                          'tags': 'tags', 'urgency': 'numeric', 'id': 'numeric'},
+                         **{name: 'date' for name in TASK_DATE_ATTRIBUTES})
+FILTER_MODIFIERS = {'': '', 'is': 'is', 'equals': 'is', 'isnt': 'isnt', 'not': 'not',
+                    'before': 'before', 'under': 'before', 'below': 'before', 'by': 'by',
+                    'after': 'after', 'over': 'after', 'above': 'after',
+                    'has': 'has', 'contains': 'has', 'hasnt': 'hasnt',
+                    'startswith': 'startswith', 'left': 'startswith',
+                    'endswith': 'endswith', 'right': 'endswith', 'any': 'any', 'none': 'none'}
+FILTER_DATE_OFFSET_RE = re.compile(r'^([a-z]+)([+-])(\d+)(d|days?|w|wks?|weeks?|h|hours?|min|minutes?)$')
+TASK_ID_WORD_RE = re.compile(r'^(\d+(-\d+)?(,\d+(-\d+)?)*|[0-9a-f]{8}(-[0-9a-f-]*)?)$')
+
+def to_task_stamp(moment):
+    """Format an aware datetime like export dates; same-format stamps compare in time order"""
+    return moment.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+def parse_filter_date(value, now):
+    """Resolve a filter date (named, ISO or e.g. now+3d) or return None if unsupported"""
+    value = value.lower()
+    if value in ('later', 'someday'):
+        return datetime(9999, 12, 30).astimezone()
+    date = parse_add_date(value, now)
+    match = FILTER_DATE_OFFSET_RE.match(value) if date is None else None
+    if match:
+        base = parse_add_date(match.group(1), now)
+        unit = {'d': 'days', 'w': 'weeks', 'h': 'hours', 'm': 'minutes'}[match.group(4)[0]]
+        if base is not None:
+            delta = timedelta(**{unit: int(match.group(3))})
+            date = base + delta if match.group(2) == '+' else base - delta
+    return date
+
+def split_filter(text):
+    """Split a filter into words, with parentheses as words of their own and limit: dropped"""
+    try:
+        raw_words = shlex.split(text)
+    except ValueError as e:
+        raise UnsupportedReport(f"Cannot split filter '{text}': {str(e)}")
+    words = []
+    for word in raw_words:
+        while word.startswith('(') and word not in ('(', ')'):
+            words.append('(')
+            word = word[1:]
+        closing = 0
+        while word.endswith(')') and word not in ('(', ')'):
+            closing += 1
+            word = word[:-1]
+        if word and not word.startswith('limit:'):
+            words.append(word)
+        words.extend(')' * closing)
+    return words
+
+class FilterParser:
+    """Parse filter words into a tree; `or` binds loosest, then `xor`, then `and` (implicit between terms)"""
+    
+    def __init__(self, words):
+        self.words = words
+        self.position = 0
+    
+    def parse(self):
+        if not self.words:
+            return None
+        node = self._or()
+        if self.position != len(self.words):
+            raise UnsupportedReport(f"Unexpected '{self.words[self.position]}' in filter")
+        return node
+    
+    def _peek(self):
+        return self.words[self.position] if self.position < len(self.words) else None
+    
+    def _or(self):
+        nodes = [self._xor()]
+        while self._peek() == 'or':
+            self.position += 1
+            nodes.append(self._xor())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+    
+    def _xor(self):
+        nodes = [self._and()]
+        while self._peek() == 'xor':
+            self.position += 1
+            nodes.append(self._and())
+        return nodes[0] if len(nodes) == 1 else ('xor', nodes)
+    
+    def _and(self):
+        nodes = [self._unary()]
+        while self._peek() not in (None, 'or', 'xor', ')'):
+            if self._peek() == 'and':
+                self.position += 1
+            nodes.append(self._unary())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+    
+    def _unary(self):
+        word = self._peek()
+        if word is None or word in ('and', 'or', 'xor', ')'):
+            raise UnsupportedReport(f"Expected a filter term, found {word or 'end of filter'}")
+        self.position += 1
+        if word in ('not', '!'):
+            return ('not', self._unary())
+        if word == '(':
+            node = self._or()
+            if self._peek() != ')':
+                raise UnsupportedReport('Unbalanced parentheses in filter')
+            self.position += 1
+            return node
+        return ('term', word)
+
+def filter_conjuncts(node):
+    """The terms ANDed together at the top level of a filter tree"""
+    if node is None:
+        return []
+    if node[0] == 'and':
+        return [term for child in node[1] for term in filter_conjuncts(child)]
+    return [node]
+
+def task_dependencies(task):
+    depends = task.get('depends') or []
+    return depends.split(',') if isinstance(depends, str) else depends
+
+def task_is_waiting(task, ctx):
+    return task.get('status') == 'waiting' or task.get('wait', '') > ctx.now_stamp
+
+def task_due_state(task, ctx):
+    """TaskWarrior's due state: 3 overdue, 2 due today, 1 due within rc.due days, 0 otherwise"""
+    due = task.get('due')
+    if not due or task.get('status') not in OPEN_STATUSES:
+        return 0
+    if due < ctx.now_stamp:
+        return 3
+    if due < ctx.tomorrow_stamp:
+        return 2
+    return 1 if due < ctx.imminent_stamp else 0
+
+def due_on(day_start, day_end):
+    return lambda task, ctx: (task.get('status') in OPEN_STATUSES
+                              and getattr(ctx, day_start) <= task.get('due', '') < getattr(ctx, day_end))
+
+# Virtual tags the evaluator implements; any other all-caps TaskWarrior virtual tag sends the report to the CLI
+VIRTUAL_TAGS = {
+    'PENDING': lambda task, ctx: task.get('status') == 'pending',
+    'WAITING': task_is_waiting,
+    'COMPLETED': lambda task, ctx: task.get('status') == 'completed',
+    'DELETED': lambda task, ctx: task.get('status') == 'deleted',
+    'TEMPLATE': lambda task, ctx: task.get('status') == 'recurring',
+    'PARENT': lambda task, ctx: task.get('status') == 'recurring',
+    'INSTANCE': lambda task, ctx: 'parent' in task,
+    'CHILD': lambda task, ctx: 'parent' in task,
+    'ACTIVE': lambda task, ctx: 'start' in task,
+    'SCHEDULED': lambda task, ctx: 'scheduled' in task,
+    'UNTIL': lambda task, ctx: 'until' in task,
+    'ANNOTATED': lambda task, ctx: bool(task.get('annotations')),
+    'TAGGED': lambda task, ctx: bool(task.get('tags')),
+    'PROJECT': lambda task, ctx: bool(task.get('project')),
+    'PRIORITY': lambda task, ctx: bool(task.get('priority')),
+    'BLOCKED': lambda task, ctx: task.get('uuid') in ctx.blocked,
+    'UNBLOCKED': lambda task, ctx: task.get('uuid') not in ctx.blocked,
+    'BLOCKING': lambda task, ctx: task.get('uuid') in ctx.blocking,
+    'READY': lambda task, ctx: (task.get('status') == 'pending' and task.get('uuid') not in ctx.blocked
+                                and not task_is_waiting(task, ctx)
+                                and task.get('scheduled', '') < ctx.now_stamp),
+    'OVERDUE': lambda task, ctx: task_due_state(task, ctx) == 3,
+    'DUE': lambda task, ctx: task_due_state(task, ctx) in (1, 2),
+    'TODAY': lambda task, ctx: task_due_state(task, ctx) == 2,
+    'DUETODAY': lambda task, ctx: task_due_state(task, ctx) == 2,
+    'TOMORROW': due_on('tomorrow_stamp', 'day_after_stamp'),
+    'YESTERDAY': due_on('yesterday_stamp', 'today_stamp'),
+}
+UNSUPPORTED_VIRTUAL_TAGS = {'LATEST', 'ORPHAN', 'UDA', 'WEEK', 'MONTH', 'QUARTER', 'YEAR'}
+
+def resolve_attribute(name, types):
+    """Full attribute name for a name or unique abbreviation (two letters or more), or None"""
+    if name in types:
+        return name
+    if name == 'tag':
+        return 'tags'
+    candidates = [attribute for attribute in types if attribute.startswith(name)] if len(name) >= 2 else []
+    return candidates[0] if len(candidates) == 1 else None
+
+def compile_tag_term(word):
+    tag, wanted = word[1:], word[0] == '+'
+    if tag in VIRTUAL_TAGS:
+        test = VIRTUAL_TAGS[tag]
+        return lambda task, ctx: bool(test(task, ctx)) == wanted
+    if tag in UNSUPPORTED_VIRTUAL_TAGS:
+        raise UnsupportedReport(f'Virtual tag {tag} is not supported')
+    return lambda task, ctx: (tag in (task.get('tags') or ())) == wanted
+
+def compile_attribute_term(attribute, modifier, value, kind):
+    """Predicate for attribute[.modifier]:value"""
+    def get(task, ctx):
+        if attribute == 'urgency':
+            return ctx.urgency(task)
+        return task.get(attribute)
+    
+    if modifier == 'any':
+        return lambda task, ctx: get(task, ctx) not in (None, '', [])
+    if modifier == 'none' or (modifier in ('', 'is') and value == ''):
+        return lambda task, ctx: get(task, ctx) in (None, '', [])
+    if modifier in ('not', 'isnt') and value == '':
+        return lambda task, ctx: get(task, ctx) not in (None, '', [])
+    
+    if kind == 'tags':
+        if modifier not in ('', 'is', 'has', 'not', 'isnt', 'hasnt'):
+            raise UnsupportedReport(f'tags.{modifier} is not supported')
+        wanted = modifier in ('', 'is', 'has')
+        return lambda task, ctx: (value in (task.get('tags') or ())) == wanted
+    
+    if kind == 'date':
+        operators = {'before': lambda a, b: a < b, 'after': lambda a, b: a > b, 'by': lambda a, b: a <= b}
+        if modifier not in operators or parse_filter_date(value, datetime.now().astimezone()) is None:
+            raise UnsupportedReport(f"{attribute}.{modifier or 'is'}:{value} is not supported")
+        compare = operators[modifier]
+        return lambda task, ctx: bool(task.get(attribute)) and compare(task[attribute], ctx.date(value))
+    
+    if kind == 'numeric':
+        try:
+            number = float(value)
+        except ValueError:
+            raise UnsupportedReport(f"{attribute}:{value} is not a number")
+        operators = {'': lambda a: a == number, 'is': lambda a: a == number,
+                     'isnt': lambda a: a != number, 'not': lambda a: a != number,
+                     'before': lambda a: a < number, 'after': lambda a: a > number}
+        if modifier not in operators:
+            raise UnsupportedReport(f'{attribute}.{modifier} is not supported')
+        compare = operators[modifier]
+        return lambda task, ctx: get(task, ctx) is not None and compare(float(get(task, ctx)))
+    
+    if kind != 'string':
+        raise UnsupportedReport(f'{attribute}.{modifier or "is"} on a {kind} attribute is not supported')
+    # Plain attribute:value is a left match (project:Home covers Home.Garden), except for status
+    exact = attribute == 'status'
+    operators = {
+        '': (lambda a: a == value) if exact else (lambda a: a.startswith(value)),
+        'is': lambda a: a == value,
+        'isnt': lambda a: a != value,
+        'not': (lambda a: a != value) if exact else (lambda a: not a.startswith(value)),
+        'has': lambda a: value in a,
+        'hasnt': lambda a: value not in a,
+        'startswith': lambda a: a.startswith(value),
+        'endswith': lambda a: a.endswith(value),
+        'before': lambda a: a < value,
+        'after': lambda a: a > value,
+    }
+    if modifier not in operators:
+        raise UnsupportedReport(f'{attribute}.{modifier} is not supported')
+    compare = operators[modifier]
+    return lambda task, ctx: compare(str(task.get(attribute) or ''))
+
+def compile_filter_term(word, types, case_sensitive):
+    if len(word) > 1 and word[0] in '+-' and ':' not in word:
+        return compile_tag_term(word)
+    
+    name, sep, value = word.partition(':')
+    if sep and re.match(r'^[A-Za-z_][\w.]*$', name):
+        attribute_name, _, modifier = name.partition('.')
+        attribute = resolve_attribute(attribute_name, types)
+        if attribute is None or modifier not in FILTER_MODIFIERS:
+            raise UnsupportedReport(f"Unknown attribute or modifier in '{word}'")
+        return compile_attribute_term(attribute, FILTER_MODIFIERS[modifier], value, types[attribute])
+    
+    if TASK_ID_WORD_RE.match(word.lower()):
+        raise UnsupportedReport(f"ID or UUID filter '{word}' is not supported")
+    if re.search(r'[\\^$.|?*+()\[\]{}]', word):
+        raise UnsupportedReport(f"Pattern '{word}' needs regex matching")
+    # A bare word matches the description or any annotation
+    needle = word if case_sensitive else word.lower()
+    
+    def matches_text(task, ctx):
+        texts = [task.get('description', '')] + [a.get('description', '') for a in task.get('annotations') or ()]
+        return any(needle in (text if case_sensitive else text.lower()) for text in texts)
+    return matches_text
+
+def compile_filter(node, types, case_sensitive):
+    """Turn a parsed filter tree into predicate(task, ctx)"""
+    kind = node[0]
+    if kind == 'term':
+        return compile_filter_term(node[1], types, case_sensitive)
+    if kind == 'not':
+        inner = compile_filter(node[1], types, case_sensitive)
+        return lambda task, ctx: not inner(task, ctx)
+    parts = [compile_filter(child, types, case_sensitive) for child in node[1]]
+    if kind == 'and':
+        return lambda task, ctx: all(part(task, ctx) for part in parts)
+    if kind == 'or':
+        return lambda task, ctx: any(part(task, ctx) for part in parts)
+    return lambda task, ctx: sum(1 for part in parts if part(task, ctx)) % 2 == 1
+
+def compile_sort_column(spec, types, config):
+    """compare(a, b, ctx) -> -1/0/1 for one report.<name>.sort entry such as due+ or urgency-"""
+    spec = spec.strip().rstrip('/')
+    descending = spec.endswith('-')
+    name = spec.rstrip('+-')
+    attribute = resolve_attribute(name, types)
+    if attribute is None or types[attribute] in ('tags', 'duration'):
+        raise UnsupportedReport(f"Sorting by '{name}' is not supported")
+    kind = types[attribute]
+    sign = -1 if descending else 1
+    
+    def ordered(a, b):
+        return sign * ((a > b) - (a < b))
+    
+    if attribute == 'urgency':
+        return lambda a, b, ctx: ordered(ctx.urgency(a), ctx.urgency(b))
+    if kind == 'numeric':
+        return lambda a, b, ctx: ordered(float(a.get(attribute) or 0), float(b.get(attribute) or 0))
+    if kind == 'date':
+        def compare_dates(a, b, ctx):
+            # Tasks without the date come last in either direction
+            left, right = a.get(attribute, ''), b.get(attribute, '')
+            if bool(left) != bool(right):
+                return -1 if left else 1
+            return ordered(left, right)
+        return compare_dates
+    
+    values = config.get(f'uda.{attribute}.values')
+    if values is None and attribute == 'priority':
+        values = 'H,M,L,'
+    if values is not None:
+        # uda.<name>.values lists values highest first; unlisted values rank below all of them
+        rank = {value: len(values.split(',')) - index for index, value in enumerate(values.split(','))}
+        return lambda a, b, ctx: ordered(rank.get(a.get(attribute, ''), 0), rank.get(b.get(attribute, ''), 0))
+    return lambda a, b, ctx: ordered(str(a.get(attribute) or ''), str(b.get(attribute) or ''))
+
+class UrgencyModel:
+    """TaskWarrior's urgency polynomial with coefficients from the configuration"""
+    
+    def __init__(self, config):
+        settings = dict(URGENCY_DEFAULTS)
+        settings.update((key, value) for key, value in config.items() if key.startswith('urgency.'))
+        
+        def number(key):
+            try:
+                return float(settings.get(key, 0))
+            except ValueError:
+                return 0.0
+        
+        self.factors = {name: number(f'urgency.{name}.coefficient')
+                        for name in ('project', 'active', 'scheduled', 'waiting', 'blocked', 'annotations',
+                                     'tags', 'due', 'age', 'blocking')}
+        self.age_max = number('urgency.age.max')
+        self.user_tags, self.user_projects, self.keywords = {}, {}, {}
+        self.uda_present, self.uda_values = {}, {}
+        for key in settings:
+            if not key.endswith('.coefficient'):
+                continue
+            middle = key[len('urgency.'):-len('.coefficient')]
+            group, _, rest = middle.partition('.')
+            if group == 'user':
+                kind, _, name = rest.partition('.')
+                target = {'tag': self.user_tags, 'project': self.user_projects,
+                          'keyword': self.keywords}.get(kind)
+                if target is not None and name:
+                    target[name] = number(key)
+            elif group == 'uda' and rest:
+                name, _, value = rest.partition('.')
+                if value:
+                    self.uda_values[(name, value)] = number(key)
+                else:
+                    self.uda_present[name] = number(key)
+    
+    @staticmethod
+    def count_ramp(count):
+        return 0.0 if count == 0 else 0.8 if count == 1 else 0.9 if count == 2 else 1.0
+    
+    def score(self, task, ctx):
+        factors = self.factors
+        urgency = 0.0
+        if task.get('project'):
+            urgency += factors['project']
+        if task.get('start'):
+            urgency += factors['active']
+        if task.get('scheduled') and task['scheduled'] < ctx.now_stamp:
+            urgency += factors['scheduled']
+        if task_is_waiting(task, ctx):
+            urgency += factors['waiting']
+        if task.get('uuid') in ctx.blocked:
+            urgency += factors['blocked']
+        if task.get('uuid') in ctx.blocking:
+            urgency += factors['blocking']
+        tags = task.get('tags') or ()
+        urgency += self.count_ramp(len(task.get('annotations') or ())) * factors['annotations']
+        urgency += self.count_ramp(len(tags)) * factors['tags']
+        
+        due = parse_taskwarrior_date(task['due']) if task.get('due') else None
+        if due is not None:
+            days_overdue = (ctx.now - due).total_seconds() / 86400
+            if days_overdue >= 7:
+                urgency += factors['due']
+            elif days_overdue >= -14:
+                urgency += ((days_overdue + 14) * 0.8 / 21 + 0.2) * factors['due']
+            else:
+                urgency += 0.2 * factors['due']
+        entry = parse_taskwarrior_date(task['entry']) if task.get('entry') else None
+        if entry is not None:
+            age = (ctx.now - entry).total_seconds() / 86400
+            urgency += (1.0 if self.age_max == 0 or age > self.age_max else age / self.age_max) * factors['age']
+        
+        for tag, coefficient in self.user_tags.items():
+            if tag in tags:
+                urgency += coefficient
+        project = task.get('project') or ''
+        for name, coefficient in self.user_projects.items():
+            if project.startswith(name):
+                urgency += coefficient
+        for keyword, coefficient in self.keywords.items():
+            if keyword in task.get('description', ''):
+                urgency += coefficient
+        for name, coefficient in self.uda_present.items():
+            if task.get(name) not in (None, ''):
+                urgency += coefficient
+        for (name, value), coefficient in self.uda_values.items():
+            if str(task.get(name, '')) == value:
+                urgency += coefficient
+        return urgency
+
+class EvaluationContext:
+    """Per-run state shared by filter terms: the clock, dependency sets and urgency"""
+    
+    def __init__(self, tasks, urgency_model, due_days, now):
+        self.now = now
+        self.now_stamp = to_task_stamp(now)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.yesterday_stamp = to_task_stamp(today - timedelta(days=1))
+        self.today_stamp = to_task_stamp(today)
+        self.tomorrow_stamp = to_task_stamp(today + timedelta(days=1))
+        self.day_after_stamp = to_task_stamp(today + timedelta(days=2))
+        self.imminent_stamp = to_task_stamp(today + timedelta(days=due_days))
+        self.urgency_model = urgency_model
+        self._dates = {}
+        self._urgency = {}
+        
+        open_uuids = {task.get('uuid') for task in tasks if task.get('status') in OPEN_STATUSES}
+        self.blocked, self.blocking = set(), set()
+        for task in tasks:
+            if task.get('status') not in OPEN_STATUSES:
+                continue
+            dependencies = [uuid for uuid in task_dependencies(task) if uuid in open_uuids]
+            if dependencies:
+                self.blocked.add(task.get('uuid'))
+                self.blocking.update(dependencies)
+    
+    def date(self, value):
+        stamp = self._dates.get(value)
+        if stamp is None:
+            stamp = self._dates[value] = to_task_stamp(parse_filter_date(value, self.now))
+        return stamp
+    
+    def urgency(self, task):
+        """The exported urgency when present, else computed the way TaskWarrior does"""
+        if 'urgency' in task:
+            return task['urgency']
+        key = task.get('uuid')
+        if key not in self._urgency:
+            self._urgency[key] = self.urgency_model.score(task, self)
+        return self._urgency[key]
+
+class CompiledReport:
+    """A report's filter and sort compiled to Python callables"""
+    
+    def __init__(self, name, predicate, sort_columns, urgency_model, due_days):
+        self.name = name
+        self.predicate = predicate
+        self.sort_columns = sort_columns
+        self.urgency_model = urgency_model
+        self.due_days = due_days
+    
+    def run(self, tasks, now):
+        """Filter and order tasks (an export of the open tasks) as `task export <name>` would"""
+        ctx = EvaluationContext(tasks, self.urgency_model, self.due_days, now)
+        selected = [task for task in tasks if self.predicate(task, ctx)]
+        if self.sort_columns:
+            def compare(a, b):
+                for column in self.sort_columns:
+                    result = column(a, b, ctx)
+                    if result:
+                        return result
+                return 0
+            selected.sort(key=cmp_to_key(compare))
+        return selected
+
+def parse_show_output(text):
+    """Parse `task _show` (one name=value per line) into a dict"""
+    config = {}
+    for line in text.splitlines():
+        name, sep, value = line.partition('=')
+        if sep and name.strip():
+            config[name.strip()] = value.strip()
+    return config
+
+def compile_report(name, config):
+    """Compile report.<name>.filter/.sort plus the active context; raises UnsupportedReport"""
+    filter_text = config.get(f'report.{name}.filter')
+    sort_text = config.get(f'report.{name}.sort')
+    if filter_text is None and sort_text is None:
+        raise UnsupportedReport(f"No report.{name}.filter or report.{name}.sort configured")
+    
+    words = split_filter(filter_text or '')
+    context = config.get('context')
+    if context:
+        context_filter = config.get(f'context.{context}.read', config.get(f'context.{context}', ''))
+        context_words = split_filter(context_filter)
+        if context_words:
+            words = (['('] + words + [')'] if words else []) + ['('] + context_words + [')']
+    tree = FilterParser(words).parse()
+    if not any(node[0] == 'term' and node[1] in OPEN_ONLY_TERMS for node in filter_conjuncts(tree)):
+        raise UnsupportedReport(f"Filter '{filter_text}' can match tasks that are not pending or waiting")
+    
+    types = dict(FILTER_ATTRIBUTES)
+    for key, value in config.items():
+        if key.startswith('uda.') and key.endswith('.type'):
+            types[key[len('uda.'):-len('.type')]] = value if value in ('string', 'numeric', 'date') else 'duration'
+    case_sensitive = config.get('search.case.sensitive', 'yes').lower() in ('yes', 'on', 'true', '1', 'y')
+    predicate = compile_filter(tree, types, case_sensitive)
+    sort_columns = [compile_sort_column(spec, types, config) for spec in (sort_text or '').split(',') if spec.strip()]
+    try:
+        due_days = int(config.get('due', '7'))
+    except ValueError:
+        due_days = 7
+    return CompiledReport(name, predicate, sort_columns, UrgencyModel(config), due_days)
+
+class ReportDefinitions:
+    """Report definitions read once from `task _show` and compiled on first use
+    
+    The configuration is re-read when the taskrc file changes (or after
+    CONFIG_MAX_AGE seconds, for changes to included files). Reports that
+    cannot be compiled are remembered so they go straight to the CLI.
+    """
+    
+    CONFIG_MAX_AGE = 300
+    
+    def __init__(self):
+        self.local_runs = 0
+        self.cli_fallbacks = 0
+        self._config = None
+        self._config_key = None
+        self._loaded_at = 0.0
+        self._compiled = {}
+        self._lock = threading.Lock()
+    
+    def _taskrc_key(self):
+        path = os.path.expanduser(current_tenant().environ.get('TASKRC', '~/.taskrc'))
+        try:
+            stat = os.stat(path)
+            return path, stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return path, None, None
+    
+    def config(self):
+        key = self._taskrc_key()
+        with self._lock:
+            if (self._config is not None and self._config_key == key
+                    and time.monotonic() - self._loaded_at < self.CONFIG_MAX_AGE):
+                return self._config
+        result = run_task_command(['_show'])
+        if result.returncode != 0:
+            raise Exception(f"TaskWarrior _show failed: {result.stderr}")
+        config = parse_show_output(result.stdout)
+        with self._lock:
+            self._config, self._config_key, self._loaded_at = config, key, time.monotonic()
+            self._compiled = {}
+        return config
+    
+    def compile(self, name):
+        """Return the CompiledReport for a report name; raises UnsupportedReport"""
+        config = self.config()
+        with self._lock:
+            compiled = self._compiled.get(name)
+        if compiled is None:
+            try:
+                compiled = compile_report(name, config)
+            except UnsupportedReport as e:
+                logger.info('Report %s will run through task export: %s', name, e)
+                compiled = e
+            with self._lock:
+                self._compiled[name] = compiled
+        if isinstance(compiled, UnsupportedReport):
+            self.cli_fallbacks += 1
+            raise compiled
+        return compiled
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': app.config['REPORT_EVALUATOR'] == 'local',
+                'local_runs': self.local_runs,
+                'cli_fallbacks': self.cli_fallbacks,
+                'compiled': sorted(name for name, value in self._compiled.items()
+                                   if isinstance(value, CompiledReport)),
+                'unsupported': {name: str(value) for name, value in self._compiled.items()
+                                if isinstance(value, UnsupportedReport)},
+            }
+
+report_definitions = LocalProxy(lambda: current_tenant().report_definitions)
+
+def get_open_tasks(refresh=False):
+    """Pending and waiting tasks from one cached export, the input to every local report run"""
+    if app.config['TASK_READ_BACKEND'] == 'direct':
+        if not refresh:
+            cached = report_cache.get(OPEN_EXPORT_KEY)
+            if cached is not None:
+                return cached
+        generation = report_cache.generation
+        signature = get_taskdata_signature()
+        try:
+            tasks = direct_reader.get_tasks()
+            if report_cache.set(OPEN_EXPORT_KEY, tasks, generation, signature):
+                task_store.add_export(tasks, signature)
+            return tasks
+        except DirectReadError as e:
+            logger.warning('Direct read failed, falling back to CLI: %s', e)
+    return get_cached_export(OPEN_EXPORT_KEY, OPEN_EXPORT_ARGS, refresh)
+
+def evaluate_report(report_name, refresh=False):
+    """Run a report in-process against the open-task export; raises UnsupportedReport"""
+    if not refresh:
+        cached = report_cache.get(report_name)
+        if cached is not None:
+            return cached
+    compiled = report_definitions.compile(report_name)
+    
+    generation = report_cache.generation
+    signature = get_taskdata_signature()
+    tasks = compiled.run(get_open_tasks(refresh), datetime.now().astimezone())
+    report_definitions.local_runs += 1
+    if report_cache.set(report_name, tasks, generation, signature) and snapshot_store is not None:
+        snapshot_store.save(snapshot_key(report_name), json.dumps(tasks), tasks, signature)
+    return tasks
+
+class DisplayTask:
+    """Compact display view of one task; __slots__ keeps large reports small in memory"""
+    
+    __slots__ = ('uuid', 'name', 'priority', 'time_estimate', 'total_seconds',
+                 'task_url', 'annotations', 'due_date', 'tags', 'modified')
+    
+    def __init__(self, uuid, name, priority, time_estimate, total_seconds, task_url, annotations, due_date, tags,
+                 modified=None):
+        self.uuid = uuid
+        self.name = name
+        self.priority = priority
+        self.time_estimate = time_estimate
+        self.total_seconds = total_seconds
+        self.task_url = task_url
+        self.annotations = annotations
+        self.due_date = due_date
+        self.tags = tags
+        self.modified = modified
+    
+    # Derived fields are computed on demand rather than stored (and sent) per task
+    @property
+    def task_id(self):
+        return self.uuid
+    
+    @property
+    def short_id(self):
+        return self.uuid[:8] if self.uuid else 'unknown'
+    
+    @property
+    def formatted_task(self):
+        return f"{self.priority}: {self.name}"
+    
+    def __getitem__(self, key):
+        # Dict-style access for existing callers such as sorting_key()
+        return getattr(self, key)
+    
+    def to_row(self):
+        """Row for the page payload and /events deltas, keyed like PAYLOAD_COLUMNS"""
+        return {
+            'uuid': self.uuid,
+            'label': self.formatted_task,
+            'url': None if self.task_url == 'none' else self.task_url,
+            'seconds': self.total_seconds,
+            'annotations': self.annotations,
+            'due': self.due_date,
+            'tags': self.tags,
+            'modified': self.modified,
+        }
+
 def format_task_for_display(task):
     """Convert TaskWarrior task to Milkbox-compatible format"""
     # Extract priority (TaskWarrior uses numeric priorities: 1, 2, 3)
@@ -55,29 +2319,18 @@ def format_task_for_display(task):
     estimate = task.get('estimate', '')
     total_seconds = convert_taskwarrior_estimate_to_seconds(estimate)
     
-    # Create short task identifier from UUID (first 8 characters)
-    uuid = task.get('uuid', '')
-    short_id = uuid[:8] if uuid else 'unknown'
-    
-    # Format the task for display
-    formatted_task = {
-        "name": task.get('description', 'No description'),
-        "priority": priority_num,
-        "time_estimate": estimate,
-        "task_id": task.get('uuid', ''),  # Use UUID as primary identifier
-        "uuid": task.get('uuid', ''),
-        "total_seconds": total_seconds,
-        "task_url": task.get('url', 'none'),
-        "short_id": short_id,
-        "annotations": task.get('annotations', []),
-        "due_date": task.get('due', None),
-        "tags": task.get('tags', [])
-    }
-    
-    # Format display name
-    formatted_task["formatted_task"] = f"{formatted_task['priority']}: {formatted_task['name']}"
-    
-    return formatted_task
+    return DisplayTask(
+        uuid=task.get('uuid', ''),  # UUID is the primary identifier; short_id is derived from it
+        name=task.get('description', 'No description'),
+        priority=priority_num,
+        time_estimate=estimate,
+        total_seconds=total_seconds,
+        task_url=task.get('url', 'none'),
+        annotations=task.get('annotations', []),
+        due_date=task.get('due', None),
+        tags=task.get('tags', []),
+        modified=task.get('modified')
+    )
 
 def convert_taskwarrior_estimate_to_seconds(estimate):
     """Convert TaskWarrior estimate format to seconds"""
@@ -115,59 +2368,139 @@ def sorting_key(task_details):
             task_details["total_seconds"],
             task_details["name"])
 
+# Columns of the task page payload; each holds one value per task in report order
+PAYLOAD_COLUMNS = ('uuid', 'label', 'url', 'seconds', 'annotations', 'due', 'tags', 'modified')
+
+# Shown when a report has no tasks
+EMPTY_REPORT_ROW = {'uuid': '', 'label': 'No tasks to display', 'url': None, 'seconds': 0,
+                    'annotations': [], 'due': None, 'tags': [], 'modified': None}
+
+def build_page_payload(rows):
+    """Turn display rows into one list per column for task.html"""
+    return {column: [row[column] for row in rows] for column in PAYLOAD_COLUMNS}
+
+class ReportVersions:
+    """Versioned history of what each report looked like, for computing deltas
+    
+    A report gets a new version whenever a display row is added, changed,
+    removed or reordered. Versions come from one process-wide counter seeded
+    with the start time, so a cursor from before a restart never matches a
+    new version by accident and simply triggers a full reset.
+    """
+    
+    def __init__(self, history=16):
+        self.history = history
+        self._counter = itertools.count(int(time.time() * 1000))
+        self._reports = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, report_name, tasks):
+        """Record the current tasks of a report and return (version, rows by UUID, order)"""
+        with self._lock:
+            state = self._reports.get(report_name)
+            # Cached exports are shared list objects, so an unchanged cache entry needs no re-hashing
+            if state is not None and state['source'] is tasks:
+                latest = state['snapshots'][-1]
+                return latest['version'], state['rows'], latest['order']
+        
+        rows = {}
+        order = []
+        for task in tasks:
+            row = format_task_for_display(task).to_row()
+            rows[row['uuid']] = row
+            order.append(row['uuid'])
+        fingerprints = {uuid: hashlib.sha1(json.dumps(row, sort_keys=True).encode()).hexdigest()
+                        for uuid, row in rows.items()}
+        
+        with self._lock:
+            state = self._reports.setdefault(report_name, {'source': None, 'rows': {}, 'snapshots': []})
+            snapshots = state['snapshots']
+            if not snapshots or snapshots[-1]['order'] != order or snapshots[-1]['fingerprints'] != fingerprints:
+                digest = hashlib.sha1(json.dumps([[uuid, fingerprints[uuid]] for uuid in order]).encode()).hexdigest()
+                snapshots.append({'version': next(self._counter), 'order': order, 'fingerprints': fingerprints,
+                                  'digest': digest})
+                del snapshots[:-self.history]
+            state['source'] = tasks
+            state['rows'] = rows
+            return snapshots[-1]['version'], rows, snapshots[-1]['order']
+    
+    def digest(self, report_name, version):
+        """Hash of a version's rows and order; equal data gives an equal digest in every process"""
+        with self._lock:
+            state = self._reports.get(report_name, {'snapshots': []})
+            return next((snap['digest'] for snap in state['snapshots'] if snap['version'] == version), None)
+    
+    def delta(self, report_name, since):
+        """Rows added/changed and UUIDs removed since a version; a reset if since is unknown"""
+        with self._lock:
+            state = self._reports[report_name]
+            latest = state['snapshots'][-1]
+            base = next((snap for snap in state['snapshots'] if snap['version'] == since), None)
+            rows = state['rows']
+        
+        if base is None:
+            return {'version': latest['version'], 'since': since, 'reset': True,
+                    'order': latest['order'], 'upserts': rows, 'removed': []}
+        
+        upserts = {uuid: rows[uuid] for uuid, fingerprint in latest['fingerprints'].items()
+                   if base['fingerprints'].get(uuid) != fingerprint}
+        removed = [uuid for uuid in base['fingerprints'] if uuid not in latest['fingerprints']]
+        return {'version': latest['version'], 'since': since, 'reset': False,
+                'order': latest['order'], 'upserts': upserts, 'removed': removed}
+
+report_versions = LocalProxy(lambda: current_tenant().report_versions)
+
+def report_page_etag(report_name, report_version, stale_since):
+    """ETag for the task page: the report's data digest plus everything else the HTML depends on"""
+    parts = [current_tenant().name, report_name, report_versions.digest(report_name, report_version), str(stale_since),
+             file_digest(os.path.join(app.root_path, app.template_folder, 'task.html')),
+             static_asset_hash('css/style.css'), static_asset_hash('favicon.ico'),
+             static_asset_hash('js/outbox.js')]
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
 @app.route('/')
 def show_list():
     """Main route - display tasks from specified report"""
-    print(f"DEBUG: Starting show_list()")
-    
     # Get report name from query string (default to 'next')
     report_name = request.args.get('report', default='next')
-    print(f"DEBUG: Using report: {report_name}")
     
     try:
-        # Get tasks from TaskWarrior
-        raw_tasks = get_tasks_from_report(report_name)
-        print(f"DEBUG: Got {len(raw_tasks)} tasks from TaskWarrior")
+        # Get tasks from TaskWarrior, or the last saved export if it is not responding
+        raw_tasks, stale_since = get_report_tasks(report_name)
         
-        if not raw_tasks:
-            tasks = [{'name': 'No tasks to display', 'priority': 2, 'total_seconds': 0, 'formatted_task': 'No tasks to display', 'task_id': '', 'uuid': '', 'task_url': 'none', 'short_id': ''}]
+        # Display rows are formatted once per report version and shared with /events
+        # Note: raw_tasks are already sorted by urgency by the report export
+        report_version, rows, order = report_versions.observe(report_name, raw_tasks)
+        
+        # An unchanged report is answered with 304, or with the page rendered for an earlier client
+        etag = report_page_etag(report_name, report_version, stale_since)
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
         else:
-            # Convert TaskWarrior tasks to Milkbox format
-            # Note: raw_tasks are already sorted by urgency from get_tasks_from_report()
-            tasks = [format_task_for_display(task) for task in raw_tasks]
-        
-        print(f"DEBUG: Formatted {len(tasks)} tasks for display")
-        
-        # Prepare data for template (matching Milkbox structure)
-        task_ids = [task["task_id"] for task in tasks]
-        uuids = [task["uuid"] for task in tasks]
-        formatted_tasks = [task["formatted_task"] for task in tasks]
-        task_urls = [task["task_url"] for task in tasks]
-        remaining_seconds = [task["total_seconds"] for task in tasks]
-        short_ids = [task["short_id"] for task in tasks]
-        task_annotations = [task["annotations"] for task in tasks]
-        task_due_dates = [task["due_date"] for task in tasks]
-        task_tags = [task["tags"] for task in tasks]
-        num_tasks = len(tasks)
-        
-        return render_template('task.html', 
-                             formatted_tasks=formatted_tasks, 
-                             task_urls=task_urls, 
-                             remaining_seconds=remaining_seconds, 
-                             num_tasks=num_tasks, 
-                             task_id=task_ids,
-                             taskseries_id=uuids,  # Use UUID as taskseries_id for compatibility
-                             truelist_id=uuids,    # Use UUID as truelist_id for compatibility
-                             short_ids=short_ids,
-                             task_annotations=task_annotations,
-                             task_due_dates=task_due_dates,
-                             task_tags=task_tags,
-                             currentTaskIndex=0,
-                             report_name=report_name)
+            g.response_cache_key = ('page', etag)
+            html = response_cache.get((g.response_cache_key, 'identity'))
+            if html is None:
+                payload = build_page_payload([rows[uuid] for uuid in order] or [EMPTY_REPORT_ROW])
+                logger.debug('Rendering report=%s tasks=%d', report_name, len(order))
+                html = render_template('task.html',
+                                       payload=payload,
+                                       payload_json=htmlsafe_json_dumps(payload, separators=(',', ':')),
+                                       num_tasks=len(payload['uuid']),
+                                       currentTaskIndex=0,
+                                       report_name=report_name,
+                                       report_version=report_version,
+                                       stale_since=(datetime.fromtimestamp(stale_since).strftime('%Y-%m-%d %H:%M')
+                                                    if stale_since else None)).encode()
+                response_cache.put((g.response_cache_key, 'identity'), html)
+            response = Response(html, mimetype='text/html')
+        response.set_etag(etag, weak=True)
+        # Revalidate on every load; the ETag makes that cheap
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except TimeoutError as e:
         error_msg = f"TaskWarrior timeout: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.warning('%s', error_msg)
         return f"""
         <html>
         <head><title>OneTask - Timeout</title></head>
@@ -186,7 +2519,7 @@ def show_list():
         """, 408
     except Exception as e:
         error_msg = f"TaskWarrior error: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return f"""
         <html>
         <head><title>OneTask - Error</title></head>
@@ -204,6 +2537,30 @@ def show_list():
         </html>
         """, 500
 
+def find_conflict(task_id, expected_modified):
+    """Return the current task if it changed after the client's `modified` stamp, else None
+    
+    Offline clients send the stamp of the copy they edited, so a change queued
+    on one device cannot silently overwrite a newer edit made elsewhere.
+    """
+    if not expected_modified:
+        return None
+    task = export_single_task(task_id)
+    if task is None or task.get('modified') == expected_modified:
+        return None
+    return task
+
+def conflict_result(task_id, task):
+    """Body for a rejected change, with the current row so the client can show what won"""
+    return {'task_id': task_id, 'status': 'conflict', 'modified': task.get('modified'),
+            'error': f"Task {task_id} was modified elsewhere at {task.get('modified')}",
+            'row': format_task_for_display(task).to_row()}
+
+def current_modified(task_id):
+    """The task's `modified` stamp after a change, for the client's next conditional write"""
+    task = export_single_task(task_id)
+    return task.get('modified') if task else None
+
 @app.route('/complete_task', methods=['POST'])
 def complete_task():
     """Complete a task using TaskWarrior"""
@@ -214,23 +2571,34 @@ def complete_task():
         if not task_id:
             return jsonify({'error': 'No task ID provided', 'status': 'error'}), 400
         
-        print(f"DEBUG: Completing task {task_id}")
+        logger.debug('Completing task_id=%s', task_id)
+        
+        conflict = find_conflict(task_id, request.json.get('expected_modified'))
+        if conflict is not None:
+            return jsonify(conflict_result(task_id, conflict)), 409
+        
+        if app.config['WRITE_BEHIND']:
+            write_behind_queue.enqueue({'action': 'complete', 'task_id': str(task_id)})
+            return jsonify({'task_id': task_id, 'status': 'completed', 'queued': True,
+                            'message': 'Task completion queued'})
         
         # Complete the task via TaskWarrior
         result = run_task_command([str(task_id), 'done'])
         
         if result.returncode != 0:
             error_msg = f"TaskWarrior completion failed: {result.stderr}"
-            print(f"DEBUG: {error_msg}")
+            logger.warning('%s', error_msg)
             return jsonify({'error': error_msg, 'status': 'error'}), 500
         
-        print(f"DEBUG: Task {task_id} completed successfully")
-        print(f"DEBUG: TaskWarrior output: {result.stdout}")
+        invalidate_task_caches([task_id])
+        logger.info('Completed task_id=%s', task_id)
+        logger.debug('task output: %s', result.stdout)
         
         completed_task_info = {
             'task_id': task_id,
             'status': 'completed',
             'message': 'Task marked as completed successfully',
+            'modified': current_modified(task_id),
             'taskwarrior_output': result.stdout.strip()
         }
         
@@ -238,11 +2606,11 @@ def complete_task():
         
     except TimeoutError as e:
         error_msg = f"TaskWarrior timeout: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.warning('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'timeout'}), 408
     except Exception as e:
         error_msg = f"Error completing task: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
 @app.route('/uncomplete_task', methods=['POST'])
@@ -255,7 +2623,16 @@ def uncomplete_task():
         if not task_id:
             return jsonify({'error': 'No task ID provided', 'status': 'error'}), 400
         
-        print(f"DEBUG: Uncompleting task {task_id}")
+        logger.debug('Uncompleting task_id=%s', task_id)
+        
+        conflict = find_conflict(task_id, request.json.get('expected_modified'))
+        if conflict is not None:
+            return jsonify(conflict_result(task_id, conflict)), 409
+        
+        if app.config['WRITE_BEHIND']:
+            write_behind_queue.enqueue({'action': 'uncomplete', 'task_id': str(task_id)})
+            return jsonify({'task_id': task_id, 'status': 'uncompleted', 'queued': True,
+                            'message': 'Task uncompletion queued'})
         
         # TaskWarrior 3.x doesn't have a direct uncomplete command
         # We need to modify the task to set status back to pending
@@ -263,16 +2640,18 @@ def uncomplete_task():
         
         if result.returncode != 0:
             error_msg = f"TaskWarrior uncomplete failed: {result.stderr}"
-            print(f"DEBUG: {error_msg}")
+            logger.warning('%s', error_msg)
             return jsonify({'error': error_msg, 'status': 'error'}), 500
         
-        print(f"DEBUG: Task {task_id} uncompleted successfully")
-        print(f"DEBUG: TaskWarrior output: {result.stdout}")
+        invalidate_task_caches([task_id])
+        logger.info('Uncompleted task_id=%s', task_id)
+        logger.debug('task output: %s', result.stdout)
         
         uncompleted_task_info = {
             'task_id': task_id,
             'status': 'uncompleted',
             'message': 'Task successfully marked as incomplete',
+            'modified': current_modified(task_id),
             'taskwarrior_output': result.stdout.strip()
         }
         
@@ -280,13 +2659,16 @@ def uncomplete_task():
         
     except TimeoutError as e:
         error_msg = f"TaskWarrior timeout: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.warning('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'timeout'}), 408
     except Exception as e:
         error_msg = f"Error uncompleting task: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
+# `task add` reports the new task's working set ID (or UUID when it has none)
+CREATED_TASK_RE = re.compile(r'Created task ([0-9a-fA-F-]+)\.')
+
 @app.route('/capture', methods=['POST'])
 def capture_task():
     """Capture a new task using TaskWarrior native syntax"""
@@ -297,7 +2679,7 @@ def capture_task():
         if not task_text:
             return jsonify({'error': 'No task text provided', 'status': 'error'}), 400
         
-        print(f"DEBUG: Capturing task: {task_text}")
+        logger.debug('Capturing task text=%r', task_text)
         
         # Add the task via TaskWarrior
         # Split the task text and add it using 'task add'
@@ -305,11 +2687,13 @@ def capture_task():
         
         if result.returncode != 0:
             error_msg = f"TaskWarrior add failed: {result.stderr}"
-            print(f"DEBUG: {error_msg}")
+            logger.warning('%s', error_msg)
             return jsonify({'error': error_msg, 'status': 'failed'}), 400
         
-        print(f"DEBUG: Task captured successfully")
-        print(f"DEBUG: TaskWarrior output: {result.stdout}")
+        created = CREATED_TASK_RE.search(result.stdout)
+        invalidate_task_caches([created.group(1)] if created else None)
+        logger.info('Captured task_id=%s', created.group(1) if created else None)
+        logger.debug('task output: %s', result.stdout)
         
         return jsonify({
             'status': 'success', 
@@ -319,70 +2703,284 @@ def capture_task():
         
     except TimeoutError as e:
         error_msg = f"TaskWarrior timeout: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.warning('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'timeout'}), 408
     except Exception as e:
         error_msg = f"Error capturing task: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'failed'}), 500
 
+# Attribute names (and the abbreviations people type) understood by /capture/bulk
+ADD_ATTRIBUTES = {'project': 'project', 'proj': 'project', 'pro': 'project',
+                  'priority': 'priority', 'pri': 'priority',
+                  'due': 'due',
+                  'estimate': 'estimate', 'est': 'estimate',
+                  'url': 'url'}
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+# Every unit but the last is required, so a long digit run cannot be split in exponentially many ways
+ESTIMATE_RE = re.compile(r'^(?:\d+[hms])*\d+[hms]?$|^PT(\d+H)?(\d+M)?(\d+S)?$', re.IGNORECASE)
+ESTIMATE_MAX_LENGTH = 32
+
+def parse_add_date(value, now):
+    """Resolve a due date as TaskWarrior would for the common forms, or None if unsupported"""
+    value = value.lower()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_of_day = timedelta(days=1, seconds=-1)
+    named = {
+        'now': now,
+        'today': today, 'sod': today,
+        'eod': today + end_of_day,
+        'tomorrow': today + timedelta(days=1),
+        'yesterday': today - timedelta(days=1),
+        'eow': today + timedelta(days=6 - today.weekday()) + end_of_day,
+        'eom': (today.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(seconds=1),
+        'eoy': today.replace(year=today.year + 1, month=1, day=1) - timedelta(seconds=1),
+    }
+    if value in named:
+        return named[value]
+    for index, day in enumerate(WEEKDAYS):
+        if value in (day, day[:3]):
+            # A weekday name means the next one, never today
+            return today + timedelta(days=(index - today.weekday() - 1) % 7 + 1)
+    for fmt in ('%Y-%m-%d', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt).astimezone()
+        except ValueError:
+            continue
+    return parse_taskwarrior_date(value.upper())
+
+def priority_values():
+    """The priorities `task import` accepts (uda.priority.values), or None if they cannot be read"""
+    try:
+        values = report_definitions.config().get('uda.priority.values', 'H,M,L,')
+    except Exception as e:
+        logger.warning('Could not read priority values, capturing without checking them: %s', e)
+        return None
+    return [value.strip() for value in values.split(',') if value.strip()]
+
+def parse_add_line(line, now, priorities=None):
+    """Turn one line of `task add` syntax into an import record; raises ValueError
+    
+    priorities, when given, lists the accepted priority values; any other
+    value would make the whole `task import` fail.
+    """
+    task = {'status': 'pending'}
+    tags = []
+    words = []
+    for word in line.split():
+        name, sep, value = word.partition(':')
+        attribute = ADD_ATTRIBUTES.get(name.lower()) if sep else None
+        if word.startswith('+') and len(word) > 1:
+            tags.append(word[1:])
+        elif attribute is None:
+            words.append(word)
+        elif not value:
+            raise ValueError(f"Missing value for {name}:")
+        elif attribute == 'due':
+            due = parse_add_date(value, now)
+            if due is None:
+                raise ValueError(f"Unsupported due date '{value}'; use YYYY-MM-DD, today, tomorrow, a weekday, eow, eom or eoy")
+            task['due'] = due.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        elif attribute == 'estimate' and (len(value) > ESTIMATE_MAX_LENGTH or not ESTIMATE_RE.match(value)):
+            raise ValueError(f"Invalid estimate '{value}'; use e.g. 30m, 1h30m or PT45M")
+        elif attribute == 'priority' and priorities is not None and value not in priorities:
+            raise ValueError(f"Invalid priority '{value}'; use one of {', '.join(priorities)}")
+        else:
+            task[attribute] = value
+    if not words:
+        raise ValueError('Missing description')
+    
+    stamp = now.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    task.update(uuid=str(uuid4()), description=' '.join(words), entry=stamp, modified=stamp)
+    if tags:
+        task['tags'] = sorted(set(tags))
+    return task
+
+@app.route('/capture/bulk', methods=['POST'])
+def capture_tasks_bulk():
+    """Capture many tasks, one per line of `task add` syntax, with a single `task import`
+    
+    Accepts {"text": "..."} (or a form field "text") or {"lines": [...]}.
+    Blank lines and lines starting with # are skipped. Lines that do not
+    parse are reported with their line number; the rest are imported.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        lines = data.get('lines')
+        if lines is None:
+            lines = (data.get('text') or request.form.get('text') or '').splitlines()
+        if not isinstance(lines, list) or not all(isinstance(line, str) for line in lines):
+            return jsonify({'error': 'lines must be a list of strings', 'status': 'error'}), 400
+        # Checked before parsing so an oversized body costs nothing
+        if len(lines) > app.config['BATCH_MAX_OPERATIONS']:
+            return jsonify({'error': f"At most {app.config['BATCH_MAX_OPERATIONS']} lines per capture",
+                            'status': 'error'}), 400
+        
+        now = datetime.now().astimezone()
+        priorities = priority_values()
+        tasks, created, errors = [], [], []
+        for number, line in enumerate(lines, start=1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            try:
+                task = parse_add_line(line, now, priorities)
+            except ValueError as e:
+                errors.append({'line': number, 'text': line, 'error': str(e)})
+                continue
+            tasks.append(task)
+            created.append({'line': number, 'uuid': task['uuid'], 'description': task['description']})
+        
+        if not tasks:
+            return jsonify({'created': [], 'errors': errors,
+                            'status': 'failed' if errors else 'success'}), 400 if errors else 200
+        
+        logger.debug('Bulk capturing tasks=%d rejected=%d', len(tasks), len(errors))
+        result = run_task_command(BULK_RC_OVERRIDES + ['import', '-'], input=json.dumps(tasks))
+        
+        if result.returncode != 0:
+            error_msg = f"TaskWarrior import failed: {result.stderr.strip()}"
+            logger.warning('%s', error_msg)
+            return jsonify({'error': error_msg, 'created': [], 'errors': errors, 'status': 'failed'}), 500
+        
+        invalidate_task_caches([task['uuid'] for task in tasks])
+        logger.info('Bulk captured tasks=%d', len(tasks))
+        
+        return jsonify({'created': created, 'errors': errors,
+                        'status': 'partial' if errors else 'success'}), 200
+        
+    except TimeoutError as e:
+        error_msg = f"TaskWarrior timeout: {str(e)}"
+        logger.warning('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'timeout'}), 408
+    except Exception as e:
+        error_msg = f"Error capturing tasks: {str(e)}"
+        logger.exception('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'failed'}), 500
+
+# Completion windows shown on the stats page, widest last
+STATS_WINDOWS = ('today', 'week', 'month')
+
+def parse_taskwarrior_date(value):
+    """Parse an export date such as 20251017T101500Z into an aware UTC datetime"""
+    try:
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+def get_window_starts(now=None):
+    """Local start of today, this week (Monday) and this month"""
+    now = now or datetime.now().astimezone()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'today': today,
+        'week': today - timedelta(days=today.weekday()),
+        'month': today.replace(day=1),
+    }
+
+def completed_cache_key(start):
+    return f"__completed__:{start.strftime('%Y-%m-%dT%H:%M:%S')}"
+
+def get_completed_since(start, refresh=False):
+    """Export tasks completed after start with one cached `task ... export` call"""
+    since = start.strftime('%Y-%m-%dT%H:%M:%S')
+    return get_cached_export(completed_cache_key(start),
+                             ['status:completed', f'end.after:{since}', 'export'], refresh)
+
+def format_duration(total_seconds):
+    """Convert seconds to the stats page format (e.g. 1h 30m, 45m, 0m)"""
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    
+    if hours > 0:
+        return f"{hours}h {minutes}m"
+    elif minutes > 0:
+        return f"{minutes}m"
+    return "0m"
+
+def compute_report_stats(report_name, completed_tasks=None, now=None, pending_tasks=None):
+    """Compute every stats page number in one pass over structured exports
+    
+    Pending figures come from the (cached) report export. Completion counts
+    for all windows come from a single export of tasks completed since the
+    earliest window start; pass completed_tasks (or pending_tasks) to reuse
+    an export you already have.
+    """
+    if pending_tasks is None:
+        pending_tasks = get_tasks_from_report(report_name)
+    starts = get_window_starts(now)
+    
+    if completed_tasks is None:
+        try:
+            completed_tasks = get_completed_since(min(starts.values()))
+        except Exception as e:
+            logger.error('Error getting completed tasks: %s', e)
+            completed_tasks = []
+    
+    total_estimate_seconds = 0
+    by_tag = {}
+    by_project = {}
+    for task in pending_tasks:
+        seconds = convert_taskwarrior_estimate_to_seconds(task.get('estimate', ''))
+        total_estimate_seconds += seconds
+        for tag in task.get('tags') or ['(none)']:
+            bucket = by_tag.setdefault(tag, {'count': 0, 'seconds': 0})
+            bucket['count'] += 1
+            bucket['seconds'] += seconds
+        bucket = by_project.setdefault(task.get('project') or '(none)', {'count': 0, 'seconds': 0})
+        bucket['count'] += 1
+        bucket['seconds'] += seconds
+    
+    completed = {window: 0 for window in STATS_WINDOWS}
+    for task in completed_tasks:
+        end = parse_taskwarrior_date(task.get('end'))
+        if end is None:
+            continue
+        for window in STATS_WINDOWS:
+            if end >= starts[window]:
+                completed[window] += 1
+    
+    def totals(buckets):
+        return [{'name': name, 'count': bucket['count'], 'seconds': bucket['seconds'],
+                 'estimate': format_duration(bucket['seconds'])}
+                for name, bucket in sorted(buckets.items(), key=lambda item: (-item[1]['seconds'], item[0]))]
+    
+    return {
+        'report': report_name,
+        'pending_count': len(pending_tasks),
+        'total_estimate_seconds': total_estimate_seconds,
+        'total_estimate': format_duration(total_estimate_seconds),
+        'completed': completed,
+        'by_tag': totals(by_tag),
+        'by_project': totals(by_project),
+    }
+
 @app.route('/stats')
 def show_stats():
     """Display statistics for the current report"""
     # Get report name from query string (default to 'next')
     report_name = request.args.get('report', default='next')
-    print(f"DEBUG: Showing stats for report: {report_name}")
+    logger.debug('Showing stats report=%s', report_name)
     
     try:
-        # Get current pending tasks from the report
-        pending_tasks = get_tasks_from_report(report_name)
-        pending_count = len(pending_tasks)
-        
-        # Calculate sum of time estimates for pending tasks
-        total_estimate_seconds = sum(
-            convert_taskwarrior_estimate_to_seconds(task.get('estimate', ''))
-            for task in pending_tasks
-        )
-        
-        # Get tasks completed today
-        completed_today = 0
-        try:
-            # Query for tasks completed today
-            completed_result = run_task_command(['completed', 'end:today'])
-            
-            if completed_result.returncode == 0 and completed_result.stdout.strip():
-                # Count actual task entries by looking for lines that start with " - " (completed task indicator)
-                output_lines = completed_result.stdout.strip().split('\n')
-                task_lines = [line for line in output_lines if line.strip().startswith('- ')]
-                completed_today = len(task_lines)
-        except Exception as e:
-            print(f"DEBUG: Error getting completed tasks: {e}")
-            completed_today = 0
-        
-        # Convert total seconds to human readable format
-        hours = total_estimate_seconds // 3600
-        minutes = (total_estimate_seconds % 3600) // 60
-        
-        if hours > 0:
-            time_estimate_display = f"{hours}h {minutes}m"
-        elif minutes > 0:
-            time_estimate_display = f"{minutes}m"
-        else:
-            time_estimate_display = "0m"
+        stats = compute_report_stats(report_name)
         
         # Capitalize first letter of report name for display
         report_display = report_name.capitalize()
         
         return render_template('stats.html',
                              report_name=report_display,
-                             pending_count=pending_count,
-                             completed_today=completed_today,
-                             time_estimate=time_estimate_display,
+                             pending_count=stats['pending_count'],
+                             completed_today=stats['completed']['today'],
+                             completed_week=stats['completed']['week'],
+                             completed_month=stats['completed']['month'],
+                             time_estimate=stats['total_estimate'],
+                             tag_totals=stats['by_tag'],
+                             project_totals=stats['by_project'],
                              current_report=report_name)
         
     except Exception as e:
         error_msg = f"Error generating stats: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return f"""
         <html>
         <head><title>OneTask - Stats Error</title></head>
@@ -395,6 +2993,266 @@ def show_stats():
         </html>
         """, 500
 
+@app.route('/api/stats')
+def get_stats_json():
+    """Report statistics as JSON"""
+    report_name = request.args.get('report', default='next')
+    
+    try:
+        return jsonify({'stats': compute_report_stats(report_name), 'status': 'success'})
+    except TimeoutError as e:
+        error_msg = f"TaskWarrior timeout: {str(e)}"
+        logger.warning('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'timeout'}), 408
+    except Exception as e:
+        error_msg = f"Error generating stats: {str(e)}"
+        logger.exception('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'error'}), 500
+
+# Waits on the exports of one dashboard; the exports themselves still run on the executor's read pool
+dashboard_pool = ThreadPoolExecutor(max_workers=app.config['TASK_READ_CONCURRENCY'], thread_name_prefix='dashboard')
+
+def parse_dashboard_reports(value):
+    """Split ?reports=next,focus into unique report names, raising ValueError if there are too many"""
+    names = list(dict.fromkeys(name.strip() for name in (value or app.config['DASHBOARD_REPORTS']).split(',')
+                               if name.strip()))
+    if not names:
+        raise ValueError('No reports given')
+    if len(names) > app.config['DASHBOARD_MAX_REPORTS']:
+        raise ValueError(f"At most {app.config['DASHBOARD_MAX_REPORTS']} reports can be shown at once")
+    return names
+
+def build_dashboard(report_names, limit, now=None):
+    """Export every report and the completed tasks at once, and build one panel per report
+    
+    All exports are started together, so the dashboard takes about as long
+    as its slowest report. The completed-task export is shared by every
+    panel's stats. A report that fails or times out gets an error panel
+    instead of failing the whole dashboard.
+    """
+    now = now or datetime.now().astimezone()
+    tenant = current_tenant()
+    completed = dashboard_pool.submit(tenant.run, get_completed_since, min(get_window_starts(now).values()))
+    exports = [(name, dashboard_pool.submit(tenant.run, get_report_tasks, name)) for name in report_names]
+    
+    try:
+        completed_tasks = completed.result()
+    except Exception as e:
+        logger.error('Error getting completed tasks: %s', e)
+        completed_tasks = []
+    
+    panels = []
+    for name, future in exports:
+        try:
+            tasks, stale_since = future.result()
+        except TimeoutError as e:
+            logger.warning('Dashboard report=%s timed out: %s', name, e)
+            panels.append({'report': name, 'error': f"TaskWarrior timeout: {str(e)}", 'status': 'timeout'})
+            continue
+        except Exception as e:
+            logger.error('Dashboard report=%s failed: %s', name, e)
+            panels.append({'report': name, 'error': f"Error exporting report: {str(e)}", 'status': 'error'})
+            continue
+        version, rows, order = report_versions.observe(name, tasks)
+        panels.append({
+            'report': name,
+            'version': version,
+            'stale_since': stale_since,
+            'count': len(order),
+            'tasks': [rows[uuid] for uuid in order[:limit]],
+            'stats': compute_report_stats(name, completed_tasks, now, pending_tasks=tasks),
+            'status': 'success',
+        })
+    return panels
+
+def dashboard_args():
+    """(report names, task limit) from the query string"""
+    limit = request.args.get('limit', default=app.config['DASHBOARD_TASKS'], type=int)
+    return parse_dashboard_reports(request.args.get('reports')), max(0, min(limit, app.config['REPORT_PAGE_MAX']))
+
+@app.route('/dashboard')
+def show_dashboard():
+    """Display several reports and their stats side by side"""
+    try:
+        report_names, limit = dashboard_args()
+    except ValueError as e:
+        return f"Invalid dashboard: {escape(str(e))}", 400
+    
+    now = datetime.now().astimezone()
+    panels = build_dashboard(report_names, limit, now)
+    for panel in panels:
+        if panel.get('stale_since'):
+            panel['stale_since'] = datetime.fromtimestamp(panel['stale_since']).strftime('%Y-%m-%d %H:%M')
+    response = Response(render_template('dashboard.html', panels=panels, now_stamp=to_task_stamp(now),
+                                        refresh=app.config['DASHBOARD_REFRESH']), mimetype='text/html')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/dashboard')
+def get_dashboard_json():
+    """Several reports with their top tasks and stats in one response"""
+    try:
+        report_names, limit = dashboard_args()
+    except ValueError as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 400
+    
+    panels = build_dashboard(report_names, limit)
+    failed = sum(1 for panel in panels if panel['status'] != 'success')
+    return jsonify({'panels': panels, 'succeeded': len(panels) - failed, 'failed': failed,
+                    'status': 'partial' if failed else 'success'})
+
+def wait_for_report_change(report_name, since, timeout):
+    """Block until the report differs from version since (or timeout); returns the current version"""
+    deadline = time.monotonic() + timeout
+    while True:
+        # Unlike get_tasks_from_report(), errors propagate so a failed export is never sent as an empty report
+        tasks = export_report(report_name)
+        version, _, _ = report_versions.observe(report_name, tasks)
+        remaining = deadline - time.monotonic()
+        if version != since or remaining <= 0:
+            return version
+        # Mutations wake us immediately; outside edits are caught by the next poll
+        with task_data_changed:
+            task_data_changed.wait(min(remaining, app.config['EVENTS_POLL_INTERVAL']))
+
+@app.route('/events')
+def report_events():
+    """Stream report deltas (SSE) or long-poll for the next one
+    
+    Clients pass the version they have via ?since= (or the Last-Event-ID
+    header on SSE reconnects) and receive only rows added, changed or
+    removed after it, plus the current order of UUIDs.
+    """
+    report_name = request.args.get('report', default='next')
+    # EventSource reconnects resend the original URL, so Last-Event-ID is the fresher cursor
+    since = request.headers.get('Last-Event-ID') or request.args.get('since', default='')
+    since = int(since) if str(since).isdigit() else None
+    
+    if 'text/event-stream' not in request.headers.get('Accept', ''):
+        try:
+            timeout = float(request.args.get('timeout', 25))
+        except ValueError:
+            timeout = math.nan
+        # NaN fails this comparison too
+        if not timeout >= 0:
+            return jsonify({'error': 'timeout must be a non-negative number of seconds', 'status': 'error'}), 400
+        try:
+            version = wait_for_report_change(report_name, since, min(timeout, app.config['EVENTS_MAX_DURATION']))
+            if version == since:
+                return jsonify({'version': version, 'changed': False, 'status': 'success'})
+            return jsonify(dict(report_versions.delta(report_name, since), changed=True, status='success'))
+        except Exception as e:
+            error_msg = f"Error waiting for report changes: {str(e)}"
+            logger.exception('%s', error_msg)
+            return jsonify({'error': error_msg, 'status': 'error'}), 500
+    
+    def stream():
+        client_version = since
+        started = time.monotonic()
+        while time.monotonic() - started < app.config['EVENTS_MAX_DURATION']:
+            try:
+                version = wait_for_report_change(report_name, client_version, app.config['EVENTS_HEARTBEAT'])
+            except Exception as e:
+                logger.error('Error in event stream report=%s: %s', report_name, e)
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                return
+            if version == client_version:
+                yield ': keepalive\n\n'
+                continue
+            delta = report_versions.delta(report_name, client_version)
+            client_version = delta['version']
+            yield f"id: {delta['version']}\nevent: delta\ndata: {json.dumps(delta)}\n\n"
+    
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def encode_report_cursor(offset, last_uuid):
+    """Opaque cursor pointing just after last_uuid (at position offset)"""
+    raw = json.dumps({'o': offset, 'u': last_uuid}, separators=(',', ':')).encode()
+    return urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_report_cursor(cursor):
+    """Return (offset, last_uuid) from a cursor; raises ValueError if malformed"""
+    try:
+        data = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return int(data['o']), str(data.get('u') or '')
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def get_report_page(report_name, offset, last_uuid, limit):
+    """Return (tasks, has_more) for one page of a report
+    
+    Pages resume right after the last task of the previous page when that
+    task is still in the report, so tasks added or removed earlier in the
+    list do not cause skips or repeats; otherwise they fall back to the
+    offset. Cached exports are sliced directly; otherwise the export is
+    parsed incrementally and stopped as soon as the page is full.
+    """
+    cached = report_cache.get(report_name)
+    if cached is not None:
+        start = offset
+        if last_uuid:
+            start = next((i + 1 for i, task in enumerate(cached) if task.get('uuid') == last_uuid), offset)
+        return cached[start:start + limit], len(cached) > start + limit
+    
+    by_offset = []
+    after_uuid = None
+    stream = task_executor.stream(['export', report_name])
+    try:
+        for index, task in enumerate(stream):
+            if after_uuid is not None:
+                after_uuid.append(task)
+                if len(after_uuid) > limit:
+                    break
+            elif last_uuid and task.get('uuid') == last_uuid:
+                after_uuid = []
+            if index >= offset and len(by_offset) <= limit:
+                by_offset.append(task)
+                if not last_uuid and len(by_offset) > limit:
+                    break
+    finally:
+        stream.close()
+    
+    page = after_uuid if after_uuid is not None else by_offset
+    return page[:limit], len(page) > limit
+
+@app.route('/api/report/<report_name>')
+def get_report_api(report_name):
+    """Cursor-paginated JSON or streamed NDJSON export of a report"""
+    try:
+        wants_ndjson = (request.args.get('format') == 'ndjson' or
+                        'application/x-ndjson' in request.headers.get('Accept', ''))
+        
+        if wants_ndjson:
+            def stream():
+                for task in task_executor.stream(['export', report_name]):
+                    yield json.dumps(task) + '\n'
+            return Response(stream_with_context(stream()), mimetype='application/x-ndjson')
+        
+        limit = request.args.get('limit', default=app.config['REPORT_PAGE_SIZE'], type=int)
+        limit = max(1, min(limit, app.config['REPORT_PAGE_MAX']))
+        cursor = request.args.get('cursor')
+        offset, last_uuid = decode_report_cursor(cursor) if cursor else (0, '')
+        
+        tasks, has_more = get_report_page(report_name, offset, last_uuid, limit)
+        next_cursor = None
+        if has_more and tasks:
+            next_cursor = encode_report_cursor(offset + len(tasks), tasks[-1].get('uuid', ''))
+        
+        return jsonify({'report': report_name, 'tasks': tasks, 'count': len(tasks),
+                        'next_cursor': next_cursor, 'status': 'success'})
+        
+    except ValueError as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 400
+    except TimeoutError as e:
+        error_msg = f"TaskWarrior timeout: {str(e)}"
+        logger.warning('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'timeout'}), 408
+    except Exception as e:
+        error_msg = f"Error exporting report: {str(e)}"
+        logger.exception('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'error'}), 500
+
 @app.errorhandler(500)
 def internal_error(error):
     return f"""
@@ -438,23 +3296,18 @@ def get_task_annotations(task_id):
     """Get all annotations for a specific task"""
     try:
         # Get task details including annotations
-        result = run_task_command([str(task_id), 'export'])
-        
-        if result.returncode != 0:
-            return jsonify({'error': 'Task not found', 'status': 'error'}), 404
+        task = export_single_task(task_id)
         
-        task_data = json.loads(result.stdout)
-        if not task_data:
+        if task is None:
             return jsonify({'error': 'Task not found', 'status': 'error'}), 404
         
-        task = task_data[0]
         annotations = task.get('annotations', [])
         
         return jsonify({'annotations': annotations, 'status': 'success'})
         
     except Exception as e:
         error_msg = f"Error getting annotations: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
 @app.route('/task/<task_id>/annotations', methods=['POST'])
@@ -465,6 +3318,10 @@ def add_task_annotation(task_id):
         if not annotation_text:
             return jsonify({'error': 'Annotation text required', 'status': 'error'}), 400
         
+        conflict = find_conflict(task_id, request.json.get('expected_modified'))
+        if conflict is not None:
+            return jsonify(conflict_result(task_id, conflict)), 409
+        
         # Add annotation via TaskWarrior
         result = run_task_command([str(task_id), 'annotate', annotation_text])
         
@@ -472,11 +3329,13 @@ def add_task_annotation(task_id):
             error_msg = f"TaskWarrior annotate failed: {result.stderr}"
             return jsonify({'error': error_msg, 'status': 'error'}), 500
         
-        return jsonify({'status': 'success', 'message': 'Annotation added successfully'})
+        invalidate_task_caches([task_id])
+        return jsonify({'status': 'success', 'message': 'Annotation added successfully',
+                        'modified': current_modified(task_id)})
         
     except Exception as e:
         error_msg = f"Error adding annotation: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
 @app.route('/task/<task_id>/annotations/<annotation_text>', methods=['DELETE'])
@@ -488,45 +3347,46 @@ def delete_task_annotation(task_id, annotation_text):
         from urllib.parse import unquote
         decoded_text = unquote(annotation_text)
         
-        print(f"DEBUG: Attempting to delete annotation: '{decoded_text}' from task {task_id}")
+        logger.debug('Deleting annotation task_id=%s text=%r', task_id, decoded_text)
+        
+        conflict = find_conflict(task_id, request.args.get('expected_modified'))
+        if conflict is not None:
+            return jsonify(conflict_result(task_id, conflict)), 409
         
         result = run_task_command([str(task_id), 'denotate', decoded_text])
         
         if result.returncode != 0:
             error_msg = f"TaskWarrior denotate failed: {result.stderr.strip()}"
-            print(f"DEBUG: {error_msg}")
-            print(f"DEBUG: TaskWarrior stdout: {result.stdout.strip()}")
+            logger.warning('%s', error_msg)
+            logger.debug('task output: %s', result.stdout)
             return jsonify({'error': error_msg, 'status': 'error'}), 500
         
-        print(f"DEBUG: Successfully deleted annotation from task {task_id}")
-        return jsonify({'status': 'success', 'message': 'Annotation deleted successfully'})
+        invalidate_task_caches([task_id])
+        logger.info('Deleted annotation task_id=%s', task_id)
+        return jsonify({'status': 'success', 'message': 'Annotation deleted successfully',
+                        'modified': current_modified(task_id)})
         
     except Exception as e:
         error_msg = f"Error deleting annotation: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
 @app.route('/task/<task_id>/due', methods=['GET'])
 def get_task_due_date(task_id):
     """Get due date for a specific task"""
     try:
-        result = run_task_command([str(task_id), 'export'])
-        
-        if result.returncode != 0:
-            return jsonify({'error': 'Task not found', 'status': 'error'}), 404
+        task = export_single_task(task_id)
         
-        task_data = json.loads(result.stdout)
-        if not task_data:
+        if task is None:
             return jsonify({'error': 'Task not found', 'status': 'error'}), 404
         
-        task = task_data[0]
         due_date = task.get('due', None)
         
         return jsonify({'due_date': due_date, 'status': 'success'})
         
     except Exception as e:
         error_msg = f"Error getting due date: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
 @app.route('/task/<task_id>/due', methods=['POST'])
@@ -537,6 +3397,14 @@ def set_task_due_date(task_id):
         if not due_date:
             return jsonify({'error': 'Due date required', 'status': 'error'}), 400
         
+        conflict = find_conflict(task_id, request.json.get('expected_modified'))
+        if conflict is not None:
+            return jsonify(conflict_result(task_id, conflict)), 409
+        
+        if app.config['WRITE_BEHIND']:
+            write_behind_queue.enqueue({'action': 'set_due', 'task_id': str(task_id), 'due_date': due_date})
+            return jsonify({'status': 'success', 'queued': True, 'message': 'Due date update queued'})
+        
         # Set due date via TaskWarrior
         result = run_task_command([str(task_id), 'modify', f'due:{due_date}'])
         
@@ -544,17 +3412,27 @@ def set_task_due_date(task_id):
             error_msg = f"TaskWarrior modify due failed: {result.stderr}"
             return jsonify({'error': error_msg, 'status': 'error'}), 500
         
-        return jsonify({'status': 'success', 'message': 'Due date updated successfully'})
+        invalidate_task_caches([task_id])
+        return jsonify({'status': 'success', 'message': 'Due date updated successfully',
+                        'modified': current_modified(task_id)})
         
     except Exception as e:
         error_msg = f"Error setting due date: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
 @app.route('/task/<task_id>/due', methods=['DELETE'])
 def remove_task_due_date(task_id):
     """Remove due date from a task"""
     try:
+        conflict = find_conflict(task_id, request.args.get('expected_modified'))
+        if conflict is not None:
+            return jsonify(conflict_result(task_id, conflict)), 409
+        
+        if app.config['WRITE_BEHIND']:
+            write_behind_queue.enqueue({'action': 'remove_due', 'task_id': str(task_id)})
+            return jsonify({'status': 'success', 'queued': True, 'message': 'Due date removal queued'})
+        
         # Remove due date by setting it to empty
         result = run_task_command([str(task_id), 'modify', 'due:'])
         
@@ -562,29 +3440,29 @@ def remove_task_due_date(task_id):
             error_msg = f"TaskWarrior modify due failed: {result.stderr}"
             return jsonify({'error': error_msg, 'status': 'error'}), 500
         
-        return jsonify({'status': 'success', 'message': 'Due date removed successfully'})
+        invalidate_task_caches([task_id])
+        return jsonify({'status': 'success', 'message': 'Due date removed successfully',
+                        'modified': current_modified(task_id)})
         
     except Exception as e:
         error_msg = f"Error removing due date: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
+@app.route('/tasks/by-tag', methods=['GET'])
 @app.route('/tasks/by-tag/<tag>', methods=['GET'])
-def get_tasks_by_tag(tag):
-    """Get all tasks with a specific tag"""
+def get_tasks_by_tag(tag=None):
+    """Get all tasks with a tag, or with all/any of ?tags=a,b (match=all|any)"""
     try:
-        # Query TaskWarrior for tasks with specific tag
-        # Correct syntax: task tag:tagname export
-        result = run_task_command([f'tag:{tag}', 'export'])
-        
-        if result.returncode != 0:
-            error_msg = f"TaskWarrior tag query failed: {result.stderr}"
-            return jsonify({'error': error_msg, 'status': 'error'}), 500
+        tags = [tag] if tag else [t.strip() for t in request.args.get('tags', '').split(',') if t.strip()]
+        match = request.args.get('match', 'all')
         
-        if not result.stdout.strip():
-            return jsonify({'tasks': [], 'status': 'success'})
+        if not tags:
+            return jsonify({'error': 'At least one tag is required', 'status': 'error'}), 400
+        if match not in ('all', 'any'):
+            return jsonify({'error': "match must be 'all' or 'any'", 'status': 'error'}), 400
         
-        tasks_data = json.loads(result.stdout)
+        tasks_data = get_tagged_tasks(tags, match_all=(match == 'all'))
         
         # Format tasks for display in modal
         tasks = []
@@ -592,16 +3470,1162 @@ def get_tasks_by_tag(tag):
             tasks.append({
                 'description': task.get('description', 'No description'),
                 'uuid': task.get('uuid', ''),
-                'short_id': task.get('uuid', '')[:8] if task.get('uuid') else 'unknown'
+                'short_id': task.get('uuid', '')[:8] if task.get('uuid') else 'unknown',
+                'status': task.get('status', '')
             })
         
-        return jsonify({'tasks': tasks, 'tag': tag, 'status': 'success'})
+        response = {'tasks': tasks, 'status': 'success'}
+        if tag:
+            response['tag'] = tag
+        else:
+            response.update({'tags': tags, 'match': match})
+        return jsonify(response)
         
     except Exception as e:
         error_msg = f"Error getting tasks by tag: {str(e)}"
-        print(f"DEBUG: {error_msg}")
+        logger.exception('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'error'}), 500
+
+@app.route('/tags', methods=['GET'])
+def list_tags():
+    """Every tag with its task count and the open count and estimate behind it"""
+    try:
+        totals = task_store.tag_totals()
+        if totals is None:
+            load_all_tasks()
+            totals = task_store.tag_totals()
+        if totals is None:
+            raise Exception("Task data changed while loading the tag index")
+        
+        tags = [{
+            'tag': tag,
+            'count': open_count,
+            'total': total,
+            'estimate_seconds': seconds,
+            'estimate': format_duration(seconds),
+        } for tag, (total, open_count, seconds) in totals.items()]
+        tags.sort(key=lambda entry: (-entry['count'], entry['tag']))
+        
+        return jsonify({'tags': tags, 'status': 'success'})
+        
+    except Exception as e:
+        error_msg = f"Error listing tags: {str(e)}"
+        logger.exception('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'error'}), 500
+
+# Result cap for /search; type-ahead only needs the first screenful
+SEARCH_MAX_LIMIT = 100
+
+@app.route('/search', methods=['GET'])
+def search():
+    """Find tasks whose description or annotations contain words starting with each query word"""
+    try:
+        words = tokenize_search_text(request.args.get('q', ''))
+        include_closed = request.args.get('status', 'open') == 'all'
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), SEARCH_MAX_LIMIT)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer', 'status': 'error'}), 400
+        
+        if not words:
+            return jsonify({'query': request.args.get('q', ''), 'tasks': [], 'total': 0, 'status': 'success'})
+        
+        matches = search_tasks(words)
+        if not include_closed:
+            matches = [task for task in matches if task.get('status') in OPEN_STATUSES]
+        
+        tasks = [{
+            'description': task.get('description', 'No description'),
+            'uuid': task.get('uuid', ''),
+            'short_id': task.get('uuid', '')[:8],
+            'status': task.get('status', ''),
+            'annotations': [a.get('description', '') for a in task.get('annotations') or []],
+        } for task in heapq.nsmallest(limit, matches, key=index_result_order)]
+        
+        return jsonify({'query': request.args.get('q', ''), 'tasks': tasks, 'total': len(matches), 'status': 'success'})
+        
+    except Exception as e:
+        error_msg = f"Error searching tasks: {str(e)}"
+        logger.exception('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'error'}), 500
+
+# Batch actions and the TaskWarrior arguments each one runs after the task filter
+BATCH_ACTIONS = {
+    'complete': lambda op: ['done'],
+    'uncomplete': lambda op: ['modify', 'status:pending'],
+    'set_due': lambda op: ['modify', f"due:{op['due_date']}"],
+    'remove_due': lambda op: ['modify', 'due:'],
+}
+
+# Working set IDs or (possibly shortened) UUIDs; anything else could be a filter expression
+TASK_ID_RE = re.compile(r'^(\d+|[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){0,3}(-[0-9a-fA-F]{12})?)$')
+
+# Disable confirmation prompts so one invocation can change many tasks
+BULK_RC_OVERRIDES = ['rc.confirmation=off', 'rc.bulk=0']
+
+CHANGED_COUNT_RE = re.compile(r'^(?:Completed|Modified) (\d+) tasks?\.', re.MULTILINE)
+
+def parse_changed_count(output):
+    """Return the task count from TaskWarrior's "Completed/Modified N tasks." summary"""
+    match = CHANGED_COUNT_RE.search(output or '')
+    return int(match.group(1)) if match else None
+
+def export_tasks_by_ids(task_ids):
+    """Export the tasks matching a list of IDs/UUIDs in one call"""
+    result = run_task_command(list(task_ids) + ['export'])
+    if result.returncode != 0 or not result.stdout.strip():
+        return []
+    return parse_task_json(result.stdout, 'refresh')
+
+def validate_batch_operation(op):
+    """Return an error message for a malformed batch operation, or None"""
+    if not isinstance(op, dict):
+        return 'Operation must be an object'
+    if op.get('action') not in BATCH_ACTIONS:
+        return f"Unknown action: {op.get('action')}"
+    if not TASK_ID_RE.match(str(op.get('task_id', ''))):
+        return 'Invalid task ID'
+    if op['action'] == 'set_due' and not str(op.get('due_date') or '').strip():
+        return 'Due date required'
+    if op.get('expected_modified') is not None and not isinstance(op['expected_modified'], str):
+        return 'expected_modified must be a timestamp string'
+    return None
+
+def apply_batch_operations(operations):
+    """Apply operations with as few `task` invocations as possible
+    
+    Operations are split into rounds in which every task appears once, so
+    actions on the same task still run in request order. Within a round,
+    operations that produce identical TaskWarrior arguments share one
+    invocation (`task <uuid> <uuid> ... done`). When TaskWarrior reports fewer
+    changed tasks than requested, one export of the group shows which IDs did
+    not match anything.
+    """
+    results = [None] * len(operations)
+    rounds = []
+    for index, op in enumerate(operations):
+        for round_ops in rounds:
+            if op['task_id'] not in round_ops:
+                round_ops[op['task_id']] = index
+                break
+        else:
+            rounds.append({op['task_id']: index})
+    
+    for round_ops in rounds:
+        groups = OrderedDict()
+        for task_id, index in round_ops.items():
+            command = tuple(BATCH_ACTIONS[operations[index]['action']](operations[index]))
+            groups.setdefault(command, []).append(index)
+        
+        for command, indexes in groups.items():
+            task_ids = [str(operations[i]['task_id']) for i in indexes]
+            result = run_task_command(BULK_RC_OVERRIDES + task_ids + list(command))
+            
+            if result.returncode != 0:
+                for i in indexes:
+                    results[i] = (result.returncode, result.stderr.strip())
+                continue
+            
+            # A filter that matches only some of the IDs still exits 0, so compare the summary count
+            changed = parse_changed_count(result.stdout)
+            if changed is None or changed >= len(indexes):
+                for i in indexes:
+                    results[i] = (0, '')
+                continue
+            
+            # Re-running the command could double-apply it; look up which tasks exist instead
+            found = export_tasks_by_ids(task_ids)
+            for i in indexes:
+                task_id = str(operations[i]['task_id']).lower()
+                exists = any(task.get('uuid', '').startswith(task_id) or str(task.get('id')) == task_id
+                             for task in found)
+                results[i] = (0, '') if exists else (1, 'No matching task')
+    
+    return [
+        {'task_id': op['task_id'], 'action': op['action'], 'status': 'success'}
+        if returncode == 0 else
+        {'task_id': op['task_id'], 'action': op['action'], 'status': 'error',
+         'error': f"TaskWarrior {op['action']} failed: {stderr}"}
+        for op, (returncode, stderr) in zip(operations, results)
+    ]
+
+@app.route('/tasks/batch', methods=['POST'])
+def batch_update_tasks():
+    """Apply many complete/uncomplete/due changes in as few TaskWarrior calls as possible"""
+    try:
+        operations = (request.json or {}).get('operations')
+        
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'No operations provided', 'status': 'error'}), 400
+        
+        if len(operations) > app.config['BATCH_MAX_OPERATIONS']:
+            error_msg = f"Too many operations (limit {app.config['BATCH_MAX_OPERATIONS']})"
+            return jsonify({'error': error_msg, 'status': 'error'}), 400
+        
+        for position, op in enumerate(operations):
+            error = validate_batch_operation(op)
+            if error:
+                return jsonify({'error': f"Operation {position}: {error}", 'status': 'error'}), 400
+        
+        # Every expected_modified is checked against the tasks as they were before this batch
+        results = [None] * len(operations)
+        for position, op in enumerate(operations):
+            conflict = find_conflict(op['task_id'], op.get('expected_modified'))
+            if conflict is not None:
+                results[position] = dict(conflict_result(op['task_id'], conflict), action=op['action'])
+        accepted = [position for position, result in enumerate(results) if result is None]
+        
+        if app.config['WRITE_BEHIND']:
+            for position in accepted:
+                op = {key: value for key, value in operations[position].items() if key != 'expected_modified'}
+                write_behind_queue.enqueue(op)
+                results[position] = {'task_id': op['task_id'], 'action': op['action'], 'status': 'success',
+                                     'queued': True}
+        elif accepted:
+            logger.debug('Applying batch operations=%d', len(accepted))
+            applied = apply_batch_operations([operations[position] for position in accepted])
+            for position, result in zip(accepted, applied):
+                results[position] = result
+            changed = list(dict.fromkeys(result['task_id'] for result in applied if result['status'] == 'success'))
+            if changed:
+                invalidate_task_caches(changed)
+                for result in applied:
+                    if result['status'] == 'success':
+                        result['modified'] = current_modified(result['task_id'])
+        
+        succeeded = sum(1 for result in results if result['status'] == 'success')
+        if app.config['WRITE_BEHIND'] and succeeded == len(results):
+            return jsonify({'results': results, 'succeeded': succeeded, 'failed': 0,
+                            'queued': True, 'status': 'success'})
+        
+        return jsonify({
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'status': 'success' if succeeded == len(results) else 'partial'
+        })
+        
+    except TimeoutError as e:
+        error_msg = f"TaskWarrior timeout: {str(e)}"
+        logger.warning('%s', error_msg)
+        return jsonify({'error': error_msg, 'status': 'timeout'}), 408
+    except Exception as e:
+        error_msg = f"Error applying batch: {str(e)}"
+        logger.exception('%s', error_msg)
         return jsonify({'error': error_msg, 'status': 'error'}), 500
 
+# Pairs of queued actions on the same task that undo each other
+OPPOSITE_ACTIONS = {'complete': 'uncomplete', 'uncomplete': 'complete'}
+DUE_ACTIONS = ('set_due', 'remove_due')
+
+class WriteBehindQueue:
+    """Durable queue of task mutations applied in order by a background worker
+    
+    Every change is appended to a JSON-lines journal before it is acknowledged,
+    so queued work survives a restart. The worker waits for the coalescing
+    window of each entry, drops operations that cancel out (complete then
+    uncomplete of the same task) or were superseded (a later due date), and
+    applies the rest through apply_batch_operations(), one batch per tenant. Entries already
+    handed to TaskWarrior are never coalesced; a reversal of one is queued.
+    """
+    
+    def __init__(self, journal_path, delay):
+        self.journal_path = journal_path
+        self.delay = delay
+        self.applied = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.last_error = None
+        self.last_apply_lag = None
+        self._pending = OrderedDict()
+        self._in_flight = set()
+        self._next_seq = 1
+        self._cond = threading.Condition()
+        self._thread = None
+    
+    def start(self):
+        """Replay unapplied journal entries and start the worker (once)"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._replay()
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+    
+    def enqueue(self, op):
+        """Journal an operation for the current tenant; returns False if it cancelled out a queued one"""
+        op = dict(op, tenant=current_tenant().name)
+        with self._cond:
+            for seq, entry in reversed(self._pending.items()):
+                if entry['op']['task_id'] != op['task_id'] or entry['op'].get('tenant', DEFAULT_TENANT) != op['tenant']:
+                    continue
+                if seq in self._in_flight:
+                    # Being applied right now, so it can no longer be taken back
+                    break
+                if OPPOSITE_ACTIONS.get(op['action']) == entry['op']['action']:
+                    del self._pending[seq]
+                    self._journal({'cancelled': [seq]})
+                    self.coalesced += 2
+                    return False
+                if op['action'] in DUE_ACTIONS and entry['op']['action'] in DUE_ACTIONS:
+                    del self._pending[seq]
+                    self._journal({'cancelled': [seq]})
+                    self.coalesced += 1
+                break
+            
+            entry = {'seq': self._next_seq, 'op': op, 'queued_at': time.time()}
+            self._next_seq += 1
+            self._journal(entry)
+            self._pending[entry['seq']] = entry
+            self._cond.notify()
+            return True
+    
+    def stats(self):
+        with self._cond:
+            oldest = next(iter(self._pending.values()), None)
+            return {
+                'enabled': True,
+                'depth': len(self._pending),
+                'oldest_age': round(time.time() - oldest['queued_at'], 3) if oldest else 0.0,
+                'last_apply_lag': self.last_apply_lag,
+                'applied': self.applied,
+                'failed': self.failed,
+                'coalesced': self.coalesced,
+                'last_error': self.last_error,
+            }
+    
+    def _journal(self, record):
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _replay(self):
+        try:
+            with open(self.journal_path, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return
+        
+        for record in records:
+            if 'seq' in record:
+                self._pending[record['seq']] = record
+                self._next_seq = max(self._next_seq, record['seq'] + 1)
+            for seq in record.get('applied', []) + record.get('cancelled', []):
+                self._pending.pop(seq, None)
+        
+        if self._pending:
+            logger.info('Replaying queued mutations count=%d journal=%s', len(self._pending), self.journal_path)
+        else:
+            self._compact()
+    
+    def _compact(self):
+        # Nothing left to apply, so the journal can start over
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+    
+    def _run(self):
+        backoff = self.delay
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                oldest = next(iter(self._pending.values()))
+            
+            # Leave the coalescing window open so quick reversals never reach TaskWarrior
+            wait = oldest['queued_at'] + self.delay - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            
+            with self._cond:
+                # Entries are queued in time order, so those whose window has closed come first;
+                # the rest stay pending (and can still be coalesced) until theirs closes too
+                now = time.time()
+                entries = list(itertools.takewhile(lambda entry: entry['queued_at'] + self.delay <= now,
+                                                   self._pending.values()))
+                self._in_flight = {entry['seq'] for entry in entries}
+            if not entries:
+                continue
+            
+            by_tenant = OrderedDict()
+            for entry in entries:
+                by_tenant.setdefault(entry['op'].get('tenant', DEFAULT_TENANT), []).append(entry)
+            failed = False
+            for name, group in by_tenant.items():
+                failed = not self._apply(name, group) or failed
+            with self._cond:
+                self._in_flight = set()
+            if failed:
+                # Only the groups that raised are still pending
+                logger.warning('Write-behind retrying in %gs', backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+            else:
+                backoff = self.delay
+    
+    def _apply(self, name, entries):
+        """Apply one tenant's entries; False if they should be retried"""
+        tenant = tenant_registry.get(name)
+        if tenant is None:
+            logger.warning('Dropping %d queued mutations of unknown tenant %s', len(entries), name)
+            with self._cond:
+                for entry in entries:
+                    self._pending.pop(entry['seq'], None)
+                self._journal({'cancelled': [entry['seq'] for entry in entries]})
+                self.failed += len(entries)
+                if not self._pending:
+                    self._compact()
+            return True
+        
+        with use_tenant(tenant):
+            try:
+                results = apply_batch_operations([{key: value for key, value in entry['op'].items() if key != 'tenant'}
+                                                  for entry in entries])
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning('Write-behind apply for tenant=%s failed: %s', name, e)
+                return False
+            
+            with self._cond:
+                for entry in entries:
+                    self._pending.pop(entry['seq'], None)
+                self._journal({'applied': [entry['seq'] for entry in entries]})
+                succeeded = [r for r in results if r['status'] == 'success']
+                self.applied += len(succeeded)
+                self.failed += len(results) - len(succeeded)
+                for result in results:
+                    if result['status'] != 'success':
+                        self.last_error = result['error']
+                        logger.warning('Write-behind %s of task_id=%s failed: %s', result['action'], result['task_id'], result['error'])
+                self.last_apply_lag = round(time.time() - entries[0]['queued_at'], 3)
+                if not self._pending:
+                    self._compact()
+            
+            if succeeded:
+                invalidate_task_caches(list(dict.fromkeys(entry['op']['task_id'] for entry in entries)))
+        return True
+
+write_behind_queue = WriteBehindQueue(app.config['WRITE_BEHIND_JOURNAL'], app.config['WRITE_BEHIND_DELAY'])
+
+def parse_prefetch_specs(value, default_interval):
+    """Parse "next:60:300,focus" into {report: (interval, max_stale)}
+    
+    max_stale defaults to twice the interval and is never shorter than it,
+    so a warm report does not expire between refreshes.
+    """
+    specs = {}
+    for entry in value.split(','):
+        parts = entry.strip().split(':')
+        if not parts[0]:
+            continue
+        try:
+            interval = float(parts[1]) if len(parts) > 1 and parts[1] else default_interval
+            max_stale = float(parts[2]) if len(parts) > 2 and parts[2] else interval * 2
+        except ValueError:
+            logger.warning('Ignoring invalid prefetch entry %r', entry)
+            continue
+        specs[parts[0]] = (max(interval, 1.0), max(max_stale, interval))
+    return specs
+
+class ReportPrefetcher:
+    """Background thread that keeps configured reports (and the stats completion export) in the report cache
+    
+    Each report is re-exported every `interval` seconds and may be served
+    from the cache for up to `max_stale` seconds. All reports are exported
+    at start and again right after any mutation, so page loads rarely wait
+    on a `task` subprocess. In multi-tenant mode a tenant's reports are kept
+    warm from its first request until the registry drops it.
+    """
+    
+    def __init__(self, specs):
+        self.specs = specs
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error = None
+        self._due = {}
+        self._tenants = {}
+        self._completed_keys = {}
+        self._thread = None
+        self._wake = threading.Condition()
+    
+    def start(self):
+        """Warm every report and keep them warm (once)"""
+        with self._wake:
+            if self._thread is not None or not self.specs:
+                return
+            self._thread = threading.Thread(target=self._run, name='report-prefetch', daemon=True)
+            self._thread.start()
+        if not tenant_registry.multi_tenant:
+            self.track(tenant_registry.default)
+    
+    def track(self, tenant):
+        """Keep a tenant's reports warm, starting now if they are not already"""
+        with self._wake:
+            if self._thread is None or self._tenants.get(tenant.name) is tenant:
+                return
+            self._tenants[tenant.name] = tenant
+            for name, (interval, max_stale) in self.specs.items():
+                tenant.report_cache.set_ttl(name, max_stale)
+                self._due[(tenant.name, name)] = 0.0
+            self._wake.notify()
+    
+    def request_refresh(self):
+        """Re-export the current tenant's reports now; called after mutations"""
+        tenant = current_tenant().name
+        with self._wake:
+            if self._thread is None:
+                return
+            for key in self._due:
+                if key[0] == tenant:
+                    self._due[key] = 0.0
+            self._wake.notify()
+    
+    def _run(self):
+        while True:
+            with self._wake:
+                # Stop refreshing tenants the registry has dropped
+                for name, tenant in list(self._tenants.items()):
+                    if tenant_registry.peek(name) is not tenant:
+                        del self._tenants[name]
+                        self._completed_keys.pop(name, None)
+                        for key in [key for key in self._due if key[0] == name]:
+                            del self._due[key]
+                now = time.monotonic()
+                due = [key for key, at in self._due.items() if at <= now]
+                if not due:
+                    self._wake.wait(timeout=min(self._due.values()) - now if self._due else None)
+                    continue
+                for key in due:
+                    self._due[key] = now + self.specs[key[1]][0]
+                tenants = {name: self._tenants[name] for name, _ in due}
+            
+            for tenant_name, tenant in tenants.items():
+                with use_tenant(tenant):
+                    for name in [name for owner, name in due if owner == tenant_name]:
+                        self._refresh(name, lambda name=name: export_report(name, refresh=True))
+                    self._refresh_completed(tenant)
+    
+    def _refresh_completed(self, tenant):
+        # The stats page also needs tasks completed since the widest window start
+        start = min(get_window_starts().values())
+        completed_key = self._completed_keys.get(tenant.name)
+        if completed_key != completed_cache_key(start):
+            report_cache.set_ttl(completed_key, None)
+            completed_key = self._completed_keys[tenant.name] = completed_cache_key(start)
+            report_cache.set_ttl(completed_key, max(max_stale for _, max_stale in self.specs.values()))
+        self._refresh('__completed__', lambda: get_completed_since(start, refresh=True))
+    
+    def _refresh(self, name, export):
+        try:
+            export()
+            self.refreshes += 1
+            PREFETCH_REFRESHES.inc(name, 'success')
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            PREFETCH_REFRESHES.inc(name, 'error')
+            logger.warning('Prefetch of report=%s tenant=%s failed: %s', name, current_tenant().name, e)
+    
+    def stats(self):
+        tenant = current_tenant().name
+        with self._wake:
+            now = time.monotonic()
+            return {
+                'enabled': self._thread is not None,
+                'reports': {name: {'interval': interval, 'max_stale': max_stale,
+                                   'next_refresh_in': round(max(self._due.get((tenant, name), 0.0) - now, 0.0), 3)}
+                            for name, (interval, max_stale) in self.specs.items()},
+                'tenants': len(self._tenants),
+                'refreshes': self.refreshes,
+                'failures': self.failures,
+                'last_error': self.last_error,
+            }
+
+report_prefetcher = ReportPrefetcher(parse_prefetch_specs(app.config['PREFETCH_REPORTS'],
+                                                          app.config['PREFETCH_INTERVAL']))
+
+DEFAULT_TENANT = 'default'
+TENANT_NAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+class TenantBusy(TimeoutError):
+    """A tenant has used up its command slots; answered like any other queue timeout (408)"""
+
+class Tenant:
+    """One TaskWarrior database (TASKRC + TASKDATA) and everything cached from it
+    
+    Commands of every tenant run on the shared executor pools, but each takes
+    one of its tenant's slots first: up to `read_concurrency` reads and a
+    single write at a time, with at most `max_waiting` commands waiting.
+    A tenant flooding the server with slow commands gets 408s instead of
+    holding every worker.
+    """
+    
+    def __init__(self, name, taskrc=None, taskdata=None, read_concurrency=1, max_waiting=None):
+        self.name = name
+        if taskrc is None and taskdata is None:
+            # The default tenant is whatever the server's own environment points at
+            self.env = None
+            self.environ = os.environ
+        else:
+            self.env = dict(os.environ, TASKRC=taskrc, TASKDATA=taskdata)
+            self.environ = self.env
+        self.max_waiting = max_waiting
+        self.report_cache = ReportCache(app.config['REPORT_CACHE_TTL'], app.config['REPORT_CACHE_SIZE'])
+        self.task_store = TaskStore()
+        self.report_definitions = ReportDefinitions()
+        self.report_versions = ReportVersions()
+        self.full_export_lock = threading.Lock()
+        self.revalidating = {}
+        self.rejected = 0
+        self.last_used = time.time()
+        self._slots = {'read': threading.BoundedSemaphore(read_concurrency),
+                       'write': threading.BoundedSemaphore(1)}
+        self._waiting = {'read': 0, 'write': 0}
+        self._active = {'read': 0, 'write': 0}
+        self._lock = threading.Lock()
+        if app.config.get('SHARED_CACHE') and name != DEFAULT_TENANT:
+            self.report_cache.attach_shared(SharedGeneration(f"{app.config['SHARED_GENERATION_PATH']}-{name}"))
+    
+    def acquire(self, lane, timeout):
+        """Take a command slot, raising TenantBusy if too many are waiting or none frees up in time"""
+        with self._lock:
+            self.last_used = time.time()
+            if self.max_waiting is not None and self._waiting[lane] >= self.max_waiting:
+                self.rejected += 1
+                raise TenantBusy(f"Too many TaskWarrior commands are waiting for tenant {self.name}")
+            self._waiting[lane] += 1
+        try:
+            acquired = self._slots[lane].acquire(timeout=timeout)
+        finally:
+            with self._lock:
+                self._waiting[lane] -= 1
+        with self._lock:
+            if not acquired:
+                self.rejected += 1
+                raise TenantBusy(f"TaskWarrior command waited more than {timeout:g} seconds for a slot of tenant {self.name}")
+            self._active[lane] += 1
+    
+    def release(self, lane):
+        with self._lock:
+            self._active[lane] -= 1
+        self._slots[lane].release()
+    
+    def busy(self):
+        with self._lock:
+            return any(self._waiting.values()) or any(self._active.values())
+    
+    def run(self, fn, *args):
+        """Call fn with this tenant current; for work handed to other threads"""
+        with use_tenant(self):
+            return fn(*args)
+    
+    def close(self):
+        """Release what the tenant holds outside its own caches once the registry drops it"""
+        if self.report_cache.shared is not None:
+            self.report_cache.shared.close()
+        if snapshot_store is not None:
+            with use_tenant(self):
+                snapshot_store.forget(snapshot_scope())
+    
+    def stats(self):
+        with self._lock:
+            return {'name': self.name, 'waiting': dict(self._waiting), 'running': dict(self._active),
+                    'rejected': self.rejected}
+
+class TenantRegistry:
+    """Tenants by name, from the TENANTS JSON file or directories under TENANT_ROOT
+    
+    The file maps names to {"taskrc": ..., "taskdata": ...} and is re-read
+    when it changes. Tenants are created on first use; beyond `cache_limit`
+    the least recently used idle ones are dropped along with their caches.
+    """
+    
+    def __init__(self, tenants_file, root, cache_limit):
+        self.tenants_file = tenants_file
+        self.root = root
+        self.cache_limit = cache_limit
+        self.multi_tenant = bool(tenants_file or root)
+        self.evictions = 0
+        self.default = Tenant(DEFAULT_TENANT, read_concurrency=app.config['TASK_READ_CONCURRENCY'],
+                              max_waiting=app.config['TENANT_MAX_WAITING'] if self.multi_tenant else None)
+        self._tenants = OrderedDict()
+        self._definitions = {}
+        self._file_mtime = None
+        self._lock = threading.Lock()
+    
+    def _load_definitions(self):
+        try:
+            mtime = os.stat(self.tenants_file).st_mtime_ns
+        except OSError as e:
+            logger.warning('Cannot read tenants file %s: %s', self.tenants_file, e)
+            return self._definitions
+        if mtime != self._file_mtime:
+            try:
+                with open(self.tenants_file, encoding='utf-8') as f:
+                    entries = json.load(f)
+                self._definitions = {name: (os.path.expanduser(entry['taskrc']), os.path.expanduser(entry['taskdata']))
+                                     for name, entry in entries.items() if TENANT_NAME_RE.match(name)}
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                logger.warning('Ignoring invalid tenants file %s: %s', self.tenants_file, e)
+            self._file_mtime = mtime
+        return self._definitions
+    
+    def _definition(self, name):
+        """(taskrc, taskdata) for a tenant name, or None if there is no such tenant"""
+        if not TENANT_NAME_RE.match(name):
+            return None
+        if self.tenants_file:
+            definition = self._load_definitions().get(name)
+            if definition is not None or not self.root:
+                return definition
+        home = os.path.join(self.root, name)
+        if not os.path.isdir(home):
+            return None
+        taskrc = os.path.join(home, 'taskrc')
+        return (taskrc if os.path.exists(taskrc) else os.devnull, os.path.join(home, 'data'))
+    
+    def get(self, name):
+        """The tenant called `name`, creating it on first use; None if it is not configured"""
+        if name == DEFAULT_TENANT and not self.multi_tenant:
+            return self.default
+        with self._lock:
+            definition = self._definition(name)
+            tenant = self._tenants.get(name)
+            if definition is None:
+                if tenant is not None:
+                    del self._tenants[name]
+                    tenant.close()
+                return None
+            if tenant is not None and (tenant.environ['TASKRC'], tenant.environ['TASKDATA']) == definition:
+                self._tenants.move_to_end(name)
+                return tenant
+            tenant = Tenant(name, *definition, read_concurrency=app.config['TENANT_READ_CONCURRENCY'],
+                            max_waiting=app.config['TENANT_MAX_WAITING'])
+            self._tenants[name] = tenant
+            self._evict()
+            return tenant
+    
+    def peek(self, name):
+        """The tenant called `name` if it is loaded, without creating it"""
+        if name == DEFAULT_TENANT and not self.multi_tenant:
+            return self.default
+        with self._lock:
+            return self._tenants.get(name)
+    
+    def _evict(self):
+        for name in list(self._tenants):
+            if len(self._tenants) <= self.cache_limit:
+                break
+            tenant = self._tenants[name]
+            if not tenant.busy():
+                del self._tenants[name]
+                tenant.close()
+                self.evictions += 1
+    
+    def stats(self):
+        with self._lock:
+            return {'multi_tenant': self.multi_tenant, 'loaded': len(self._tenants),
+                    'cache_limit': self.cache_limit, 'evictions': self.evictions,
+                    'current': current_tenant().stats()}
+
+tenant_registry = TenantRegistry(app.config['TENANTS'], app.config['TENANT_ROOT'], app.config['TENANT_CACHE_LIMIT'])
+tenant_var = contextvars.ContextVar('onetask_tenant', default=tenant_registry.default)
+
+def current_tenant():
+    """The tenant being served: the request's, or the one a background job set with use_tenant()"""
+    if has_request_context() and 'tenant' in g:
+        return g.tenant
+    return tenant_var.get()
+
+@contextmanager
+def use_tenant(tenant):
+    token = tenant_var.set(tenant)
+    try:
+        yield tenant
+    finally:
+        tenant_var.reset(token)
+
+@app.before_request
+def start_background_services():
+    """Start background workers with the first request (not at import, which the reloader repeats)"""
+    if app.config['WRITE_BEHIND']:
+        write_behind_queue.start()
+    # With several workers only the first prefetches; the others read its exports from the snapshot store
+    if app.config.get('WORKER_INDEX', 0) == 0:
+        report_prefetcher.start()
+
+# Endpoints that serve no task data, so they answer without a tenant
+TENANTLESS_ENDPOINTS = {'static', 'service_worker', 'get_metrics'}
+
+@app.before_request
+def select_tenant():
+    """In multi-tenant mode, route the request to the tenant named by the proxy's header"""
+    if not tenant_registry.multi_tenant or request.endpoint in TENANTLESS_ENDPOINTS:
+        return None
+    name = request.headers.get(app.config['TENANT_HEADER'], '').strip()
+    if not name:
+        return jsonify({'error': f"Missing {app.config['TENANT_HEADER']} header", 'status': 'error'}), 400
+    tenant = tenant_registry.get(name)
+    if tenant is None:
+        return jsonify({'error': f'Unknown tenant: {name}', 'status': 'error'}), 404
+    g.tenant = tenant
+    report_prefetcher.track(tenant)
+    return None
+
+@app.after_request
+def vary_on_tenant(response):
+    if tenant_registry.multi_tenant:
+        response.vary.add(app.config['TENANT_HEADER'])
+    return response
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe route latency and, for buffered responses, body size"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        # The URL rule keeps label cardinality bounded (no task IDs or tags)
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route, request.method, str(response.status_code))
+        if not response.is_streamed and response.content_length is not None:
+            RESPONSE_BYTES.observe(response.content_length, route)
+    return response
+
+# Responses worth compressing; event streams and NDJSON exports are streamed and left alone
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript',
+                          'text/javascript', 'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon'}
+# Static URLs carrying the current content hash never change, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+class ResponseCache:
+    """LRU of rendered and compressed response bodies, bounded by total bytes"""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+    
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+    
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                    'bytes': self._size, 'max_bytes': self.max_bytes}
+
+response_cache = ResponseCache(int(app.config['RESPONSE_CACHE_MB'] * 1024 * 1024))
+
+_file_digests = {}
+
+def file_digest(path):
+    """Short content hash of a file, recomputed only when its mtime or size changes; None if missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _file_digests.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    _file_digests[path] = (key, digest)
+    return digest
+
+def static_asset_hash(filename):
+    return file_digest(os.path.join(app.static_folder, filename))
+
+@app.url_defaults
+def add_static_fingerprint(endpoint, values):
+    """Give url_for('static', ...) a ?v=<content hash> so the URL changes whenever the file does"""
+    if endpoint == 'static' and 'v' not in values:
+        digest = static_asset_hash(values.get('filename', ''))
+        if digest:
+            values['v'] = digest
+
+@app.route('/sw.js')
+def service_worker():
+    """The offline service worker, served from the root so its scope covers every page
+    
+    The outbox script it imports is pointed at its fingerprinted URL, so a new
+    outbox.js also changes the worker's bytes and browsers install it.
+    """
+    with open(os.path.join(app.static_folder, 'js', 'sw.js'), encoding='utf-8') as f:
+        source = f.read()
+    source = source.replace("importScripts('/static/js/outbox.js')",
+                            f"importScripts('{url_for('static', filename='js/outbox.js')}')")
+    response = app.response_class(source, mimetype='text/javascript')
+    response.set_etag(hashlib.sha1(source.encode()).hexdigest())
+    # Browsers check for a new worker on navigation; never let a stale copy answer that
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def choose_encoding():
+    """The best content coding the client accepts: br (if brotli is installed), gzip or None"""
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress_body(body, encoding, reusable):
+    """Compress harder when the result is cached and reused (pages, static files)"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if reusable else 5)
+    return gzip.compress(body, compresslevel=9 if reusable else 6, mtime=0)
+
+@app.after_request
+def compress_response(response):
+    """Cache headers for fingerprinted static files, then gzip/brotli for text bodies
+    
+    Registered after record_request_metrics so it runs first and the
+    metrics see the compressed size. Page and static bodies are compressed
+    once per content version and served from the response cache after that.
+    """
+    cache_key = g.pop('response_cache_key', None)
+    if request.endpoint == 'static':
+        filename = (request.view_args or {}).get('filename', '')
+        digest = static_asset_hash(filename)
+        if digest and request.args.get('v') == digest:
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        if digest and response.status_code == 200:
+            cache_key = ('static', filename, digest)
+    
+    if (response.status_code != 200 or (response.is_streamed and cache_key is None)
+            or 'Content-Encoding' in response.headers or app.config['COMPRESS_MIN_SIZE'] <= 0
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+    
+    compressed = response_cache.get((cache_key, encoding)) if cache_key is not None else None
+    if compressed is None:
+        if cache_key is not None and cache_key[0] == 'static':
+            # send_file streams from disk; compress the file itself once
+            with open(os.path.join(app.static_folder, cache_key[1]), 'rb') as f:
+                body = f.read()
+        else:
+            body = response.get_data()
+        if len(body) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        compressed = compress_body(body, encoding, cache_key is not None)
+        if cache_key is not None:
+            response_cache.put((cache_key, encoding), compressed)
+    
+    if response.direct_passthrough:
+        response.response.close()
+        response.direct_passthrough = False
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.headers.pop('Accept-Ranges', None)
+    # A compressed body is a different representation of the same resource
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def render_metric(name, metric_type, help_text, samples):
+    """Prometheus text lines for a counter/gauge given [(labels dict, value)]"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for labels, value in samples:
+        lines.append(f'{name}{format_metric_labels(tuple(labels), tuple(labels.values()))} {value}')
+    return lines
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of latency histograms, counters and cache/executor state"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    
+    cache = report_cache.stats()
+    store = task_store.stats()
+    executor = task_executor.stats()
+    lines += render_metric('onetask_report_cache_hits_total', 'counter', 'Report cache hits', [({}, cache['hits'])])
+    lines += render_metric('onetask_report_cache_misses_total', 'counter', 'Report cache misses', [({}, cache['misses'])])
+    lines += render_metric('onetask_report_cache_entries', 'gauge', 'Cached report exports', [({}, cache['size'])])
+    lines += render_metric('onetask_task_store_tasks', 'gauge', 'Tasks held in the task store', [({}, store['size'])])
+    lines += render_metric('onetask_task_executor_queued', 'gauge', 'task commands waiting for a worker',
+                           [({'lane': lane}, count) for lane, count in executor['queued'].items()])
+    lines += render_metric('onetask_task_executor_running', 'gauge', 'task commands running',
+                           [({'lane': lane}, count) for lane, count in executor['running'].items()])
+    if app.config['WRITE_BEHIND']:
+        lines += render_metric('onetask_write_behind_depth', 'gauge', 'Mutations waiting in the write-behind queue',
+                               [({}, write_behind_queue.stats()['depth'])])
+    
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/queue/stats', methods=['GET'])
+def get_queue_stats():
+    """Report write-behind queue depth and apply lag"""
+    if not app.config['WRITE_BEHIND']:
+        return jsonify({'write_behind': {'enabled': False}, 'status': 'success'})
+    return jsonify({'write_behind': write_behind_queue.stats(), 'status': 'success'})
+
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Report cache, task store, snapshot, local evaluator and response cache counters"""
+    return jsonify({'report_cache': report_cache.stats(), 'task_store': task_store.stats(),
+                    'snapshots': snapshot_store.stats() if snapshot_store is not None else {'enabled': False},
+                    'report_evaluator': report_definitions.stats(), 'response_cache': response_cache.stats(),
+                    'status': 'success'})
+
+@app.route('/prefetch/stats', methods=['GET'])
+def get_prefetch_stats():
+    """Report the warmed reports, their schedule and refresh counters"""
+    return jsonify({'prefetch': report_prefetcher.stats(), 'status': 'success'})
+
+@app.route('/executor/stats', methods=['GET'])
+def get_executor_stats():
+    """Report TaskWarrior queue depth, running commands, adaptive timeouts, single-flight savings and tenant slots"""
+    commands, exports = command_flights.stats(), export_flights.stats()
+    return jsonify({
+        'executor': task_executor.stats(),
+        'tenants': tenant_registry.stats(),
+        'single_flight': {'commands': commands, 'exports': exports,
+                          'forks_saved': commands['shared'] + exports['shared']},
+        'status': 'success',
+    })
+
+# Warm reports at startup rather than on the first request; under the debug
+# reloader only the serving child process (WERKZEUG_RUN_MAIN) does this
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    report_prefetcher.start()
+
+def serve_until_stopped(server):
+    """Serve until SIGTERM, then stop accepting and let in-flight requests finish
+    
+    Requests still running SHUTDOWN_GRACE seconds later (event streams,
+    usually) are cut off by exiting the process.
+    """
+    # Non-daemon request threads are what server_close() waits for
+    server.daemon_threads = False
+    
+    def drain(signum, frame):
+        # shutdown() waits for serve_forever() to return, and that runs on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    
+    signal.signal(signal.SIGTERM, drain)
+    server.serve_forever()
+    logger.info('Stopped accepting connections in pid %d; finishing in-flight requests', os.getpid())
+    watchdog = threading.Timer(app.config['SHUTDOWN_GRACE'], os._exit, (0,))
+    watchdog.daemon = True
+    watchdog.start()
+    server.server_close()
+    watchdog.cancel()
+
+def serve(host, port, workers):
+    """Production server: one listening socket shared by `workers` forked processes, each threaded
+    
+    The parent only binds the socket and supervises: a worker that dies is
+    replaced, and SIGTERM/SIGINT drain and stop them all. Workers share report data
+    through the snapshot store and invalidate each other's caches through
+    the generation counter at SHARED_GENERATION_PATH.
+    """
+    if workers > 1 and app.config['WRITE_BEHIND']:
+        raise SystemExit('ONETASK_WRITE_BEHIND keeps its journal in one process; run it with --workers 1')
+    server = make_server(host, port, app, threaded=True)
+    if workers <= 1:
+        logger.info('Serving OneTask on http://%s:%d', host, server.port)
+        report_prefetcher.start()
+        serve_until_stopped(server)
+        return
+    
+    # Nothing may start threads before the fork; the workers start their own on first request,
+    # except the first worker's prefetcher, which starts right after its fork to warm reports.
+    # Other tenants get a generation file of their own when they are first served
+    app.config['SHARED_CACHE'] = True
+    report_cache.attach_shared(SharedGeneration(app.config['SHARED_GENERATION_PATH']))
+    if snapshot_store is not None:
+        snapshot_store.shared = True
+    # Idle workers return from accept() instead of blocking when another worker took the connection
+    server.socket.setblocking(False)
+    
+    children = {}
+    stopping = False
+    
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            # Ctrl-C reaches the whole process group; the parent turns it into SIGTERM for us
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            app.config['WORKER_INDEX'] = index
+            try:
+                if index == 0:
+                    report_prefetcher.start()
+                serve_until_stopped(server)
+            finally:
+                os._exit(0)
+        children[pid] = index
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+    logger.info('Serving OneTask on http://%s:%d with %d workers', host, server.port, workers)
+    
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            logger.error('Worker %d (pid %d) exited with status %d; starting a new one', index, pid, status)
+            spawn(index)
+    server.server_close()
+
 if __name__ == '__main__':
-    # Enable debug mode only when running directly (not in production)
-    app.run(debug=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='OneTask: a focused, timer-based web interface for TaskWarrior')
+    parser.add_argument('--serve', action='store_true',
+                        help='run the multi-worker production server instead of the debug server')
+    parser.add_argument('--host', default=app.config['HOST'])
+    parser.add_argument('--port', type=int, default=app.config['PORT'])
+    parser.add_argument('--workers', type=int, default=app.config['WORKERS'],
+                        help='worker processes for --serve (each one threaded)')
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.host, args.port, args.workers)
+    else:
+        # Enable debug mode only when running directly (not in production)
+        app.run(debug=True, host=args.host, port=args.port)
\ No newline at end of file
@@ -0,0 +1,259 @@
+// Offline storage shared by the task page and the service worker (sw.js):
+// the last payload of each report, and an outbox of changes not yet sent.
+//
+// Changes are applied on the page at once and kept here until the server
+// accepts them. Each carries the task's `modified` stamp as the client last
+// saw it; the server answers 409 when the task has changed since, so an edit
+// made offline never silently overwrites a newer one from another device.
+(function (global) {
+    'use strict';
+
+    var DB_NAME = 'onetask';
+    var DB_VERSION = 1;
+    var LOCK_NAME = 'onetask-outbox';
+    var SYNC_TAG = 'onetask-outbox';
+    var MAX_ATTEMPTS = 5; // server errors before a change is given up on
+    // Sent together through /tasks/batch; annotations have their own endpoints
+    var BATCH_ACTIONS = ['complete', 'uncomplete', 'set_due', 'remove_due'];
+    var BATCH_SIZE = 100; // well under the server's ONETASK_BATCH_MAX_OPERATIONS default
+    var OPPOSITE_ACTIONS = { complete: 'uncomplete', uncomplete: 'complete' };
+    var DUE_ACTIONS = ['set_due', 'remove_due'];
+
+    // Used when IndexedDB is unavailable (some private browsing modes); lost on reload
+    var memory = { reports: {}, outbox: [], nextId: 1 };
+    var dbPromise = null;
+
+    function openDb() {
+        if (!global.indexedDB) return Promise.resolve(null);
+        if (!dbPromise) {
+            dbPromise = new Promise(function (resolve) {
+                var request = global.indexedDB.open(DB_NAME, DB_VERSION);
+                request.onupgradeneeded = function () {
+                    request.result.createObjectStore('reports', { keyPath: 'report' });
+                    request.result.createObjectStore('outbox', { keyPath: 'id', autoIncrement: true });
+                };
+                request.onsuccess = function () { resolve(request.result); };
+                request.onerror = function () { resolve(null); };
+            });
+        }
+        return dbPromise;
+    }
+
+    // Run one request against a store; resolves with its result
+    function withStore(name, mode, makeRequest, fallback) {
+        return openDb().then(function (db) {
+            if (!db) return fallback();
+            return new Promise(function (resolve, reject) {
+                var request = makeRequest(db.transaction(name, mode).objectStore(name));
+                request.onsuccess = function () { resolve(request.result); };
+                request.onerror = function () { reject(request.error); };
+            });
+        });
+    }
+
+    function allChanges() {
+        return withStore('outbox', 'readonly', store => store.getAll(),
+                         () => memory.outbox.slice());
+    }
+
+    function addChange(change) {
+        return withStore('outbox', 'readwrite', store => store.add(change), function () {
+            change.id = memory.nextId++;
+            memory.outbox.push(change);
+            return change.id;
+        });
+    }
+
+    function putChange(change) {
+        return withStore('outbox', 'readwrite', store => store.put(change), () => change.id);
+    }
+
+    function deleteChange(id) {
+        return withStore('outbox', 'readwrite', store => store.delete(id), function () {
+            memory.outbox = memory.outbox.filter(change => change.id !== id);
+        });
+    }
+
+    function loadReport(report) {
+        return withStore('reports', 'readonly', store => store.get(report),
+                         () => memory.reports[report]);
+    }
+
+    function saveReport(report, version, payload) {
+        var record = { report: report, version: version, payload: payload, saved: Date.now() };
+        return withStore('reports', 'readwrite', store => store.put(record), function () {
+            memory.reports[report] = record;
+        });
+    }
+
+    // One flush or enqueue at a time across the page, other tabs and the service worker
+    var localChain = Promise.resolve();
+    function withLock(fn) {
+        if (global.navigator && global.navigator.locks) {
+            return global.navigator.locks.request(LOCK_NAME, fn);
+        }
+        var next = localChain.then(fn, fn);
+        localChain = next.catch(function () {});
+        return next;
+    }
+
+    // Queue a change; resolves with its outbox ID, or null when it cancelled a queued one.
+    // stampFor(task_id) gives the task's `modified` as the page knows it; it is read under
+    // the lock so a change made while a flush is in flight picks up the stamp that flush returned.
+    function enqueue(change, stampFor) {
+        return withLock(async function () {
+            var queued = await allChanges();
+            change.expected_modified = (stampFor && stampFor(change.task_id)) || null;
+            // Completing then uncompleting a task before either is sent needs no request at all
+            var opposite = queued.find(c => c.task_id === change.task_id &&
+                                            c.action === OPPOSITE_ACTIONS[change.action]);
+            if (opposite) {
+                await deleteChange(opposite.id);
+                return null;
+            }
+            // Only the latest due date matters
+            if (DUE_ACTIONS.includes(change.action)) {
+                for (var c of queued) {
+                    if (c.task_id === change.task_id && DUE_ACTIONS.includes(c.action)) {
+                        change.expected_modified = c.expected_modified;
+                        await deleteChange(c.id);
+                    }
+                }
+            }
+            change.queued = Date.now();
+            change.attempts = 0;
+            return addChange(change);
+        });
+    }
+
+    function requestJson(url, method, body) {
+        var options = { method: method, headers: {} };
+        if (body !== undefined) {
+            options.headers['Content-Type'] = 'application/json';
+            options.body = JSON.stringify(body);
+        }
+        return fetch(url, options).then(response => response.json()
+            .catch(() => ({}))
+            .then(data => ({ status: response.status, data: data })));
+    }
+
+    // Timeouts and server errors are worth retrying; anything else is final
+    function isRetryable(status) {
+        return status === 408 || status >= 500;
+    }
+
+    function outcomeFor(status, data) {
+        if (status === 409 || data.status === 'conflict') return Object.assign({ status: 'conflict' }, data);
+        if (status >= 200 && status < 300 && data.status !== 'error') return Object.assign({}, data, { status: 'success' });
+        return { status: 'error', error: data.error || `HTTP ${status}` };
+    }
+
+    // The /tasks/batch operation for a change; the page's unload beacon sends the same
+    function batchOperation(change, expectedModified) {
+        var op = { action: change.action, task_id: change.task_id };
+        if (change.due_date) op.due_date = change.due_date;
+        if (expectedModified) op.expected_modified = expectedModified;
+        return op;
+    }
+
+    // Send one run of changes; resolves with an outcome per change, or null to retry later
+    async function send(changes, expected) {
+        var first = changes[0];
+        var taskUrl = `/task/${encodeURIComponent(first.task_id)}`;
+        var response;
+        if (BATCH_ACTIONS.includes(first.action)) {
+            var operations = changes.map(change => batchOperation(change, expected(change)));
+            response = await requestJson('/tasks/batch', 'POST', { operations: operations });
+            if (isRetryable(response.status)) return null;
+            if (!response.data.results) return changes.map(() => outcomeFor(response.status, response.data));
+            return response.data.results.map(result => outcomeFor(200, result));
+        }
+        if (first.action === 'annotate') {
+            var body = { annotation: first.annotation };
+            if (expected(first)) body.expected_modified = expected(first);
+            response = await requestJson(`${taskUrl}/annotations`, 'POST', body);
+        } else {
+            var query = expected(first) ? `?expected_modified=${encodeURIComponent(expected(first))}` : '';
+            response = await requestJson(`${taskUrl}/annotations/${encodeURIComponent(first.annotation)}${query}`, 'DELETE');
+        }
+        if (isRetryable(response.status)) return null;
+        return [outcomeFor(response.status, response.data)];
+    }
+
+    // Send everything queued, in order. handlers.onSuccess/onConflict/onError(change, outcome)
+    // are called as the server answers. Resolves with {retry: true} when the network or
+    // server failed and changes are still waiting.
+    function flush(handlers) {
+        handlers = handlers || {};
+        function notify(name, change, outcome) {
+            if (handlers[name]) handlers[name](change, outcome);
+        }
+        return withLock(async function () {
+            var queued = await allChanges();
+            // Stamps returned by this flush; null once a change was queued server-side without one
+            var learned = {};
+            var expected = change => (change.task_id in learned ? learned[change.task_id] : change.expected_modified) || null;
+
+            for (var i = 0; i < queued.length;) {
+                var run = [queued[i++]];
+                if (BATCH_ACTIONS.includes(run[0].action)) {
+                    while (i < queued.length && run.length < BATCH_SIZE && BATCH_ACTIONS.includes(queued[i].action)) {
+                        run.push(queued[i++]);
+                    }
+                }
+                // Changes to one task in one batch are all checked against its stamp before the batch
+                var stamps = {};
+                run.forEach(change => { stamps[change.task_id] = stamps[change.task_id] || expected(change); });
+
+                var outcomes;
+                try {
+                    outcomes = await send(run, change => stamps[change.task_id]);
+                } catch (error) {
+                    return { retry: true, remaining: queued.length - i + run.length };
+                }
+
+                if (outcomes === null) {
+                    var exhausted = false;
+                    for (var change of run) {
+                        change.attempts += 1;
+                        if (change.attempts >= MAX_ATTEMPTS) {
+                            await deleteChange(change.id);
+                            notify('onError', change, { status: 'error', error: 'The server kept failing' });
+                            exhausted = true;
+                        } else {
+                            await putChange(change);
+                        }
+                    }
+                    if (!exhausted) return { retry: true, remaining: queued.length - i + run.length };
+                    continue;
+                }
+
+                for (var k = 0; k < run.length; k++) {
+                    var outcome = outcomes[k] || { status: 'error', error: 'No result from server' };
+                    await deleteChange(run[k].id);
+                    if (outcome.status === 'success') {
+                        learned[run[k].task_id] = outcome.modified || null;
+                        notify('onSuccess', run[k], outcome);
+                    } else if (outcome.status === 'conflict') {
+                        notify('onConflict', run[k], outcome);
+                    } else {
+                        notify('onError', run[k], outcome);
+                    }
+                }
+            }
+            return { retry: false, remaining: 0 };
+        });
+    }
+
+    global.OneTaskOutbox = {
+        SYNC_TAG: SYNC_TAG,
+        BATCH_ACTIONS: BATCH_ACTIONS,
+        batchOperation: batchOperation,
+        persistent: function () { return openDb().then(db => db !== null); },
+        enqueue: enqueue,
+        pending: allChanges,
+        flush: flush,
+        loadReport: loadReport,
+        saveReport: saveReport
+    };
+})(self);
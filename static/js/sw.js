@@ -0,0 +1,96 @@
+// Service worker for the task page. The page is answered from cache at once
+// and refreshed in the background (its live updates catch up from there);
+// fingerprinted static files are served cache-first; and changes left in the
+// outbox (outbox.js) are sent by background sync once the browser is online.
+// The /sw.js route rewrites this URL to the fingerprinted one (?v=<hash>).
+importScripts('/static/js/outbox.js');
+
+var CACHE = 'onetask-v1';
+
+self.addEventListener('install', function () {
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', function (event) {
+    event.waitUntil(caches.keys()
+        .then(names => Promise.all(names.filter(name => name !== CACHE).map(name => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+function isTaskPage(request, url) {
+    return request.mode === 'navigate' && url.origin === self.location.origin && url.pathname === '/';
+}
+
+// ?v=<hash> URLs never change content; the CDN script is pinned to a version
+function isImmutableAsset(url) {
+    return (url.origin === self.location.origin && url.pathname.startsWith('/static/') && url.searchParams.has('v'))
+        || url.hostname === 'cdnjs.cloudflare.com';
+}
+
+function offlineResponse() {
+    return new Response('OneTask is offline and this report has not been opened on this device yet.',
+                        { status: 503, headers: { 'Content-Type': 'text/plain; charset=utf-8' } });
+}
+
+async function serveTaskPage(event) {
+    var cache = await caches.open(CACHE);
+    var cached = await cache.match(event.request);
+    var network = fetch(event.request).then(function (response) {
+        if (response.ok) cache.put(event.request, response.clone());
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => null));
+        return cached;
+    }
+    return network.catch(offlineResponse);
+}
+
+async function serveAsset(request) {
+    var cache = await caches.open(CACHE);
+    var cached = await cache.match(request);
+    if (cached) return cached;
+    var response = await fetch(request);
+    if (response.ok || response.type === 'opaque') {
+        // Drop copies of earlier versions of the same file
+        var url = new URL(request.url);
+        var keys = await cache.keys();
+        await Promise.all(keys.filter(key => new URL(key.url).pathname === url.pathname && key.url !== request.url)
+                              .map(key => cache.delete(key)));
+        await cache.put(request, response.clone());
+    }
+    return response;
+}
+
+self.addEventListener('fetch', function (event) {
+    var request = event.request;
+    if (request.method !== 'GET') return;
+    var url = new URL(request.url);
+    if (isTaskPage(request, url)) {
+        event.respondWith(serveTaskPage(event));
+    } else if (isImmutableAsset(url)) {
+        event.respondWith(serveAsset(request));
+    }
+});
+
+// Tell open pages how each change fared so they can undo rejected ones
+function notifyPages(kind) {
+    return function (change, outcome) {
+        self.clients.matchAll({ type: 'window' }).then(function (clients) {
+            clients.forEach(client => client.postMessage({ type: 'onetask-outbox', kind: kind,
+                                                           change: change, outcome: outcome }));
+        });
+    };
+}
+
+self.addEventListener('sync', function (event) {
+    if (event.tag !== OneTaskOutbox.SYNC_TAG) return;
+    event.waitUntil(OneTaskOutbox.flush({
+        onSuccess: notifyPages('success'),
+        onConflict: notifyPages('conflict'),
+        onError: notifyPages('error')
+    }).then(function (result) {
+        // Rejecting asks the browser to try this sync again later
+        if (result.retry) throw new Error('Outbox not fully sent');
+    }));
+});
@@ -0,0 +1,65 @@
+"""Shared fixtures: the app runs against tools/fake_task.py in a temporary data directory"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_TASK = os.path.join(ROOT, 'tools', 'fake_task.py')
+
+# Settings are read when app.py is imported, so everything persistent points at a scratch
+# directory before that and the fake `task` comes first on PATH
+_scratch = tempfile.mkdtemp(prefix='onetask-tests-')
+_bin = os.path.join(_scratch, 'bin')
+os.makedirs(_bin)
+with open(os.path.join(_bin, 'task'), 'w') as f:
+    f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_TASK}" "$@"\n')
+os.chmod(os.path.join(_bin, 'task'), 0o755)
+os.environ.update({
+    'PATH': _bin + os.pathsep + os.environ.get('PATH', ''),
+    'TASKRC': os.devnull,
+    'TASKDATA': os.path.join(_scratch, 'data'),
+    'ONETASK_SNAPSHOT_PATH': '',
+    'ONETASK_WRITE_BEHIND_JOURNAL': os.path.join(_scratch, 'mutations.journal'),
+    'ONETASK_SHARED_GENERATION_PATH': os.path.join(_scratch, 'cache-generation'),
+    'ONETASK_PREFETCH_REPORTS': '',
+})
+sys.path.insert(0, ROOT)
+
+import app as onetask  # noqa: E402
+
+def seed(data_dir, count):
+    """Fill a fake data directory with `count` synthetic tasks"""
+    os.makedirs(data_dir, exist_ok=True)
+    subprocess.run([sys.executable, FAKE_TASK, '--seed', str(count)], check=True, stdout=subprocess.DEVNULL,
+                   env=dict(os.environ, TASKDATA=str(data_dir)))
+
+def stored_tasks(tenant):
+    """The tenant's tasks by UUID, read straight from the fake data file"""
+    with open(os.path.join(tenant.environ['TASKDATA'], 'fake-tasks.json')) as f:
+        return {task['uuid']: task for task in json.load(f)}
+
+def task_cli(tenant, *args):
+    """Run the fake `task` outside the app, as a user editing from the terminal would"""
+    return subprocess.run(['task', *args], check=True, capture_output=True, text=True, env=tenant.env).stdout
+
+@pytest.fixture
+def app_module():
+    return onetask
+
+@pytest.fixture
+def tenant(tmp_path, monkeypatch):
+    """A fresh default tenant with 20 seeded tasks, current for the test and its requests"""
+    seed(tmp_path / 'data', 20)
+    tenant = onetask.Tenant(onetask.DEFAULT_TENANT, os.devnull, str(tmp_path / 'data'),
+                            read_concurrency=onetask.app.config['TASK_READ_CONCURRENCY'])
+    monkeypatch.setattr(onetask.tenant_registry, 'default', tenant)
+    with onetask.use_tenant(tenant):
+        yield tenant
+
+@pytest.fixture
+def client(tenant):
+    return onetask.app.test_client()
@@ -0,0 +1,55 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from conftest import stored_tasks
+
+NOW = datetime(2026, 10, 14, 9, 30).astimezone()
+
+@pytest.mark.parametrize('estimate', ['30m', '1h30m', '90', '2h', '1h30m15s', 'PT45M', 'pt1h30m'])
+def test_estimates_accepted(app_module, estimate):
+    task = app_module.parse_add_line(f'Write report estimate:{estimate}', NOW)
+    assert task['estimate'] == estimate
+
+@pytest.mark.parametrize('estimate', ['soon', '1x', 'h1', '1hh', '1' * 40])
+def test_estimates_rejected(app_module, estimate):
+    with pytest.raises(ValueError):
+        app_module.parse_add_line(f'Write report estimate:{estimate}', NOW)
+
+def test_estimate_pattern_does_not_backtrack(app_module):
+    started = time.perf_counter()
+    assert not app_module.ESTIMATE_RE.match('1' * 5000 + 'x')
+    assert time.perf_counter() - started < 0.1
+
+def test_bulk_capture_imports_parsed_lines(client, tenant):
+    response = client.post('/capture/bulk', json={'lines': ['First +home estimate:30m', 'Second due:2026-12-01']})
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert [task['description'] for task in body['created']] == ['First', 'Second']
+    first = stored_tasks(tenant)[body['created'][0]['uuid']]
+    assert first['tags'] == ['home'] and first['estimate'] == '30m'
+
+def test_bulk_capture_reports_bad_priorities_per_line(client, tenant):
+    response = client.post('/capture/bulk', json={'lines': ['Good priority:H', 'Bad priority:urgent', 'None given']})
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body['status'] == 'partial'
+    assert [task['description'] for task in body['created']] == ['Good', 'None given']
+    assert [(error['line'], error['text']) for error in body['errors']] == [(2, 'Bad priority:urgent')]
+    assert stored_tasks(tenant)[body['created'][0]['uuid']]['priority'] == 'H'
+
+def test_priorities_follow_the_configured_values(app_module):
+    assert app_module.parse_add_line('Plan pri:1', NOW, ['1', '2', '3'])['priority'] == '1'
+    with pytest.raises(ValueError):
+        app_module.parse_add_line('Plan pri:H', NOW, ['1', '2', '3'])
+
+def test_bulk_capture_rejects_oversized_bodies_before_parsing(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'BATCH_MAX_OPERATIONS', 3)
+    parsed = []
+    parse_add_line = app_module.parse_add_line
+    monkeypatch.setattr(app_module, 'parse_add_line', lambda *args: parsed.append(args) or parse_add_line(*args))
+    
+    response = client.post('/capture/bulk', json={'lines': ['One', 'Two', 'Three', 'Four']})
+    assert response.status_code == 400
+    assert parsed == []
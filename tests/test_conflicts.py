@@ -0,0 +1,52 @@
+import re
+
+from conftest import stored_tasks, task_cli
+
+STALE = '20000101T000000Z'
+
+def open_tasks(tenant, count):
+    return [task for task in stored_tasks(tenant).values() if task['status'] == 'pending'][:count]
+
+def test_complete_with_stale_stamp_is_refused(client, tenant):
+    task, = open_tasks(tenant, 1)
+    task_cli(tenant, task['uuid'], 'annotate', 'edited on another device')
+    current = stored_tasks(tenant)[task['uuid']]['modified']
+    
+    response = client.post('/complete_task', json={'task_id': task['uuid'], 'expected_modified': task['modified']})
+    assert response.status_code == 409
+    body = response.get_json()
+    assert body['status'] == 'conflict' and body['modified'] == current
+    assert body['row']['uuid'] == task['uuid']
+    assert stored_tasks(tenant)[task['uuid']]['status'] == 'pending'
+    
+    response = client.post('/complete_task', json={'task_id': task['uuid'], 'expected_modified': current})
+    assert response.status_code == 200
+    assert stored_tasks(tenant)[task['uuid']]['status'] == 'completed'
+
+def test_annotate_with_stale_stamp_is_refused(client, tenant):
+    task, = open_tasks(tenant, 1)
+    response = client.post(f"/task/{task['uuid']}/annotations",
+                           json={'annotation': 'offline note', 'expected_modified': STALE})
+    assert response.status_code == 409
+    assert stored_tasks(tenant)[task['uuid']] == task
+
+def test_batch_reports_conflicts_per_operation(client, tenant):
+    stale, fresh = open_tasks(tenant, 2)
+    response = client.post('/tasks/batch', json={'operations': [
+        {'action': 'complete', 'task_id': stale['uuid'], 'expected_modified': STALE},
+        {'action': 'complete', 'task_id': fresh['uuid'], 'expected_modified': fresh['modified']},
+    ]})
+    assert response.status_code == 200
+    results = {result['task_id']: result['status'] for result in response.get_json()['results']}
+    assert results == {stale['uuid']: 'conflict', fresh['uuid']: 'success'}
+    
+    tasks = stored_tasks(tenant)
+    assert tasks[stale['uuid']]['status'] == 'pending'
+    assert tasks[fresh['uuid']]['status'] == 'completed'
+
+def test_service_worker_imports_fingerprinted_outbox(client, app_module):
+    response = client.get('/sw.js')
+    assert response.status_code == 200
+    digest = app_module.static_asset_hash('js/outbox.js')
+    assert re.search(r"importScripts\('/static/js/outbox\.js\?v=" + digest + r"'\)", response.get_data(as_text=True))
+    assert client.get('/sw.js', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
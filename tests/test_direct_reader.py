@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+import pytest
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+import make_fixture
+
+FIXTURES = os.path.join(ROOT, 'tools', 'fixtures')
+DATE_ATTRIBUTES = ('entry', 'modified', 'due', 'wait', 'end', 'scheduled', 'until', 'start')
+
+def cli_export(task, number):
+    """The dict `task export` prints for a fixture task"""
+    exported = {'id': number, 'uuid': task['uuid']}
+    for key, value in task.items():
+        if key in ('uuid', 'tags', 'annotations'):
+            continue
+        exported[key] = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(value)) if key in DATE_ATTRIBUTES else str(value)
+    if task['tags']:
+        exported['tags'] = sorted(task['tags'])
+    if task['annotations']:
+        exported['annotations'] = [{'entry': time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(entry)), 'description': description}
+                                   for entry, description in task['annotations']]
+    return exported
+
+def expected_exports():
+    exports, number = {}, 0
+    for task in make_fixture.TASKS:
+        if task['status'] in ('pending', 'waiting'):
+            number += 1
+            exports[task['uuid']] = cli_export(task, number)
+        else:
+            exports[task['uuid']] = cli_export(task, 0)
+    return exports
+
+def normalized(task):
+    task = dict(task)
+    if 'tags' in task:
+        task['tags'] = sorted(task['tags'])
+    return task
+
+@pytest.fixture(params=['taskdata', 'taskdata-legacy'])
+def reader(app_module, request):
+    return app_module.TaskDataReader(os.path.join(FIXTURES, request.param))
+
+def test_fixtures_read_in_export_shape(reader):
+    expected = expected_exports()
+    tasks = reader.get_tasks(include_completed=True)
+    
+    assert {task['uuid']: normalized(task) for task in tasks} == expected
+    assert {task['uuid'] for task in reader.get_tasks()} == {
+        uuid for uuid, task in expected.items() if task['status'] in ('pending', 'waiting')}
+
+def test_get_task_by_id_uuid_and_prefix(reader):
+    expected = expected_exports()
+    first = make_fixture.TASKS[0]['uuid']
+    
+    assert normalized(reader.get_task('1')) == expected[first]
+    assert normalized(reader.get_task(first)) == expected[first]
+    assert normalized(reader.get_task(first[:8])) == expected[first]
+    assert reader.get_task('9') is None
+
+@pytest.mark.parametrize('task_id', ['%', '_', '0f3a6c1e_5b1d', '%a01', ''])
+def test_wildcards_do_not_match_uuids(reader, task_id):
+    assert reader.get_task(task_id) is None
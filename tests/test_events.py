@@ -0,0 +1,15 @@
+import pytest
+
+@pytest.mark.parametrize('timeout', ['soon', '-1', 'nan', ''])
+def test_long_poll_rejects_bad_timeouts(client, timeout):
+    response = client.get('/events', query_string={'report': 'next', 'timeout': timeout})
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+def test_long_poll_returns_unchanged_after_timeout(client):
+    first = client.get('/events', query_string={'report': 'next', 'timeout': '0'}).get_json()
+    assert first['changed'] and first['status'] == 'success'
+    
+    again = client.get('/events', query_string={'report': 'next', 'since': first['version'], 'timeout': '0.1'})
+    assert again.status_code == 200
+    assert again.get_json() == {'version': first['version'], 'changed': False, 'status': 'success'}
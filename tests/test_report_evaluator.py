@@ -0,0 +1,60 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from conftest import stored_tasks, task_cli
+
+def open_tasks(tenant):
+    return [task for task in stored_tasks(tenant).values() if task['status'] in ('pending', 'waiting')]
+
+def compile_local(app_module, filter_text, sort_text='entry+'):
+    return app_module.compile_report('test', {'report.test.filter': filter_text, 'report.test.sort': sort_text})
+
+@pytest.mark.parametrize('filter_text', [
+    'status:pending',
+    'status:pending +deep',
+    'status:pending -review',
+    'status:pending project:garden',
+    'status:pending +deep -review',
+])
+def test_compiled_filters_match_task_export(app_module, tenant, filter_text):
+    compiled = compile_local(app_module, filter_text)
+    local = compiled.run(open_tasks(tenant), datetime.now().astimezone())
+    exported = {task['uuid'] for task in json.loads(task_cli(tenant, *filter_text.split(), 'export'))}
+    
+    assert {task['uuid'] for task in local} == exported
+    assert [task['entry'] for task in local] == sorted(task['entry'] for task in local)
+
+def test_or_groups(app_module, tenant):
+    compiled = compile_local(app_module, 'status:pending ( +deep or +finance )')
+    local = compiled.run(open_tasks(tenant), datetime.now().astimezone())
+    
+    assert local and all({'deep', 'finance'} & set(task.get('tags', ())) for task in local)
+    assert all(task['status'] == 'pending' for task in local)
+
+@pytest.mark.parametrize('filter_text', [
+    'status:pending +WEEK',
+    'project:garden',
+    'status:pending 3',
+    'status:pending draft.*',
+    'status:pending due.near:tomorrow',
+])
+def test_unsupported_filters_raise(app_module, filter_text):
+    with pytest.raises(app_module.UnsupportedReport):
+        compile_local(app_module, filter_text)
+
+def test_reports_run_locally_or_fall_back_to_task(app_module, tenant, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'REPORT_EVALUATOR', 'local')
+    config = {'report.next.filter': 'status:pending', 'report.next.sort': 'entry+',
+              'report.week.filter': 'status:pending +WEEK', 'report.week.sort': 'due+'}
+    monkeypatch.setattr(tenant.report_definitions, 'config', lambda: config)
+    pending = {task['uuid'] for task in open_tasks(tenant) if task['status'] == 'pending'}
+    
+    assert {task['uuid'] for task in app_module.export_report('next')} == pending
+    app_module.export_report('week')
+    
+    stats = tenant.report_definitions.stats()
+    assert stats['local_runs'] == 1 and stats['cli_fallbacks'] == 1
+    assert stats['compiled'] == ['next']
+    assert 'WEEK' in stats['unsupported']['week']
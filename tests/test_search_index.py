@@ -0,0 +1,49 @@
+import random
+import time
+
+def make_task(uuid, rng, vocabulary):
+    return {'uuid': uuid, 'description': ' '.join(rng.choice(vocabulary) for _ in range(4)),
+            'annotations': [{'description': rng.choice(vocabulary)}] if rng.random() < 0.3 else []}
+
+def task_tokens(task):
+    return set(' '.join([task['description']] + [a['description'] for a in task['annotations']]).split())
+
+def scan(tasks, words):
+    return {uuid for uuid, task in tasks.items()
+            if all(any(token.startswith(word) for token in task_tokens(task)) for word in words)}
+
+def test_queries_match_a_scan_through_adds_and_removes(app_module):
+    rng = random.Random(7)
+    vocabulary = [''.join(rng.choice('abcde') for _ in range(rng.randint(2, 5))) for _ in range(300)]
+    index = app_module.SearchIndex()
+    tasks = {f'{i:08x}': make_task(f'{i:08x}', rng, vocabulary) for i in range(400)}
+    for task in tasks.values():
+        index.add(task)
+    
+    for step in range(300):
+        uuid = rng.choice(list(tasks))
+        index.remove(uuid)
+        if step % 2:
+            del tasks[uuid]
+        else:
+            # New words for the task drop some tokens and bring others back
+            tasks[uuid] = make_task(uuid, rng, vocabulary)
+            index.add(tasks[uuid])
+        if step % 10 == 0:
+            words = [rng.choice(vocabulary)[:rng.randint(1, 3)] for _ in range(rng.randint(1, 2))]
+            assert index.query(words) == scan(tasks, words)
+    
+    assert len(index) == len(set().union(*map(task_tokens, tasks.values())))
+    assert index.query(['a']) == scan(tasks, ['a'])
+
+def test_full_load_with_a_large_vocabulary_is_fast(app_module):
+    tasks = [{'uuid': f'{i:08x}-0000-4000-8000-000000000000', 'status': 'pending',
+              'description': f'word{i * 3} word{i * 3 + 1} word{i * 3 + 2}'} for i in range(100000)]
+    store = app_module.TaskStore()
+    started = time.perf_counter()
+    store.load_all(tasks, ('signature',))
+    elapsed = time.perf_counter() - started
+    
+    assert store.stats()['search_tokens'] == 300000
+    assert store._search.query(['word299999']) == {tasks[-1]['uuid']}
+    assert elapsed < 5
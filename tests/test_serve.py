@@ -0,0 +1,74 @@
+import json
+import os
+import re
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from conftest import ROOT, seed
+
+def start_server(tmp_path, workers, **settings):
+    seed(tmp_path / 'data', 5)
+    env = dict(os.environ, TASKDATA=str(tmp_path / 'data'), ONETASK_LOG_LEVEL='INFO',
+               ONETASK_SHARED_GENERATION_PATH=str(tmp_path / 'generation'), FAKE_TASK_LATENCY='1.5')
+    env.update(settings)
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'app.py'), '--serve', '--port', '0',
+                                '--workers', str(workers)],
+                               env=env, stderr=subprocess.PIPE, text=True)
+    banner = process.stderr.readline()
+    port = re.search(r'Serving OneTask on http://[^:]+:(\d+)', banner)
+    assert port, banner
+    return process, int(port.group(1))
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sigterm_lets_in_flight_requests_finish(tmp_path, workers):
+    process, port = start_server(tmp_path, workers)
+    responses = []
+    
+    def fetch():
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/task/1/annotations', timeout=30) as response:
+            responses.append((response.status, json.load(response)))
+    
+    try:
+        request = threading.Thread(target=fetch)
+        request.start()
+        time.sleep(0.5)
+        process.send_signal(signal.SIGTERM)
+        request.join(timeout=30)
+        assert process.wait(timeout=30) == 0
+    finally:
+        process.kill()
+        process.stderr.close()
+    
+    assert responses and responses[0][0] == 200
+    assert responses[0][1]['status'] == 'success'
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_reports_are_warmed_before_the_first_request(tmp_path, workers):
+    snapshots = tmp_path / 'snapshots.sqlite3'
+    process, _ = start_server(tmp_path, workers, ONETASK_PREFETCH_REPORTS='next',
+                              ONETASK_SNAPSHOT_PATH=str(snapshots), FAKE_TASK_LATENCY='0')
+    try:
+        deadline = time.monotonic() + 15
+        reports = []
+        while not reports and time.monotonic() < deadline:
+            time.sleep(0.2)
+            if snapshots.exists():
+                conn = sqlite3.connect(str(snapshots), timeout=5)
+                try:
+                    reports = [row[0] for row in conn.execute('SELECT report FROM snapshots')]
+                except sqlite3.OperationalError:
+                    pass
+                finally:
+                    conn.close()
+        assert any(report.endswith('/next') for report in reports)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+        process.stderr.close()
@@ -0,0 +1,42 @@
+import multiprocessing
+import threading
+import time
+
+BUMPS = 200
+
+def bump_many(shared):
+    read = shared.value
+    
+    def slow_read():
+        # Widen the read-increment-write window so an unlocked bump would lose increments
+        value = read()
+        time.sleep(0.0005)
+        return value
+    shared.value = slow_read
+    for _ in range(BUMPS):
+        shared.bump()
+
+def test_forked_workers_never_lose_bumps(app_module, tmp_path):
+    # Opened before the fork, as serve() does
+    shared = app_module.SharedGeneration(str(tmp_path / 'generation'))
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=bump_many, args=(shared,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+    
+    assert shared.value() == 4 * BUMPS
+    shared.close()
+
+def test_threads_never_lose_bumps(app_module, tmp_path):
+    shared = app_module.SharedGeneration(str(tmp_path / 'generation'))
+    threads = [threading.Thread(target=bump_many, args=(shared,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert shared.value() == 4 * BUMPS
+    shared.close()
@@ -0,0 +1,17 @@
+import os
+
+from conftest import seed
+
+def test_snapshot_is_only_served_for_its_data_directory(app_module, tenant, tmp_path, monkeypatch):
+    store = app_module.SnapshotStore(str(tmp_path / 'snapshots.sqlite3'))
+    monkeypatch.setattr(app_module, 'snapshot_store', store)
+    tasks = app_module.export_report('next')
+    assert tasks and store.get(app_module.snapshot_key('next'))[0] == tasks
+    
+    seed(tmp_path / 'other', 3)
+    other = app_module.Tenant(app_module.DEFAULT_TENANT, os.devnull, str(tmp_path / 'other'))
+    with app_module.use_tenant(other):
+        assert store.get(app_module.snapshot_key('next')) is None
+        other_tasks, stale_since = app_module.get_report_tasks('next')
+    assert stale_since is None
+    assert {task['uuid'] for task in other_tasks}.isdisjoint(task['uuid'] for task in tasks)
@@ -0,0 +1,49 @@
+from conftest import stored_tasks, task_cli
+
+def two_open_tasks(tenant):
+    tasks = [task for task in stored_tasks(tenant).values() if task['status'] == 'pending']
+    return tasks[0], tasks[1]
+
+def annotations(client, uuid):
+    response = client.get(f'/task/{uuid}/annotations')
+    assert response.status_code == 200
+    return [a['description'] for a in response.get_json()['annotations']]
+
+def test_store_serves_lookups_without_task(client, tenant, app_module):
+    first, _ = two_open_tasks(tenant)
+    annotations(client, first['uuid'])
+    misses = tenant.task_store.misses
+    annotations(client, first['uuid'])
+    assert tenant.task_store.misses == misses
+
+def test_mutation_refresh_follows_changed_task(client, tenant):
+    first, _ = two_open_tasks(tenant)
+    annotations(client, first['uuid'])
+    response = client.post(f"/task/{first['uuid']}/annotations", json={'annotation': 'through the app'})
+    assert response.status_code == 200
+    assert 'through the app' in annotations(client, first['uuid'])
+
+def test_external_edit_before_mutation_drops_the_store(client, tenant):
+    first, second = two_open_tasks(tenant)
+    assert 'from the terminal' not in annotations(client, first['uuid'])
+    assert client.get('/tasks/by-tag/terminal-tag').get_json()['tasks'] == []
+    
+    task_cli(tenant, first['uuid'], 'annotate', 'from the terminal')
+    task_cli(tenant, first['uuid'], 'modify', '+terminal-tag')
+    # A mutation through the app must not adopt the outside edit's data signature
+    assert client.post('/complete_task', json={'task_id': second['uuid']}).status_code == 200
+    
+    assert 'from the terminal' in annotations(client, first['uuid'])
+    tagged = client.get('/tasks/by-tag/terminal-tag').get_json()
+    assert [task['uuid'] for task in tagged['tasks']] == [first['uuid']]
+
+def test_failed_write_then_external_edit_drops_the_store(client, tenant):
+    first, second = two_open_tasks(tenant)
+    assert 'from the terminal' not in annotations(client, first['uuid'])
+    
+    response = client.post('/complete_task', json={'task_id': 'deadbeef-0000-4000-8000-000000000000'})
+    assert response.status_code != 200
+    task_cli(tenant, first['uuid'], 'annotate', 'from the terminal')
+    assert client.post('/complete_task', json={'task_id': second['uuid']}).status_code == 200
+    
+    assert 'from the terminal' in annotations(client, first['uuid'])
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from conftest import seed, stored_tasks
+
+HEADER = 'X-OneTask-Tenant'
+
+@pytest.fixture
+def registry(app_module, tmp_path, monkeypatch):
+    """Multi-tenant mode with tenants alice and bob under a tenant root"""
+    for name, count in (('alice', 6), ('bob', 15)):
+        seed(tmp_path / 'tenants' / name / 'data', count)
+    registry = app_module.TenantRegistry('', str(tmp_path / 'tenants'), cache_limit=8)
+    monkeypatch.setattr(app_module, 'tenant_registry', registry)
+    return registry
+
+def report_uuids(client, tenant):
+    response = client.get('/api/report/next', headers={HEADER: tenant})
+    assert response.status_code == 200
+    return {task['uuid'] for task in response.get_json()['tasks']}
+
+def test_requests_need_a_known_tenant(app_module, registry):
+    client = app_module.app.test_client()
+    assert client.get('/api/report/next').status_code == 400
+    assert client.get('/api/report/next', headers={HEADER: 'carol'}).status_code == 404
+    assert client.get('/api/report/next', headers={HEADER: '../alice'}).status_code == 404
+    assert client.get('/sw.js').status_code == 200
+
+def test_tenants_see_only_their_own_tasks(app_module, registry):
+    client = app_module.app.test_client()
+    alice, bob = report_uuids(client, 'alice'), report_uuids(client, 'bob')
+    assert alice and bob and alice.isdisjoint(bob)
+    
+    page_alice = client.get('/', headers={HEADER: 'alice'})
+    page_bob = client.get('/', headers={HEADER: 'bob'})
+    assert page_alice.headers['ETag'] != page_bob.headers['ETag']
+    assert HEADER in page_alice.headers['Vary']
+    
+    uuid = next(iter(alice))
+    assert client.post('/complete_task', json={'task_id': uuid}, headers={HEADER: 'alice'}).status_code == 200
+    assert uuid not in report_uuids(client, 'alice')
+    assert report_uuids(client, 'bob') == bob
+    assert stored_tasks(registry.get('alice'))[uuid]['status'] == 'completed'
+
+def test_a_busy_tenant_is_turned_away(app_module, registry):
+    tenant = registry.get('bob')
+    tenant.max_waiting = 0
+    with app_module.use_tenant(tenant), pytest.raises(app_module.TenantBusy):
+        app_module.run_task_command(['export'])
+
+def test_evicted_tenants_release_their_snapshots(app_module, registry, tmp_path, monkeypatch):
+    store = app_module.SnapshotStore(str(tmp_path / 'snapshots.sqlite3'))
+    monkeypatch.setattr(app_module, 'snapshot_store', store)
+    registry.cache_limit = 1
+    
+    alice = registry.get('alice')
+    with app_module.use_tenant(alice):
+        app_module.export_report('next')
+        alice_key = app_module.snapshot_key('next')
+    assert alice_key in store.stats()['reports']
+    
+    registry.get('bob')
+    assert registry.peek('alice') is None
+    assert alice_key not in store.stats()['reports']
+    # The row is still on disk for when the tenant comes back
+    deadline = time.time() + 5
+    while store.saves == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    with app_module.use_tenant(registry.get('alice')):
+        assert store.get(alice_key) is not None
@@ -0,0 +1,27 @@
+import pytest
+
+@pytest.mark.parametrize('args, shape', [
+    (['export'], 'export'),
+    (['rc.verbose=nothing', 'export', 'next'], 'export[next]'),
+    (['0a1b2c3d-1111-2222-3333-444455556666', 'export'], 'export[task]'),
+    (['12', 'export'], 'export[task]'),
+    (['1-3', 'done'], 'done[task]'),
+    (['1,2', 'export'], 'export[task]'),
+    (['1-3,7', 'modify', 'priority:H'], 'modify[task]'),
+    (['status:completed', 'end.after:2026-10-01T00:00:00', 'export'], 'export[end.after,status]'),
+    (['+work', 'export'], 'export[+tag]'),
+    (['0a1b2c3d', 'modify', 'due:2026-12-01'], 'modify[task]'),
+    (['0a1b2c3d', 'annotate', 'call', 'back'], 'annotate[task]'),
+    (['add', 'Write', 'report', 'project:home'], 'add'),
+])
+def test_command_shapes(app_module, args, shape):
+    assert app_module.command_shape(args) == shape
+
+def test_single_task_exports_do_not_shorten_full_export_timeouts(app_module):
+    timeouts = app_module.AdaptiveTimeouts(5, 30)
+    timeouts.observe(app_module.command_shape(['export']), 12)
+    for _ in range(200):
+        timeouts.observe(app_module.command_shape(['0a1b2c3d', 'export']), 0.05)
+
+    assert timeouts.timeout_for(app_module.command_shape(['0a1b2c3d', 'export'])) == 5
+    assert timeouts.timeout_for(app_module.command_shape(['export'])) > 12
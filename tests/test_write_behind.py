@@ -0,0 +1,79 @@
+import threading
+import time
+
+from conftest import stored_tasks
+
+def wait_until_idle(queue, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with queue._cond:
+            if not queue._pending and not queue._in_flight:
+                return
+        time.sleep(0.02)
+    raise AssertionError('write-behind queue did not drain')
+
+def pending_task(tenant):
+    return next(task for task in stored_tasks(tenant).values() if task['status'] == 'pending')
+
+def test_opposite_actions_cancel_before_apply(app_module, tenant, tmp_path):
+    queue = app_module.WriteBehindQueue(str(tmp_path / 'journal'), delay=0.5)
+    queue.start()
+    task = pending_task(tenant)
+    
+    assert queue.enqueue({'action': 'complete', 'task_id': task['uuid']})
+    assert not queue.enqueue({'action': 'uncomplete', 'task_id': task['uuid']})
+    wait_until_idle(queue)
+    
+    assert queue.coalesced == 2 and queue.applied == 0
+    assert stored_tasks(tenant)[task['uuid']]['status'] == 'pending'
+
+def test_reversal_of_an_operation_being_applied_is_queued(app_module, tenant, tmp_path, monkeypatch):
+    queue = app_module.WriteBehindQueue(str(tmp_path / 'journal'), delay=0)
+    applying, release = threading.Event(), threading.Event()
+    apply_batch_operations = app_module.apply_batch_operations
+    
+    def slow_apply(operations):
+        applying.set()
+        release.wait(10)
+        return apply_batch_operations(operations)
+    
+    monkeypatch.setattr(app_module, 'apply_batch_operations', slow_apply)
+    queue.start()
+    task = pending_task(tenant)
+    
+    queue.enqueue({'action': 'complete', 'task_id': task['uuid']})
+    assert applying.wait(10)
+    # The complete is already with TaskWarrior, so the undo must not cancel it
+    assert queue.enqueue({'action': 'uncomplete', 'task_id': task['uuid']})
+    release.set()
+    wait_until_idle(queue)
+    
+    assert queue.coalesced == 0 and queue.applied == 2
+    assert stored_tasks(tenant)[task['uuid']]['status'] == 'pending'
+
+def test_later_entries_keep_their_own_coalescing_window(app_module, tenant, tmp_path, monkeypatch):
+    queue = app_module.WriteBehindQueue(str(tmp_path / 'journal'), delay=0.6)
+    applied, first_batch = [], threading.Event()
+    apply_batch_operations = app_module.apply_batch_operations
+    
+    def recording_apply(operations):
+        applied.append([op['task_id'] for op in operations])
+        first_batch.set()
+        return apply_batch_operations(operations)
+    
+    monkeypatch.setattr(app_module, 'apply_batch_operations', recording_apply)
+    queue.start()
+    early, late = [task for task in stored_tasks(tenant).values() if task['status'] == 'pending'][:2]
+    
+    queue.enqueue({'action': 'complete', 'task_id': early['uuid']})
+    time.sleep(0.4)
+    queue.enqueue({'action': 'complete', 'task_id': late['uuid']})
+    assert first_batch.wait(10)
+    # The early entry's window has closed, but the late one's is still open
+    assert not queue.enqueue({'action': 'uncomplete', 'task_id': late['uuid']})
+    wait_until_idle(queue)
+    
+    assert applied == [[early['uuid']]]
+    assert queue.coalesced == 2 and queue.applied == 1
+    tasks = stored_tasks(tenant)
+    assert tasks[early['uuid']]['status'] == 'completed' and tasks[late['uuid']]['status'] == 'pending'
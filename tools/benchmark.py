@@ -0,0 +1,208 @@
+"""Benchmark OneTask's routes against the fake `task` binary
+
+Seeds a throwaway data directory with synthetic tasks, puts
+tools/fake_task.py on PATH as `task`, and drives each route through the
+Flask test client, reporting latency percentiles, throughput and peak RSS:
+
+    python tools/benchmark.py                       # 1000 tasks, no latency
+    python tools/benchmark.py --tasks 20000 --latency 0.05 --jitter 0.02
+    python tools/benchmark.py --routes index,stats --iterations 200
+    python tools/benchmark.py --json run.json --compare previous.json
+
+ONETASK_* settings in the environment apply as usual, except that the
+snapshot file, write-behind journal and cache generation file are kept in
+the throwaway directory. Use --json on one commit and --compare on the
+next to see per-route regressions.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.dirname(TOOLS_DIR))
+
+from synthetic_tasks import TAGS, WORDS, generate_tasks
+
+def setup_environment(args):
+    """Seed TASKDATA and install the fake binary; must run before importing app"""
+    workdir = tempfile.mkdtemp(prefix='onetask-bench-')
+    data_dir = os.path.join(workdir, 'taskdata')
+    bin_dir = os.path.join(workdir, 'bin')
+    os.makedirs(data_dir)
+    os.makedirs(bin_dir)
+
+    tasks = generate_tasks(args.tasks, seed=args.seed, tags_per_task=args.tags_per_task,
+                           annotation_rate=args.annotation_rate, due_rate=args.due_rate,
+                           completed_rate=args.completed_rate)
+    with open(os.path.join(data_dir, 'fake-tasks.json'), 'w') as f:
+        json.dump(tasks, f)
+
+    wrapper = os.path.join(bin_dir, 'task')
+    with open(wrapper, 'w') as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(TOOLS_DIR, "fake_task.py")}" "$@"\n')
+    os.chmod(wrapper, 0o755)
+
+    os.environ['PATH'] = bin_dir + os.pathsep + os.environ.get('PATH', '')
+    os.environ['TASKDATA'] = data_dir
+    os.environ['TASKRC'] = os.devnull
+    # Keep every file the app persists in the scratch directory, away from the real instance/
+    if os.environ.get('ONETASK_SNAPSHOT_PATH') != '':
+        os.environ['ONETASK_SNAPSHOT_PATH'] = os.path.join(workdir, 'snapshots.sqlite3')
+    os.environ['ONETASK_WRITE_BEHIND_JOURNAL'] = os.path.join(workdir, 'mutations.journal')
+    os.environ['ONETASK_SHARED_GENERATION_PATH'] = os.path.join(workdir, 'cache-generation')
+    os.environ['FAKE_TASK_LATENCY'] = str(args.latency)
+    os.environ['FAKE_TASK_JITTER'] = str(args.jitter)
+    return workdir, tasks
+
+def build_scenarios(tasks):
+    """Route name -> function(i) returning (method, url, json body)"""
+    pending = [task['uuid'] for task in tasks if task['status'] == 'pending']
+    completed = [task['uuid'] for task in tasks if task['status'] == 'completed'] or pending
+    annotated = [task['uuid'] for task in tasks if task.get('annotations')] or pending
+
+    def pick(uuids, i):
+        return uuids[i % len(uuids)]
+
+    return {
+        'index': lambda i: ('GET', '/', None),
+        'stats': lambda i: ('GET', '/stats', None),
+        'api_report': lambda i: ('GET', '/api/report/next', None),
+        'complete_task': lambda i: ('POST', '/complete_task', {'task_id': pick(pending, i)}),
+        'uncomplete_task': lambda i: ('POST', '/uncomplete_task', {'task_id': pick(completed, i)}),
+        'capture': lambda i: ('POST', '/capture', {'task': f'Benchmark capture {i} +{TAGS[i % len(TAGS)]}'}),
+        'annotations_get': lambda i: ('GET', f'/task/{pick(annotated, i)}/annotations', None),
+        'annotations_add': lambda i: ('POST', f'/task/{pick(pending, i)}/annotations',
+                                      {'annotation': f'benchmark note {i}'}),
+        'by_tag': lambda i: ('GET', f'/tasks/by-tag/{TAGS[i % len(TAGS)]}', None),
+        'tags': lambda i: ('GET', '/tags', None),
+        'search': lambda i: ('GET', f'/search?q={WORDS[i % len(WORDS)][:3]}', None),
+    }
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(who).ru_maxrss / divisor, 1)
+
+def run_scenario(app, scenario, iterations, concurrency):
+    local = threading.local()
+
+    def one_request(i):
+        # One test client per thread
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        method, url, body = scenario(i)
+        start = time.perf_counter()
+        response = local.client.open(url, method=method, json=body)
+        response.get_data()
+        return time.perf_counter() - start, response.status_code
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        samples = [one_request(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(one_request, range(iterations)))
+    wall = time.perf_counter() - started
+
+    timings = sorted(duration for duration, _ in samples)
+    return {
+        'requests': iterations,
+        'errors': sum(1 for _, status in samples if status >= 400),
+        'cold_ms': round(samples[0][0] * 1000, 2),
+        'mean_ms': round(statistics.mean(timings) * 1000, 2),
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'throughput_rps': round(iterations / wall, 1) if wall else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=TOOLS_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def print_results(results, previous=None):
+    columns = ('cold_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'peak_rss_mb', 'errors')
+    header = f"{'route':<16}" + ''.join(f' {column:>17}' for column in columns)
+    print(header)
+    for name, row in results['routes'].items():
+        cells = []
+        for column in columns:
+            cell = f"{row[column]}"
+            before = (previous or {}).get('routes', {}).get(name, {}).get(column)
+            if before and column.endswith('_ms'):
+                cell += f" ({(row[column] - before) / before * 100:+.0f}%)"
+            cells.append(f' {cell:>17}')
+        print(f'{name:<16}' + ''.join(cells))
+    print(f"peak RSS: app {results['peak_rss_mb']} MB, task subprocesses {results['peak_child_rss_mb']} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000, help='synthetic tasks to seed')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--tags-per-task', type=int, default=2)
+    parser.add_argument('--annotation-rate', type=float, default=0.3)
+    parser.add_argument('--due-rate', type=float, default=0.4)
+    parser.add_argument('--completed-rate', type=float, default=0.2)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every task call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random seconds per task call')
+    parser.add_argument('--iterations', type=int, default=50, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads per route')
+    parser.add_argument('--routes', help='comma-separated subset of routes (default: all)')
+    parser.add_argument('--json', dest='json_path', help='write results here')
+    parser.add_argument('--compare', help='results JSON from an earlier run to diff against')
+    args = parser.parse_args()
+
+    workdir, tasks = setup_environment(args)
+    import app as onetask
+
+    scenarios = build_scenarios(tasks)
+    names = args.routes.split(',') if args.routes else list(scenarios)
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        parser.error(f"unknown routes {', '.join(unknown)}; choose from {', '.join(scenarios)}")
+
+    results = {
+        'revision': git_revision(),
+        'tasks': args.tasks,
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'iterations': args.iterations,
+        'concurrency': args.concurrency,
+        'routes': {},
+    }
+    for name in names:
+        results['routes'][name] = run_scenario(onetask.app, scenarios[name], args.iterations, args.concurrency)
+    results['peak_rss_mb'] = peak_rss_mb()
+    results['peak_child_rss_mb'] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print(f"{args.tasks} tasks, {args.latency}s latency, {args.iterations} requests x {args.concurrency} "
+          f"threads per route, data in {workdir}")
+    print_results(results, previous)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
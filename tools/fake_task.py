@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Stand-in for the `task` binary, backed by a JSON file, for benchmarks
+
+Understands the subset of TaskWarrior that OneTask runs: export (by report,
+ID/UUID, tag, status and end.after filters), add, done, modify, annotate,
+denotate, import, count, _show and version, with `rc.*` overrides ignored.
+Output lines match TaskWarrior's ("Created task 3.", "Completed 2 tasks.")
+so the app parses them as usual.
+
+Tasks live in $TASKDATA/fake-tasks.json (seed it with tools/benchmark.py or
+`python tools/fake_task.py --seed COUNT`). Each write also appends to
+$TASKDATA/undo.data so the app sees the data directory change, as it would
+with the real binary.
+
+Environment:
+    FAKE_TASK_LATENCY   seconds to sleep before every command (default 0)
+    FAKE_TASK_JITTER    extra random seconds, uniform in [0, jitter] (default 0)
+"""
+import calendar
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_tasks import generate_tasks, taskwarrior_date
+
+COMMANDS = {'export', 'add', 'done', 'modify', 'annotate', 'denotate', 'import',
+            'count', '_show', 'show', 'version', '_version'}
+# Report names accepted by export; all of them select pending tasks
+REPORTS = {'next', 'list', 'ready', 'focus', 'someday', 'active', 'overdue', 'waiting', 'all'}
+
+def data_file():
+    data_dir = os.path.expanduser(os.environ.get('TASKDATA', '~/.task'))
+    return os.path.join(data_dir, 'fake-tasks.json')
+
+def load_tasks():
+    try:
+        with open(data_file()) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+def save_tasks(tasks):
+    path = data_file()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(tasks, f)
+    os.replace(path + '.tmp', path)
+    with open(os.path.join(os.path.dirname(path), 'undo.data'), 'a') as f:
+        f.write(f'time {taskwarrior_date(time.time())}\n')
+
+def parse_date(value):
+    """Epoch seconds for the date forms OneTask sends, or None"""
+    value = value.strip()
+    if value in ('now', ''):
+        return time.time()
+    if value in ('today', 'tomorrow'):
+        midnight = time.mktime(time.localtime()[:3] + (0, 0, 0, 0, 0, -1))
+        return midnight + (86400 if value == 'tomorrow' else 0)
+    for fmt, utc in (('%Y%m%dT%H%M%SZ', True), ('%Y-%m-%dT%H:%M:%S', False),
+                     ('%Y-%m-%dT%H:%M', False), ('%Y-%m-%d', False)):
+        try:
+            parsed = time.strptime(value, fmt)
+        except ValueError:
+            continue
+        return calendar.timegm(parsed) if utc else time.mktime(parsed)
+    return None
+
+def fail(message, code=1):
+    print(message, file=sys.stderr)
+    sys.exit(code)
+
+def matches(task, filters):
+    """Apply TaskWarrior-style filter words: IDs/UUIDs are OR'd, everything else AND'd"""
+    ids = [word for word in filters if word.isdigit() or (len(word) >= 8 and all(c in '0123456789abcdef-' for c in word))]
+    if ids and not any(str(task.get('id')) == word or task['uuid'].startswith(word) for word in ids):
+        return False
+    tags = task.get('tags') or []
+    for word in filters:
+        if word in ids:
+            continue
+        if word in REPORTS:
+            if task['status'] != 'pending':
+                return False
+        elif word.startswith('+'):
+            if word[1:] not in tags:
+                return False
+        elif word.startswith('-'):
+            if word[1:] in tags:
+                return False
+        elif word.startswith('tag:') or word.startswith('tags:'):
+            if word.partition(':')[2] not in tags:
+                return False
+        elif word.startswith('status:'):
+            if task['status'] != word[7:]:
+                return False
+        elif word.startswith('project:'):
+            if task.get('project', '') != word[8:]:
+                return False
+        elif word.startswith('end.after:'):
+            since = parse_date(word[10:])
+            end = parse_date(task['end']) if task.get('end') else None
+            if since is None:
+                fail(f"Cannot parse date '{word[10:]}'.", 2)
+            if end is None or end <= since:
+                return False
+        elif word.lower() not in task.get('description', '').lower():
+            return False
+    return True
+
+def apply_modifications(task, words):
+    """Apply attribute and tag modifications; return the remaining description words"""
+    rest = []
+    for word in words:
+        name, sep, value = word.partition(':')
+        if word.startswith('+') and len(word) > 1:
+            task['tags'] = sorted(set(task.get('tags') or []) | {word[1:]})
+        elif word.startswith('-') and len(word) > 1 and ' ' not in word:
+            task['tags'] = [tag for tag in task.get('tags') or [] if tag != word[1:]]
+            if not task['tags']:
+                del task['tags']
+        elif sep and name in ('due', 'scheduled', 'wait', 'until'):
+            if value:
+                epoch = parse_date(value)
+                if epoch is None:
+                    fail(f"'{value}' is not a valid date.", 2)
+                task[name] = taskwarrior_date(epoch)
+            else:
+                task.pop(name, None)
+        elif sep and name in ('project', 'priority', 'estimate', 'url', 'status'):
+            if value:
+                task[name] = value
+            else:
+                task.pop(name, None)
+            if name == 'status' and value == 'pending':
+                task.pop('end', None)
+        else:
+            rest.append(word)
+    return rest
+
+def renumber(tasks):
+    """Give pending tasks working set IDs 1..n in their current order"""
+    number = 0
+    for task in tasks:
+        if task['status'] == 'pending':
+            number += 1
+            task['id'] = number
+        else:
+            task['id'] = 0
+
+def plural(count, word):
+    return f"{count} {word}" + ('' if count == 1 else 's')
+
+def main(argv):
+    time.sleep(float(os.environ.get('FAKE_TASK_LATENCY', '0'))
+               + random.uniform(0, float(os.environ.get('FAKE_TASK_JITTER', '0'))))
+
+    args = [arg for arg in argv if not arg.startswith('rc.')]
+    position = next((i for i, arg in enumerate(args) if arg in COMMANDS), None)
+    if position is None:
+        # Bare filters run the default report
+        args.append('export')
+        position = len(args) - 1
+    command, filters, words = args[position], args[:position], args[position + 1:]
+
+    if command in ('version', '_version'):
+        print('3.0.0 (fake)')
+        return 0
+    if command in ('_show', 'show'):
+        print('report.next.filter=status:pending -WAITING limit:page')
+        print('report.next.sort=urgency-')
+        return 0
+
+    tasks = load_tasks()
+
+    if command == 'import':
+        imported = json.loads(sys.stdin.read() or '[]')
+        by_uuid = {task['uuid']: task for task in tasks}
+        for task in imported:
+            task.setdefault('uuid', str(uuid.uuid4()))
+            task.setdefault('status', 'pending')
+            task.setdefault('entry', taskwarrior_date(time.time()))
+            if task['uuid'] in by_uuid:
+                by_uuid[task['uuid']].update(task)
+            else:
+                tasks.append(task)
+            print(f"add  {task['uuid']} {task.get('description', '')}")
+        renumber(tasks)
+        save_tasks(tasks)
+        print(f"Imported {plural(len(imported), 'task')}.")
+        return 0
+
+    if command == 'add':
+        now = taskwarrior_date(time.time())
+        task = {'uuid': str(uuid.uuid4()), 'status': 'pending', 'entry': now, 'modified': now}
+        description = ' '.join(apply_modifications(task, words))
+        if not description:
+            fail('Additional text must be provided.')
+        task['description'] = description
+        tasks.append(task)
+        renumber(tasks)
+        save_tasks(tasks)
+        print(f"Created task {task['id']}.")
+        return 0
+
+    # Export accepts the report name or filter after the command as well
+    if command in ('export', 'count'):
+        filters = filters + words
+    selected = [task for task in tasks if matches(task, filters)]
+
+    if command == 'export':
+        print(json.dumps(selected))
+        return 0
+    if command == 'count':
+        print(len(selected))
+        return 0
+
+    if not filters:
+        fail('Command prevented from running.')
+    if not selected:
+        fail('No tasks specified.')
+
+    now = taskwarrior_date(time.time())
+    changed = 0
+    for task in selected:
+        if command == 'done':
+            if task['status'] != 'pending':
+                print(f"Task {task['uuid'][:8]} '{task['description']}' is neither pending nor waiting.")
+                continue
+            task['status'] = 'completed'
+            task['end'] = now
+            print(f"Completed task {task['uuid'][:8]} '{task['description']}'.")
+        elif command == 'modify':
+            if apply_modifications(task, words):
+                fail('Unrecognized modification.', 2)
+            print(f"Modifying task {task['uuid'][:8]} '{task['description']}'.")
+        elif command == 'annotate':
+            text = ' '.join(words)
+            task.setdefault('annotations', []).append({'entry': now, 'description': text})
+            print(f"Annotating task {task['uuid'][:8]} '{task['description']}'.")
+        elif command == 'denotate':
+            text = ' '.join(words)
+            annotations = task.get('annotations') or []
+            match = next((a for a in annotations if a['description'] == text), None) \
+                or next((a for a in annotations if a['description'].startswith(text)), None)
+            if match is None:
+                print(f"Did not find any matching annotation to be deleted for '{text}'.")
+                continue
+            annotations.remove(match)
+            if not annotations:
+                del task['annotations']
+            print(f"Found annotation '{match['description']}' and deleted it.")
+        task['modified'] = now
+        changed += 1
+
+    renumber(tasks)
+    save_tasks(tasks)
+    verb = {'done': 'Completed', 'modify': 'Modified', 'annotate': 'Annotated', 'denotate': 'Denotated'}[command]
+    print(f"{verb} {plural(changed, 'task')}.")
+    return 0
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--seed']:
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        save_tasks(generate_tasks(count, seed=count, completed_rate=0.2))
+        print(f"Seeded {data_file()} with {count} tasks.")
+        sys.exit(0)
+    sys.exit(main(sys.argv[1:]))
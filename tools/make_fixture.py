@@ -0,0 +1,130 @@
+"""Generate the TaskWarrior data fixtures used to exercise the direct read backend
+
+Writes a TaskWarrior 3 (TaskChampion) database to fixtures/taskdata/ and the
+equivalent legacy 2.x files to fixtures/taskdata-legacy/. Point TASKDATA at
+either directory and set ONETASK_READ_BACKEND=direct to read them without a
+`task` binary.
+"""
+import json
+import os
+import sqlite3
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Epoch seconds keep the fixture stable; 1760000000 is 2025-10-09T08:53:20Z
+BASE_TIME = 1760000000
+
+TASKS = [
+    {
+        'uuid': '0f3a6c1e-5b1d-4c2e-9a51-6d0c2f0e1a01',
+        'description': 'Write quarterly report',
+        'status': 'pending',
+        'entry': BASE_TIME,
+        'modified': BASE_TIME + 600,
+        'due': BASE_TIME + 3 * 86400,
+        'priority': '1',
+        'project': 'work',
+        'estimate': '1h30m',
+        'tags': ['work', 'deep'],
+        'annotations': [(BASE_TIME + 60, 'Outline in shared drive'),
+                        (BASE_TIME + 120, 'Ask finance for numbers')],
+    },
+    {
+        'uuid': '1b7e2d40-8c3f-4a6b-b2e9-7f1d3c4e5a02',
+        'description': 'Call plumber about "leaky" tap [kitchen]',
+        'status': 'pending',
+        'entry': BASE_TIME + 3600,
+        'modified': BASE_TIME + 3600,
+        'priority': '2',
+        'project': 'home',
+        'estimate': '15m',
+        'url': 'https://example.com/plumber',
+        'tags': ['home', 'call'],
+        'annotations': [],
+    },
+    {
+        'uuid': '2c8f3e51-9d4a-4b7c-83fa-8a2e4d5f6b03',
+        'description': 'Renew passport',
+        'status': 'waiting',
+        'entry': BASE_TIME + 7200,
+        'modified': BASE_TIME + 7200,
+        'wait': BASE_TIME + 30 * 86400,
+        'estimate': '45m',
+        'tags': ['errand'],
+        'annotations': [],
+    },
+    {
+        'uuid': '3d9a4f62-ae5b-4c8d-94ab-9b3f5e6a7c04',
+        'description': 'Pay electricity bill',
+        'status': 'completed',
+        'entry': BASE_TIME - 86400,
+        'modified': BASE_TIME + 100,
+        'end': BASE_TIME + 100,
+        'priority': '1',
+        'estimate': '5m',
+        'tags': ['home'],
+        'annotations': [(BASE_TIME + 90, 'Paid online')],
+    },
+]
+
+def taskchampion_properties(task):
+    """Flatten a fixture task into TaskChampion's string key/value map"""
+    properties = {}
+    for key, value in task.items():
+        if key in ('uuid', 'tags', 'annotations'):
+            continue
+        properties[key] = str(value)
+    for tag in task['tags']:
+        properties[f'tag_{tag}'] = ''
+    for entry, description in task['annotations']:
+        properties[f'annotation_{entry}'] = description
+    return properties
+
+def write_taskchampion(path):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE tasks (uuid STRING PRIMARY KEY, data STRING);
+        CREATE TABLE working_set (id INTEGER PRIMARY KEY, uuid STRING);
+        CREATE TABLE operations (id INTEGER PRIMARY KEY AUTOINCREMENT, data STRING);
+        CREATE TABLE sync_meta (key STRING PRIMARY KEY, value STRING);
+    ''')
+    number = 0
+    for task in TASKS:
+        conn.execute('INSERT INTO tasks (uuid, data) VALUES (?, ?)',
+                     (task['uuid'], json.dumps(taskchampion_properties(task))))
+        if task['status'] in ('pending', 'waiting'):
+            number += 1
+            conn.execute('INSERT INTO working_set (id, uuid) VALUES (?, ?)', (number, task['uuid']))
+    conn.commit()
+    conn.close()
+
+def legacy_line(task):
+    """Encode a fixture task in the 2.x `[key:"value" ...]` format"""
+    attributes = dict(taskchampion_properties(task))
+    attributes = {k: v for k, v in attributes.items() if not k.startswith('tag_')}
+    attributes['uuid'] = task['uuid']
+    if task['tags']:
+        attributes['tags'] = ','.join(task['tags'])
+    
+    def encode(value):
+        return json.dumps(value)[1:-1].replace('[', '&open;').replace(']', '&close;')
+    
+    return '[' + ' '.join(f'{key}:"{encode(value)}"' for key, value in sorted(attributes.items())) + ']\n'
+
+def write_legacy(directory):
+    with open(os.path.join(directory, 'pending.data'), 'w', encoding='utf-8') as pending, \
+         open(os.path.join(directory, 'completed.data'), 'w', encoding='utf-8') as completed:
+        for task in TASKS:
+            target = pending if task['status'] in ('pending', 'waiting') else completed
+            target.write(legacy_line(task))
+
+if __name__ == '__main__':
+    modern_dir = os.path.join(FIXTURES_DIR, 'taskdata')
+    legacy_dir = os.path.join(FIXTURES_DIR, 'taskdata-legacy')
+    os.makedirs(modern_dir, exist_ok=True)
+    os.makedirs(legacy_dir, exist_ok=True)
+    write_taskchampion(os.path.join(modern_dir, 'taskchampion.sqlite3'))
+    write_legacy(legacy_dir)
+    print(f"Fixtures written to {FIXTURES_DIR}")
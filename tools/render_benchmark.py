@@ -0,0 +1,55 @@
+"""Measure task page render time and HTML size for large synthetic reports
+
+Primes the report cache with synthetic tasks, so no `task` binary is needed:
+
+    python tools/render_benchmark.py            # 1k, 10k and 50k tasks
+    python tools/render_benchmark.py 2000 20000
+"""
+import gzip
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure rendering, not reuse of a page already rendered for the same data
+os.environ['ONETASK_RESPONSE_CACHE_MB'] = '0'
+# Synthetic reports must never reach the real data directory or snapshot file
+_scratch = tempfile.mkdtemp(prefix='onetask-render-')
+os.environ.update(TASKDATA=os.path.join(_scratch, 'taskdata'), TASKRC=os.devnull,
+                  ONETASK_SNAPSHOT_PATH='',
+                  ONETASK_WRITE_BEHIND_JOURNAL=os.path.join(_scratch, 'mutations.journal'),
+                  ONETASK_SHARED_GENERATION_PATH=os.path.join(_scratch, 'cache-generation'))
+
+from synthetic_tasks import generate_tasks
+import app as onetask
+
+def measure(count, runs=5):
+    tasks = generate_tasks(count, seed=count)
+    report_name = f'bench{count}'
+    client = onetask.app.test_client()
+    
+    timings = []
+    for _ in range(runs):
+        onetask.report_cache.set(report_name, tasks, onetask.report_cache.generation,
+                                 onetask.get_taskdata_signature())
+        start = time.perf_counter()
+        response = client.get(f'/?report={report_name}')
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    
+    html = response.data
+    return {
+        'tasks': count,
+        'render_ms': round(statistics.median(timings) * 1000, 1),
+        'html_bytes': len(html),
+        'gzip_bytes': len(gzip.compress(html)),
+    }
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    print(f"{'tasks':>8} {'render ms':>10} {'html bytes':>12} {'gzip bytes':>11}")
+    for size in sizes:
+        result = measure(size)
+        print(f"{result['tasks']:>8} {result['render_ms']:>10} {result['html_bytes']:>12} {result['gzip_bytes']:>11}")
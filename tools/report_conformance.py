@@ -0,0 +1,103 @@
+"""Check the local report evaluator against the real `task` binary
+
+For each report, runs `task export <report>` and the in-process evaluator
+(ONETASK_REPORT_EVALUATOR=local) on the same data, and compares the UUIDs
+in order. It also compares OneTask's urgency formula with the urgency
+TaskWarrior exports for every open task:
+
+    python tools/report_conformance.py                 # every configured report
+    python tools/report_conformance.py next list ready
+    python tools/report_conformance.py --local-urgency # sort by computed urgency too
+
+Uses TASKRC/TASKDATA from the environment and only runs read commands.
+Reports the evaluator cannot compile are listed as skipped (the app sends
+those to the CLI). Exits 1 when any report or urgency value disagrees.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as onetask
+
+def task_export(args):
+    result = subprocess.run(['task', 'rc.verbose=nothing', 'rc.hooks=off'] + args,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise SystemExit(f"task {' '.join(args)} failed: {result.stderr.strip()}")
+    return json.loads(result.stdout or '[]')
+
+def first_difference(expected, actual):
+    for position, (left, right) in enumerate(zip(expected, actual)):
+        if left != right:
+            return position
+    return min(len(expected), len(actual))
+
+def check_urgency(open_tasks, compiled, now):
+    """Largest gap between exported and computed urgency, and the task it is on"""
+    stripped = [{key: value for key, value in task.items() if key != 'urgency'} for task in open_tasks]
+    ctx = onetask.EvaluationContext(stripped, compiled.urgency_model, compiled.due_days, now)
+    worst, worst_task = 0.0, None
+    for original, task in zip(open_tasks, stripped):
+        gap = abs(ctx.urgency(task) - float(original.get('urgency', 0)))
+        if gap > worst:
+            worst, worst_task = gap, original
+    return worst, worst_task
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('reports', nargs='*', help='report names (default: every report.*.filter)')
+    parser.add_argument('--local-urgency', action='store_true',
+                        help='ignore exported urgency and sort by the computed value')
+    parser.add_argument('--tolerance', type=float, default=0.01, help='allowed urgency difference')
+    args = parser.parse_args()
+
+    config = onetask.report_definitions.config()
+    names = args.reports or sorted({key.split('.')[1] for key in config
+                                    if key.startswith('report.') and key.endswith('.filter')})
+    open_tasks = task_export(onetask.OPEN_EXPORT_ARGS)
+    now = datetime.now().astimezone()
+    base = open_tasks
+    if args.local_urgency:
+        base = [{key: value for key, value in task.items() if key != 'urgency'} for task in open_tasks]
+
+    failures = 0
+    compiled_any = None
+    for name in names:
+        try:
+            compiled = onetask.compile_report(name, config)
+        except onetask.UnsupportedReport as e:
+            print(f'SKIP  {name}: {e}')
+            continue
+        compiled_any = compiled
+        expected = [task['uuid'] for task in task_export(['export', name])]
+        actual = [task['uuid'] for task in compiled.run(base, now)]
+        if expected == actual:
+            print(f'OK    {name}: {len(actual)} tasks')
+            continue
+        failures += 1
+        position = first_difference(expected, actual)
+        print(f'DIFF  {name}: task has {len(expected)}, evaluator has {len(actual)}; '
+              f'first difference at position {position}')
+        missing, extra = set(expected) - set(actual), set(actual) - set(expected)
+        if missing:
+            print(f'      only in task: {", ".join(sorted(missing)[:5])}')
+        if extra:
+            print(f'      only in evaluator: {", ".join(sorted(extra)[:5])}')
+
+    if compiled_any is not None and open_tasks:
+        worst, task = check_urgency(open_tasks, compiled_any, now)
+        if worst > args.tolerance:
+            failures += 1
+            print(f'DIFF  urgency: off by {worst:.4f} on {task["uuid"]} ({task.get("description", "")!r})')
+        else:
+            print(f'OK    urgency: {len(open_tasks)} tasks within {args.tolerance}')
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
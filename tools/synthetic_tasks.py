@@ -0,0 +1,68 @@
+"""Synthetic TaskWarrior exports for benchmarks and the fake `task` binary"""
+import random
+import time
+import uuid
+
+TAGS = ['work', 'home', 'errand', 'deep', 'call', 'email', 'review', 'health', 'finance', 'read']
+PROJECTS = ['', 'web', 'ops', 'house', 'garden', 'taxes', 'writing']
+ESTIMATES = ['', '5m', '15m', '30m', '45m', '1h', '1h30m', '2h', 'PT45M']
+WORDS = ('update review draft send call fix plan clean order book check write read '
+         'prepare schedule email report invoice backup refactor test deploy').split()
+
+def taskwarrior_date(epoch):
+    return time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(epoch))
+
+def generate_tasks(count, seed=0, tags_per_task=2, annotation_rate=0.3, due_rate=0.4,
+                   completed_rate=0.0, now=None):
+    """Return count tasks shaped like `task export` output
+    
+    Tasks are pending except for roughly completed_rate of them, which were
+    completed within the last 40 days. The same seed always yields the same
+    tasks, so runs are comparable.
+    """
+    rng = random.Random(seed)
+    now = int(now or time.time())
+    tasks = []
+    for number in range(1, count + 1):
+        entry = now - rng.randint(0, 400 * 86400)
+        task = {
+            'id': number,
+            'uuid': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 8))).capitalize(),
+            'status': 'pending',
+            'entry': taskwarrior_date(entry),
+            'modified': taskwarrior_date(entry + rng.randint(0, 86400)),
+            'priority': rng.choice(['1', '2', '3']),
+            'urgency': round(rng.uniform(0, 20), 6),
+        }
+        estimate = rng.choice(ESTIMATES)
+        if estimate:
+            task['estimate'] = estimate
+        project = rng.choice(PROJECTS)
+        if project:
+            task['project'] = project
+        if tags_per_task:
+            task['tags'] = sorted(rng.sample(TAGS, rng.randint(0, tags_per_task)))
+            if not task['tags']:
+                del task['tags']
+        if rng.random() < due_rate:
+            task['due'] = taskwarrior_date(now + rng.randint(-10, 30) * 86400)
+        if rng.random() < annotation_rate:
+            task['annotations'] = [
+                {'entry': taskwarrior_date(entry + i * 3600),
+                 'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))}
+                for i in range(rng.randint(1, 3))
+            ]
+        if rng.random() < 0.1:
+            task['url'] = f'https://example.com/item/{number}'
+        if completed_rate and rng.random() < completed_rate:
+            task['status'] = 'completed'
+            task['end'] = taskwarrior_date(max(entry, now - rng.randint(0, 40 * 86400)))
+            task['id'] = 0
+        tasks.append(task)
+    tasks.sort(key=lambda task: -task['urgency'])
+    # Pending tasks are renumbered 1..n like a freshly garbage-collected working set
+    pending = (task for task in tasks if task['status'] == 'pending')
+    for number, task in enumerate(pending, start=1):
+        task['id'] = number
+    return tasks